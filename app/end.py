@@ -9,8 +9,15 @@ def go():
     ses = Session()
     logger.info("H was\n{0}".format(ses.h))
     logger.info("Syndrome was\n{0}".format(ses.syndrome))
-    logger.info("With {} accuracy error is \n{}".format(
-        ses.accuracy, ses.error))
+    if ses.result is None:
+        logger.info(
+            "The job has not been executed yet, resume it later on w/ --resume_job"
+        )
+    else:
+        logger.info("With {} accuracy error is \n{}".format(
+            ses.accuracy, ses.error))
+    if ses.qc is None:
+        return
     if ses.args.export_qasm_file is not None:
         misc.export_circuit_to_qasm(ses.qc, ses.args.export_qasm_file)
     if ses.args.draw_circuit:
@@ -1,6 +1,7 @@
 import logging
 from isdquantum.methods.algorithms.bruteforce_alg import BruteforceAlg
 from isdquantum.utils import misc
+from isdquantum.utils.job_store import JobStore
 from app.session import Session
 from app import end
 logger = logging.getLogger(__name__)
@@ -10,6 +11,15 @@ def go():
     ses = Session()
     bru = BruteforceAlg(ses.h, ses.syndrome, ses.args.w, ses.need_measures,
                         ses.args.mct_mode, ses.args.nwr_mode)
+    if ses.args.job_dir is not None:
+        bru.job_store = JobStore(ses.args.job_dir)
+    if ses.args.resume_job is not None:
+        ses.qc = None
+        ses.result, errors, accuracies = bru.resume(
+            ses.args.resume_job, ses.args.provider, wait=True)
+        ses.error, ses.accuracy = errors[0], accuracies[0]
+        end.go()
+        return
     ses.qc, ses.backend = bru.prepare_circuit_for_backend(
         ses.args.provider, ses.args.backend)
     if ses.args.infos:
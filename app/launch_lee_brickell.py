@@ -1,6 +1,7 @@
 import logging
 from isdquantum.methods.algorithms.lee_brickell_mixed_alg import LeeBrickellMixedAlg
 from isdquantum.utils import misc
+from isdquantum.utils.job_store import JobStore
 from app.session import Session
 from app import end
 logger = logging.getLogger(__name__)
@@ -11,6 +12,14 @@ def go():
     lee = LeeBrickellMixedAlg(ses.h, ses.syndrome, ses.args.w, ses.args.p,
                               ses.need_measures, ses.args.mct_mode,
                               ses.args.nwr_mode)
+    if ses.args.job_dir is not None:
+        lee.job_store = JobStore(ses.args.job_dir)
+    if ses.args.resume_job is not None:
+        ses.qc = None
+        ses.result, ses.error, ses.accuracy = lee.resume(
+            ses.args.resume_job, ses.args.provider, wait=True)
+        end.go()
+        return
     ses.qc, ses.result, ses.error, ses.accuracy = lee.run(
         ses.args.provider, ses.args.backend)
     end.go()
@@ -18,8 +18,8 @@ def _usage():
     )
     parser.add_argument(
         '-p',
-        type=int,
-        help='The p for lee brickell',
+        help=
+        "The p for lee brickell. If 'auto', the p w/ the lowest expected cost is chosen (see lee_brickell_planner).",
     )
     parser.add_argument(
         '--mct_mode',
@@ -93,6 +93,16 @@ def _usage():
     parser.add_argument(
         '--export_qasm_file',
         help='Export the circuit as qasm text in the specified file')
+    parser.add_argument(
+        '--job_dir',
+        help=
+        'Directory where the jobs which the backend can\'t execute any time soon are saved, to be resumed later on (see --resume_job)'
+    )
+    parser.add_argument(
+        '--resume_job',
+        help=
+        'Instead of submitting a new job, wait for the result of the given job saved in --job_dir and decode it. The other arguments should be the same used when the job was submitted.'
+    )
     args = parser.parse_args()
     return args
 
@@ -125,6 +135,14 @@ def _clean_args(args):
     if (args.isd_mode not in ('bruteforce') and args.p is None):
         raise Exception(
             "p must be specified for modes different from bruteforce")
+    if args.resume_job is not None and args.job_dir is None:
+        raise Exception("job_dir must be specified to resume a job")
+    if args.p == 'auto':
+        from isdquantum.methods.algorithms import lee_brickell_planner
+        args.p, _ = lee_brickell_planner.plan_p(
+            args.n, args.k, args.w, args.mct_mode, args.nwr_mode)
+    elif args.p is not None:
+        args.p = int(args.p)
 
 
 def main():
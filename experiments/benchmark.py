@@ -0,0 +1,297 @@
+import argparse
+import itertools
+import json
+import logging
+import platform
+import sys
+from time import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Benchmark of the resources needed by the ISD circuits.
+# The run command sweeps the grid of parameters and, for each configuration,
+# stores build time, qubits, depth, gate counts, transpile time and
+# simulation time in a JSON file. The compare command compares two of these
+# files and reports the metrics which got worse.
+# The matrices and the syndromes are random, but generated from a fixed seed,
+# so that two runs w/ the same parameters build the same circuits.
+# The transpile cache is disabled while running, so that the transpile
+# times are never the ones of a cache hit, and the circuit templates and the
+# Benes and FPC patterns are cleared before each configuration (unless
+# --warm_memos), so that the build times don't depend on the order of the
+# grid. The simulation time is the one of the execution of the compiled
+# circuit only.
+#
+# python -m experiments.benchmark run --codes 8:4 16:8 --w 1 2 --p 1 -o new.json
+# python -m experiments.benchmark compare old.json new.json
+
+BRUTEFORCE = 'bruteforce'
+LEE_BRICKELL = 'lee_brickell'
+KEY_FIELDS = ('circuit', 'n', 'k', 'w', 'p', 'mct_mode', 'nwr_mode')
+# Metrics which depend only on the code, compared exactly
+STRUCTURAL_METRICS = ('n_qubits', 'width', 'depth', 'n_gates',
+                      'compiled_depth', 'compiled_n_gates')
+TIME_METRICS = ('build_time', 'transpile_time', 'simulation_time')
+
+
+def _usage():
+    parser = argparse.ArgumentParser(
+        description="Benchmark of the resources of the isd circuits")
+    subparsers = parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser('run', help='Run the benchmark')
+    run_parser.add_argument(
+        '--circuits',
+        nargs='+',
+        choices=[BRUTEFORCE, LEE_BRICKELL],
+        default=[BRUTEFORCE, LEE_BRICKELL])
+    run_parser.add_argument(
+        '--codes',
+        nargs='+',
+        default=['8:4'],
+        help='The codes to use, as n:k')
+    run_parser.add_argument('--w', nargs='+', type=int, default=[1, 2])
+    run_parser.add_argument(
+        '--p',
+        nargs='+',
+        type=int,
+        default=[1],
+        help='The p values for lee brickell')
+    run_parser.add_argument(
+        '--mct_mode',
+        nargs='+',
+        choices=['basic', 'advanced', 'noancilla'],
+        default=['advanced'])
+    run_parser.add_argument(
+        '--nwr_mode',
+        nargs='+',
+        choices=['benes', 'fpc'],
+        default=['benes', 'fpc'])
+    run_parser.add_argument('--provider', default='aer')
+    run_parser.add_argument('--backend', default='qasm_simulator')
+    run_parser.add_argument('--shots', type=int, default=1024)
+    run_parser.add_argument(
+        '--max_sim_qubits',
+        type=int,
+        default=24,
+        help='Circuits w/ more qubits are not simulated')
+    run_parser.add_argument(
+        '--no_transpile',
+        action='store_true',
+        help='Do not transpile nor simulate the circuits')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument(
+        '--warm_memos',
+        action='store_true',
+        help='Keep the templates and the patterns built by the previous '
+        'configurations')
+    run_parser.add_argument(
+        '-o', '--output', required=True, help='The JSON file of the results')
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare two runs and report the regressions')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0,
+        help='Relative increase allowed for the structural metrics')
+    compare_parser.add_argument(
+        '--time_tolerance',
+        type=float,
+        default=0.25,
+        help='Relative increase allowed for the times')
+    args = parser.parse_args()
+    if args.command is None:
+        parser.error("A command is required")
+    return args
+
+
+def get_grid(args):
+    """
+    :returns: the list of the configurations of the grid, as dictionaries
+    w/ the KEY_FIELDS
+    """
+    grid = []
+    codes = [tuple(int(x) for x in code.split(':')) for code in args.codes]
+    for circuit in args.circuits:
+        ps = args.p if circuit == LEE_BRICKELL else [None]
+        for (n, k), w, p, mct_mode, nwr_mode in itertools.product(
+                codes, args.w, ps, args.mct_mode, args.nwr_mode):
+            if p is not None and p > w:
+                continue
+            grid.append({
+                'circuit': circuit,
+                'n': n,
+                'k': k,
+                'w': w,
+                'p': p,
+                'mct_mode': mct_mode,
+                'nwr_mode': nwr_mode
+            })
+    return grid
+
+
+def _get_isd_circuit(config, rng):
+    n, k = config['n'], config['k']
+    r = n - k
+    syndrome = rng.randint(0, 2, r)
+    if config['circuit'] == BRUTEFORCE:
+        from isdquantum.methods.circuits.bruteforce_circ import BruteforceISDCircuit
+        h = rng.randint(0, 2, (r, n))
+        return BruteforceISDCircuit(h, syndrome, config['w'], True,
+                                    config['mct_mode'], config['nwr_mode'])
+    from isdquantum.methods.circuits.lee_brickell_bruteforce_circ import LeeBrickellCircuit
+    v = rng.randint(0, 2, (r, k))
+    return LeeBrickellCircuit(v, syndrome, config['w'], config['p'], True,
+                              config['mct_mode'], config['nwr_mode'])
+
+
+def run_config(config, args):
+    from isdquantum.utils import misc
+    row = dict(config)
+    rng = np.random.RandomState(args.seed)
+    start = time()
+    try:
+        isd_circ = _get_isd_circuit(config, rng)
+        qc = isd_circ.build_circuit()
+    except Exception as e:
+        logger.info("Can't build {}: {}".format(config, e))
+        row['error'] = str(e)
+        return row
+    row['build_time'] = time() - start
+    # Width includes the classical bits of the measures
+    row['n_qubits'] = qc.width() - len(isd_circ.to_measure)
+    row['width'] = qc.width()
+    row['depth'] = qc.depth()
+    row['gates'] = qc.count_ops()
+    row['n_gates'] = qc.size()
+    if args.no_transpile:
+        return row
+    backend = misc.get_backend(args.provider, args.backend, qc.width())
+    start = time()
+    compiled_qc = misc.get_compiled_circuit(qc, backend)
+    row['transpile_time'] = time() - start
+    row['compiled_depth'] = compiled_qc.depth()
+    row['compiled_n_gates'] = compiled_qc.size()
+    if row['n_qubits'] > args.max_sim_qubits:
+        return row
+    start = time()
+    misc.submit_compiled(compiled_qc, backend, args.shots).result()
+    row['simulation_time'] = time() - start
+    return row
+
+
+def _clear_memos():
+    from isdquantum.circuit import hamming_weight_compute as hwc
+    from isdquantum.circuit import hamming_weight_generate as hwg
+    from isdquantum.methods.circuits import abstract_circ
+    abstract_circ.clear_templates()
+    hwg.clear_patterns()
+    hwc.clear_patterns()
+
+
+def run(args):
+    # Imported here, so that the build time of the first configuration
+    # doesn't include importing qiskit and the circuits
+    from isdquantum.methods.circuits import bruteforce_circ
+    from isdquantum.methods.circuits import lee_brickell_bruteforce_circ
+    from isdquantum.utils import misc
+    cache = misc.get_transpile_cache()
+    misc.set_transpile_cache(None)
+    results = []
+    try:
+        for config in get_grid(args):
+            logger.info("Benchmarking {}".format(config))
+            if not args.warm_memos:
+                _clear_memos()
+            row = run_config(config, args)
+            logger.info("{}".format(row))
+            results.append(row)
+    finally:
+        misc.set_transpile_cache(cache)
+    output = {
+        'metadata': {
+            'args': vars(args),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'time': time()
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=1, sort_keys=True)
+
+
+def _get_metrics(row):
+    metrics = {
+        m: row[m]
+        for m in STRUCTURAL_METRICS + TIME_METRICS if m in row
+    }
+    for gate, count in row.get('gates', {}).items():
+        metrics['gates.{}'.format(gate)] = count
+    return metrics
+
+
+def compare(old_results, new_results, tolerance=0, time_tolerance=0.25):
+    """
+    Compare two lists of results, matching the rows by configuration.
+
+    :returns: a list of regressions, i.e. tuples (configuration, metric, old
+    value, new value), and the list of the configurations which could be
+    built in the old run but not in the new one
+    """
+    old_rows = {tuple(row[f] for f in KEY_FIELDS): row for row in old_results}
+    regressions = []
+    broken = []
+    for new_row in new_results:
+        key = tuple(new_row[f] for f in KEY_FIELDS)
+        old_row = old_rows.get(key)
+        if old_row is None or 'error' in old_row:
+            continue
+        if 'error' in new_row:
+            broken.append(key)
+            continue
+        old_metrics = _get_metrics(old_row)
+        new_metrics = _get_metrics(new_row)
+        for metric, new_value in new_metrics.items():
+            # A gate missing in the old run wasn't used; the other metrics
+            # are missing when they weren't measured (f.e. w/ --no_transpile
+            # or above --max_sim_qubits), so they can't be compared
+            if metric.startswith('gates.'):
+                old_value = old_metrics.get(metric, 0)
+            elif metric in old_metrics:
+                old_value = old_metrics[metric]
+            else:
+                continue
+            allowed = time_tolerance if metric in TIME_METRICS else tolerance
+            if new_value > old_value * (1 + allowed):
+                regressions.append((key, metric, old_value, new_value))
+    return regressions, broken
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO, format='>%(levelname)-8s %(name)-12s %(message)s')
+    args = _usage()
+    if args.command == 'run':
+        run(args)
+        return 0
+    with open(args.old) as f:
+        old_results = json.load(f)['results']
+    with open(args.new) as f:
+        new_results = json.load(f)['results']
+    regressions, broken = compare(old_results, new_results, args.tolerance,
+                                  args.time_tolerance)
+    for key in broken:
+        print("BROKEN {}".format(dict(zip(KEY_FIELDS, key))))
+    for key, metric, old_value, new_value in regressions:
+        print("REGRESSION {} {}: {} -> {}".format(
+            dict(zip(KEY_FIELDS, key)), metric, old_value, new_value))
+    print("{} regressions, {} broken configurations".format(
+        len(regressions), len(broken)))
+    return 1 if len(regressions) > 0 or len(broken) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,19 @@
 import logging
+import numpy as np
 from isdquantum.utils import binary
 from isdquantum.circuit import adder
 from isdquantum.circuit import qregs_init as qregs
-from math import ceil, log
 
 logger = logging.getLogger(__name__)
 
 
+# The qubits of the patterns are indexes in the concatenation of a_qs and
+# cout_qs, i.e. a_qs[i] is i and cout_qs[j] is n_lines + j
+def _get_pattern_qubits(a_qs, cout_qs):
+    return [a_qs[i] for i in range(len(a_qs))
+            ] + [cout_qs[j] for j in range(len(cout_qs))]
+
+
 # Apply gates to the circuit to compute the hamming weight of a set of qubits.
 # Return the list of qubits containing the result
 # patterns_dict should be the result of the fpc_pattern
@@ -15,118 +22,143 @@ def get_circuit_for_qubits_weight(circuit, a_qs, cin_q, cout_qs,
     assert len(a_qs) == patterns_dict['n_lines']
     assert len(cin_q) == 1
     assert len(cout_qs) == patterns_dict['n_couts']
+    qubits = _get_pattern_qubits(a_qs, cout_qs)
     for i in patterns_dict['adders_pattern']:
-        cout_idx = int(i[-1][1:])
-        half_bits = int((len(i) - 1) / 2)
-        input_qubits = []
-        for j in i:
-            if j[0] == 'a':
-                input_qubits.append(a_qs[int(j[1:])])
-            elif j[0] == 'c':
-                input_qubits.append(cout_qs[int(j[1:])])
-            else:
-                raise Exception("Invalid")
-        logger.debug("{0}".format([input_qubits[i] for i in range(half_bits)]))
-        logger.debug("{0}".format(
-            [input_qubits[i] for i in range(half_bits, 2 * half_bits)]))
-        logger.debug("{0}".format([cout_qs[cout_idx]]))
-        adder.adder_circuit(
-            circuit, cin_q, [input_qubits[i] for i in range(half_bits)],
-            [input_qubits[i]
-             for i in range(half_bits, 2 * half_bits)], [cout_qs[cout_idx]])
-    to_measure_qubits = []
-    for j in patterns_dict['results']:
-        if j[0] == 'a':
-            to_measure_qubits.append(a_qs[int(j[1:])])
-        elif j[0] == 'c':
-            to_measure_qubits.append(cout_qs[int(j[1:])])
-        else:
-            raise Exception("Invalid")
-    return to_measure_qubits
+        half_bits = (len(i) - 1) // 2
+        adder.adder_circuit(circuit, cin_q,
+                            [qubits[j] for j in i[:half_bits]],
+                            [qubits[j] for j in i[half_bits:2 * half_bits]],
+                            [qubits[i[-1]]])
+    return [qubits[j] for j in patterns_dict['results']]
 
 
 def get_circuit_for_qubits_weight_i(circuit, a_qs, cin_q, cout_qs,
                                     patterns_dict):
-    # patterns_dict = _fpc_pattern()
-    # from qiskit import QuantumCircuit
     assert len(a_qs) == patterns_dict['n_lines']
     assert len(cin_q) == 1
     assert len(cout_qs) == patterns_dict['n_couts']
+    qubits = _get_pattern_qubits(a_qs, cout_qs)
     for i in patterns_dict['adders_pattern'][::-1]:
-        cout_idx = int(i[-1][1:])
-        half_bits = int((len(i) - 1) / 2)
-        input_qubits = []
-        for j in i:
-            if j[0] == 'a':
-                input_qubits.append(a_qs[int(j[1:])])
-            elif j[0] == 'c':
-                input_qubits.append(cout_qs[int(j[1:])])
-            else:
-                raise Exception("Invalid")
-        logger.debug("{0}".format([input_qubits[i] for i in range(half_bits)]))
-        logger.debug("{0}".format(
-            [input_qubits[i] for i in range(half_bits, 2 * half_bits)]))
-        logger.debug("{0}".format([cout_qs[cout_idx]]))
-        adder.adder_circuit_i(
-            circuit, cin_q, [input_qubits[i] for i in range(half_bits)],
-            [input_qubits[i]
-             for i in range(half_bits, 2 * half_bits)], [cout_qs[cout_idx]])
+        half_bits = (len(i) - 1) // 2
+        adder.adder_circuit_i(circuit, cin_q,
+                              [qubits[j] for j in i[:half_bits]],
+                              [qubits[j] for j in i[half_bits:2 * half_bits]],
+                              [qubits[i[-1]]])
 
 
 #Given n bits, itr returns the pattern to compute the weight of this n bits, i.e.
-# 1. n_lines required (>= n, the closest power of 2)
+# 1. n_lines required, i.e. n
 # 2. n_couts, the total number of couts required by the adders
-# 3. adders_pattern, the pattern of adders
-# 4. results, the bits containing the final results
+# 3. adders_pattern, the pattern of adders, i.e. a tuple w/ an integer array
+#    for each adder, containing the qubits of its two inputs and its cout
+# 4. results, an integer array w/ the qubits containing the final results
+# The qubits are indexes of a_qs, followed by cout_qs (see
+# get_circuit_for_qubits_weight). The arrays are read only, since they're
+# shared by all the circuits w/ the same n.
 def get_circuit_for_qubits_weight_get_pattern(n):
-    steps = ceil(log(n, 2))
-    # TODO maybe we can use fewer lines
-    # n_lines = n if n % 2 == 0 else n + 1
-    n_lines = 2**steps
+    # The pattern depends only on n, so it's computed once and shared (see
+    # also pattern_tables)
+    if n not in _patterns:
+        if n in _tables:
+            _patterns[n] = _get_pattern_from_table(n, *_tables.pop(n))
+        else:
+            _patterns[n] = _get_pattern(n)
+    return dict(_patterns[n])
+
+
+# Memo of the patterns, n_lines -> pattern
+_patterns = {}
+# Tables of the patterns not used yet, n_lines -> table (see
+# set_pattern_table)
+_tables = {}
+
+
+def clear_patterns():
+    _patterns.clear()
+
+
+def _read_only_array(values):
+    array = np.array(values, dtype=np.int32)
+    array.flags.writeable = False
+    return array
+
+
+# Each stage adds the partial weights two by two, the first one (a) to the
+# second one (b), so that b and the cout of the adder hold their sum. If the
+# number of partial weights is odd, the last one goes to the next stage as it
+# is, and it's shorter than the one it's added to later: its missing high
+# bits are couts left to 0. W/ n a power of 2, this is the usual tree of
+# n - 1 adders; otherwise, no padding lines are needed.
+def _get_pattern(n_lines):
     patterns_dict = {}
     patterns_dict['n_lines'] = n_lines
-    patterns_dict['n_couts'] = n_lines - 1
-    # couts = list(reversed(range(patterns_dict['n_couts'])))
-    couts = ["c{0}".format(i) for i in range(patterns_dict['n_couts'])][::-1]
-    # inputs = [chr(c) for c in range(ord('a'), ord('h') + 1)][::-1]
-    inputs = ["a{0}".format(i) for i in range(patterns_dict['n_lines'])][::-1]
-    # inputs = list(range(patterns_dict['n_lines']))
-    logger.debug("inputs {0}".format(inputs))
-    logger.debug("couts {0}".format(couts))
-    patterns_dict['adders_pattern'] = []
-
-    n_adders = n_lines
-    n_inputs_per_adders = 0
-    inputs_next_stage = inputs
-    for i in range(steps):
-        n_adders = int(n_adders / 2)
-        n_inputs_per_adders += 2
-        outputs_this_stage = []
-        logger.debug("Stage {0}, n_adder {1}, n_inputs_per_adder {2}".format(
-            i, n_adders, n_inputs_per_adders))
+    adders_pattern = []
+    next_cout = n_lines
+    inputs_next_stage = [[i] for i in range(n_lines)]
+    while len(inputs_next_stage) > 1:
         logger.debug("inputs_next_stage {0}".format(inputs_next_stage))
-        for j in range(n_adders):
-            logger.debug("Stage {0}, adder {1}".format(i, j))
-            adder_inputs = []
-            for k in range(n_inputs_per_adders):
-                adder_inputs.append(inputs_next_stage.pop())
-            adder_cout = couts.pop()
-            adder_outputs = adder_inputs[int(len(adder_inputs) /
-                                             2):len(adder_inputs)] + [
-                                                 adder_cout
-                                             ]
-            patterns_dict['adders_pattern'].append(
-                tuple(adder_inputs) + tuple([adder_cout]))
-            logger.debug("{0}, {1} --> {2}".format(adder_inputs, adder_cout,
-                                                   adder_outputs))
-            outputs_this_stage += adder_outputs
-        inputs_next_stage = outputs_this_stage[::-1]
+        outputs_this_stage = []
+        for j in range(0, len(inputs_next_stage) - 1, 2):
+            a = inputs_next_stage[j]
+            b = inputs_next_stage[j + 1]
+            n_zeros = len(a) - len(b)
+            b = b + list(range(next_cout, next_cout + n_zeros))
+            adder_cout = next_cout + n_zeros
+            next_cout = adder_cout + 1
+            adders_pattern.append(_read_only_array(a + b + [adder_cout]))
+            outputs_this_stage.append(b + [adder_cout])
+        if len(inputs_next_stage) % 2 == 1:
+            outputs_this_stage.append(inputs_next_stage[-1])
+        inputs_next_stage = outputs_this_stage
+    patterns_dict['n_couts'] = next_cout - n_lines
+    patterns_dict['adders_pattern'] = tuple(adders_pattern)
     logger.debug("adders pattern\n{0}".format(patterns_dict['adders_pattern']))
-    patterns_dict['results'] = inputs_next_stage[::-1]
+    patterns_dict['results'] = _read_only_array(inputs_next_stage[0])
     logger.debug("results\n{0}".format(patterns_dict['results']))
     return patterns_dict
 
 
+def get_pattern_table(n):
+    """
+    :returns: the pattern (see get_circuit_for_qubits_weight_get_pattern)
+    as integer arrays, i.e. the concatenation of the qubits of the adders,
+    the number of qubits of each adder and the result qubits
+    """
+    patterns_dict = get_circuit_for_qubits_weight_get_pattern(n)
+    adders = patterns_dict['adders_pattern']
+    return (np.concatenate(adders),
+            np.array([len(i) for i in adders], dtype=np.int32),
+            np.array(patterns_dict['results']))
+
+
+def set_pattern_table(n_lines, adders, adder_sizes, results):
+    """
+    Store the pattern in the table (see get_pattern_table), so that it isn't
+    computed again. The table is converted the first time the pattern is
+    used.
+    """
+    _patterns.pop(n_lines, None)
+    _tables[n_lines] = (adders, adder_sizes, results)
+
+
+def _get_pattern_from_table(n_lines, adders, adder_sizes, results):
+    # The couts are the qubits after the lines, all of them are used by the
+    # adders
+    n_couts = int(adders.max()) + 1 - n_lines if len(adders) > 0 else 0
+    return {
+        'n_lines':
+        n_lines,
+        'n_couts':
+        n_couts,
+        'adders_pattern':
+        tuple(
+            _read_only_array(i)
+            for i in np.split(adders, np.cumsum(adder_sizes)[:-1])),
+        'results':
+        _read_only_array(results)
+    }
+
+
 # Circuit to check if a given set of register (a_qs) has weight equal to weight_int
 # eq_q is set to 1 in this case
 def get_circuit_for_qubits_weight_check(circuit,
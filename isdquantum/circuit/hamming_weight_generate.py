@@ -1,5 +1,5 @@
 import logging
-from math import ceil, log
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -28,12 +28,10 @@ def generate_qubits_with_given_weight_benes_i(circuit, a_qs, flip_qs,
         circuit.x(a_qs[i])
 
 
-# Given how it's built, n should be a power of 2, or, at least,
-# it returns the combination with n as power of 2.
-# If the original n is not a power of 2, you may want to adapt the
-# circuit avoiding the use of the last bits.
+# Any n is supported, w/ exactly n lines and no padding (see
+# _benes_permutation_pattern_support).
 # Returns a dictionary containing the:
-# 1. n_lines, the number of lines required,
+# 1. n_lines, the number of lines required, i.e. n
 # 2. n_flips, the number of fair coin flips required to obtain the full permutation
 # 2. the swaps_pattern, i.e. a list of tuples containing:
 #  - an integer signalling which flip to use
@@ -47,12 +45,33 @@ def generate_qubits_with_given_weight_benes_i(circuit, a_qs, flip_qs,
 #    n - r bits to 1 and apply the permutation network. In the latter case,
 #    the obtained permutation should be negated.
 def generate_qubits_with_given_weight_benes_get_pattern(n, r):
-    nwr_dict = {}
-    steps = ceil(log(n, 2))
-    nwr_dict['n_lines'] = 2**steps
-    nwr_dict['swaps_pattern'] = []
-    if (r == 0 or r == nwr_dict['n_lines']):
+    if (r <= 0 or r >= n):
         raise Exception("No combination is possible")
+    # The pattern depends only on n and r, so it's computed once and shared,
+    # w/ the swaps as a tuple (see also pattern_tables)
+    key = (n, r)
+    if key not in _patterns:
+        if key in _tables:
+            _patterns[key] = _get_pattern_from_table(n, r, _tables.pop(key))
+        else:
+            _patterns[key] = _get_pattern(n, r)
+    return dict(_patterns[key])
+
+
+# Memo of the patterns, (n, r) -> pattern
+_patterns = {}
+# Tables of the patterns not used yet, (n, r) -> table (see
+# set_pattern_table)
+_tables = {}
+
+
+def clear_patterns():
+    _patterns.clear()
+
+
+def _get_pattern(n_lines, r):
+    nwr_dict = {}
+    nwr_dict['n_lines'] = n_lines
 
     # bcz ncr(8;5) == ncr(8;3)
     if r > nwr_dict['n_lines'] / 2:
@@ -60,47 +79,95 @@ def generate_qubits_with_given_weight_benes_get_pattern(n, r):
     else:
         initial_swaps = r
 
-    _benes_permutation_pattern_support(0, initial_swaps,
-                                       int(nwr_dict['n_lines'] / 2), 0,
-                                       nwr_dict)
-    nwr_dict['n_flips'] = len(nwr_dict['swaps_pattern'])
+    swaps = []
+    _benes_permutation_pattern_support(range(n_lines), swaps)
+    # The lines start as initial_swaps ones followed by zeros, so a swap of
+    # two lines w/ the same known value does nothing and it's dropped; after
+    # a kept swap the values of its lines are unknown
+    known = [1] * initial_swaps + [0] * (n_lines - initial_swaps)
+    nwr_dict['swaps_pattern'] = []
+    for a, b in swaps:
+        if known[a] is not None and known[a] == known[b]:
+            continue
+        logger.debug("cswap({2}, {0}, {1})".format(
+            a, b, len(nwr_dict['swaps_pattern'])))
+        nwr_dict['swaps_pattern'].append(
+            (len(nwr_dict['swaps_pattern']), a, b))
+        known[a] = known[b] = None
+    nwr_dict['swaps_pattern'] = tuple(nwr_dict['swaps_pattern'])
+    _set_pattern_counts(nwr_dict, r)
+    return nwr_dict
+
 
+def _set_pattern_counts(nwr_dict, r):
+    nwr_dict['n_flips'] = len(nwr_dict['swaps_pattern'])
     if (r > nwr_dict['n_lines'] / 2):
         nwr_dict['to_negate_range'] = nwr_dict['n_lines'] - r
         nwr_dict['negated_permutation'] = True
     else:
         nwr_dict['to_negate_range'] = r
         nwr_dict['negated_permutation'] = False
+
+
+def get_pattern_table(n, r):
+    """
+    :returns: the swaps of the pattern (see
+    generate_qubits_with_given_weight_benes_get_pattern) as an integer
+    matrix, w/ one row (flip, first line, second line) per swap
+    """
+    swaps = generate_qubits_with_given_weight_benes_get_pattern(
+        n, r)['swaps_pattern']
+    return np.array(swaps, dtype=np.int32).reshape(-1, 3)
+
+
+def set_pattern_table(n_lines, r, table):
+    """
+    Store the pattern w/ the swaps in the table (see get_pattern_table), so
+    that it isn't computed again. The table is converted the first time the
+    pattern is used.
+    """
+    _patterns.pop((n_lines, r), None)
+    _tables[(n_lines, r)] = table
+
+
+def _get_pattern_from_table(n_lines, r, table):
+    nwr_dict = {
+        'n_lines': n_lines,
+        'swaps_pattern': tuple(tuple(swap) for swap in table.tolist())
+    }
+    _set_pattern_counts(nwr_dict, r)
     return nwr_dict
 
 
-def _benes_permutation_pattern_support(start, end, swap_step, flip_q_idx,
-                                       nwr_dict):
-    logger.debug("Start: {0}, end: {1}, swap_step: {2}".format(
-        start, end, swap_step))
-    if (swap_step == 0 or start >= end):
-        logger.debug("Base case recursion")
-        return flip_q_idx
-
-    for_iter = 0
-    for i in range(start, end):
-        for_iter += 1
-        logger.info("cswap({2}, {0}, {1})".format(i, i + swap_step,
-                                                  flip_q_idx))
-        nwr_dict['swaps_pattern'].append((flip_q_idx, i, i + swap_step))
-        flip_q_idx += 1
-
-    for_iter_next = min(for_iter, int(swap_step / 2))
-    logger.debug(
-        "Before recursion 1, start: {0}, end: {1}, swap_step: {2}, for_iter_next"
-        .format(start, end, swap_step, for_iter_next))
-    flip_q_idx = _benes_permutation_pattern_support(
-        start, start + for_iter_next, int(swap_step / 2), flip_q_idx, nwr_dict)
-
-    logger.debug(
-        "Before recursion, start: {0}, end: {1}, swap_step: {2}, for_iter_next {3}"
-        .format(start, end, swap_step, for_iter_next))
-    flip_q_idx = _benes_permutation_pattern_support(
-        start + swap_step, start + swap_step + for_iter_next,
-        int(swap_step / 2), flip_q_idx, nwr_dict)
-    return flip_q_idx
+# The butterfly on a power of 2 of lines: each line of the first half is
+# swapped w/ the one of the second half in the same position, then both the
+# halves are handled in the same way.
+# Starting from any interval of ones (f.e. 0011100), it reaches all the
+# combinations of the lines w/ the same weight.
+def _butterfly_pattern_support(lines, swaps):
+    half = len(lines) // 2
+    if half == 0:
+        return
+    swaps.extend(zip(lines[:half], lines[half:]))
+    _butterfly_pattern_support(lines[:half], swaps)
+    _butterfly_pattern_support(lines[half:], swaps)
+
+
+# The swaps of the permutation network on any number of lines, before
+# dropping the useless ones (see _get_pattern).
+# The lines are split in the greatest power of 2 a, starting w/ the ones,
+# and the remaining b < a lines. The first b lines are swapped w/ the b ones,
+# which moves any number of ones among the two parts while leaving an
+# interval of ones in each of them; then the butterfly is applied to the a
+# lines and the same network, recursively, to the b ones.
+# W/ a power of 2 of lines it's just the butterfly, so w/o the dropped swaps
+# it's the same network of the padded version, while otherwise it uses n
+# lines and less flips than the n_lines = 2**ceil(log(n, 2)) of the padding.
+def _benes_permutation_pattern_support(lines, swaps):
+    a = 2**(len(lines).bit_length() - 1)
+    if a == len(lines):
+        _butterfly_pattern_support(lines, swaps)
+        return
+    swaps.extend(zip(lines[:a], lines[a:]))
+    _butterfly_pattern_support(lines[:a], swaps)
+    _benes_permutation_pattern_support(lines[a:], swaps)
@@ -0,0 +1,68 @@
+import logging
+import sys
+import numpy as np
+from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.circuit import hamming_weight_compute as hwc
+
+logger = logging.getLogger(__name__)
+
+# Precomputed tables of the Benes and FPC patterns, saved as integer arrays
+# in a .npz file. Loading a file stores its patterns in the memos of
+# hamming_weight_generate and hamming_weight_compute, so that the circuits
+# are built w/o computing the patterns.
+# Both the Benes and the FPC patterns use exactly n lines, for any n. The
+# Benes pattern for r is the same as the one for n - r (negated), so only the
+# ones w/ r <= n / 2 are stored.
+#
+# python -m isdquantum.circuit.pattern_tables patterns.npz 1024 [24 48 ...]
+
+
+def _add_patterns(tables, n):
+    for r in range(1, n // 2 + 1):
+        tables['benes_{0}_{1}'.format(n, r)] = hwg.get_pattern_table(n, r)
+    adders, adder_sizes, results = hwc.get_pattern_table(n)
+    tables['fpc_{0}_adders'.format(n)] = adders
+    tables['fpc_{0}_adder_sizes'.format(n)] = adder_sizes
+    tables['fpc_{0}_results'.format(n)] = results
+    logger.debug("Exported patterns for {0} lines".format(n))
+
+
+def export_patterns(filename, max_n=1024, ns=()):
+    """
+    Save the patterns of all the powers of 2 up to max_n.
+
+    :param ns: other numbers of lines of the patterns to save, f.e. the n, k
+    and r of the codes in use
+    """
+    tables = {}
+    for n in ns:
+        _add_patterns(tables, n)
+    n_lines = 2
+    while n_lines <= max_n:
+        _add_patterns(tables, n_lines)
+        n_lines *= 2
+    np.savez_compressed(filename, **tables)
+
+
+def load_patterns(filename):
+    with np.load(filename) as tables:
+        for name in tables.files:
+            fields = name.split('_')
+            n_lines = int(fields[1])
+            if fields[0] == 'benes':
+                r = int(fields[2])
+                hwg.set_pattern_table(n_lines, r, tables[name])
+                if r != n_lines - r:
+                    hwg.set_pattern_table(n_lines, n_lines - r, tables[name])
+            elif fields[2] == 'adders':
+                hwc.set_pattern_table(
+                    n_lines, tables[name],
+                    tables['fpc_{0}_adder_sizes'.format(n_lines)],
+                    tables['fpc_{0}_results'.format(n_lines)])
+    logger.info("Loaded patterns from {0}".format(filename))
+
+
+if __name__ == "__main__":
+    export_patterns(sys.argv[1],
+                    int(sys.argv[2]) if len(sys.argv) > 2 else 1024,
+                    [int(n) for n in sys.argv[3:]])
@@ -1,4 +1,5 @@
 import logging
+from math import pi
 from isdquantum.utils import binary
 from qiskit.aqua import utils
 
@@ -101,3 +102,34 @@ def initialize_qureg_to_complement_of_bitarray(a_arr, qreg, circuit):
 def initialize_qureg_to_complement_of_int(a_int, qreg, circuit):
     a_str = binary.get_bitstring_from_int(a_int, len(qreg))
     return initialize_qureg_to_complement_of_bitstring(a_str, qreg, circuit)
+
+
+def initialize_qureg_given_parameters(params, qreg, circuit):
+    """
+    Parametric version of initialize_qureg_given_bitstring. Each qubit of the
+    qreg is rotated around the X axis by the angle bound to the corresponding
+    parameter, so that binding pi (resp. 0) to the i-th parameter is
+    equivalent, up to a global phase, to a 1 (resp. 0) in the i-th position
+    of the bitstring. The same ordering of initialize_qureg_given_bitstring
+    is used, i.e. parameter 0 acts on the last qubit of the qreg.
+
+    :param params: the list of qiskit Parameter
+    :param qreg: the QuantumRegister on which the parameters should be set
+    :param circuit: the QuantumCircuit containing the q_reg
+    """
+    bits = len(params)
+    assert (len(qreg) >= bits), "Not enough qubits for given parameters"
+    for i in reversed(range(bits)):
+        circuit.rx(params[i], qreg[bits - i - 1])
+
+
+# Returns the binds for the parameters used in initialize_qureg_given_parameters
+# s.t. the qreg is initialized to the given bitarray
+def get_parameter_binds_given_bitarray(params, a_arr):
+    assert len(params) == len(a_arr), "Parameters and bits should match"
+    return {param: pi * int(b) for param, b in zip(params, a_arr)}
+
+
+def get_parameter_binds_to_complement_of_bitarray(params, a_arr):
+    a_n_arr = binary.get_negated_bitarray(a_arr)
+    return get_parameter_binds_given_bitarray(params, a_n_arr)
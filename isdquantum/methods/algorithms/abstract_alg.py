@@ -1,11 +1,24 @@
 import logging
+import numpy as np
 from abc import ABC, abstractmethod
+from isdquantum.utils import decoding
+from isdquantum.utils import job_store
 
 _logger = logging.getLogger(__name__)
 
 
 class ISDAbstractAlg(ABC):
-    def __init__(self, h, syndrome, w, need_measures, mct_mode, nwr_mode):
+    # If parameterized_syndrome is True, the syndrome is not hard-coded in the
+    # circuit, but bound at execution time, so that the same compiled circuit
+    # can be reused for different syndromes.
+    def __init__(self,
+                 h,
+                 syndrome,
+                 w,
+                 need_measures,
+                 mct_mode,
+                 nwr_mode,
+                 parameterized_syndrome=False):
         assert w > 0, "Weight must be positive"
         assert syndrome.shape[0] == h.shape[
             0], "Syndrome should be of length r"
@@ -18,6 +31,42 @@ class ISDAbstractAlg(ABC):
         self.need_measures = need_measures
         self.mct_mode = mct_mode
         self.nwr_mode = nwr_mode
+        self.parameterized_syndrome = parameterized_syndrome
+        # Number of most frequent measured states checked classically
+        self.top_k = decoding.DEFAULT_TOP_K
+        # Shots actually spent by the last adaptive execution
+        self.shots_spent = None
+        # If not None, the JobStore where the jobs which the backend can't
+        # execute any time soon are saved, to be resumed later on (see
+        # resume)
+        self.job_store = None
+
+    # Metadata saved along w/ a job, w/ everything needed to decode its
+    # result; extra contains the ones specific to the algorithm
+    def _get_job_metadata(self, qc, **extra):
+        metadata = {
+            'h': self.h,
+            'syndrome': self.syndrome,
+            'w': self.w,
+            'mct_mode': self.mct_mode,
+            'nwr_mode': self.nwr_mode,
+            'layout': job_store.get_register_layout(qc)
+        }
+        metadata.update(extra)
+        return metadata
+
+    # Retrieve a job of the job store and its metadata, checking that it
+    # has been submitted for the same code. Returns the record and the
+    # result, None if the job isn't done yet (see JobStore.get_result)
+    def _get_stored_result(self, job_id, provider_name, wait):
+        assert self.job_store is not None, "No job store"
+        record, result = self.job_store.get_result(job_id, provider_name,
+                                                   wait)
+        metadata = record['metadata']
+        assert np.array_equal(np.array(metadata['h']),
+                              self.h), "Job submitted for another h"
+        assert metadata['w'] == self.w, "Job submitted for another w"
+        return record, result
 
     @abstractmethod
     def run(self, provider_name, backend_name, shots):
@@ -1,14 +1,27 @@
 import logging
+import numpy as np
+from isdquantum.utils import decoding
 from isdquantum.utils import misc
 from isdquantum.methods.circuits.bruteforce_circ import BruteforceISDCircuit
 from isdquantum.methods.algorithms.abstract_alg import ISDAbstractAlg
+from isdquantum.methods.algorithms.circuit_builder import CircuitBuilder
 
 logger = logging.getLogger(__name__)
 
 
 class BruteforceAlg(ISDAbstractAlg):
-    def __init__(self, h, syndrome, w, need_measures, mct_mode, nwr_mode):
-        super().__init__(h, syndrome, w, need_measures, mct_mode, nwr_mode)
+    def __init__(self,
+                 h,
+                 syndrome,
+                 w,
+                 need_measures,
+                 mct_mode,
+                 nwr_mode,
+                 parameterized_syndrome=False):
+        super().__init__(h, syndrome, w, need_measures, mct_mode, nwr_mode,
+                         parameterized_syndrome)
+        # (provider_name, backend_name) -> (bru_circ, compiled qc, backend)
+        self._parameterized_circuits = {}
 
     def prepare_circuit_for_backend(self, provider_name, backend_name):
 
@@ -25,23 +38,191 @@ class BruteforceAlg(ISDAbstractAlg):
         # process_compiled_circuit(args, qc, backend)
         return qc, backend
 
-    def run_circuit_on_backend(self, qc, backend, shots):
-        result = misc.run(qc, backend, shots)
+    # Build and compile the circuit once, with the syndrome left as a
+    # parameter. The result is cached, so that following calls w/ the same
+    # provider and backend don't rebuild nor recompile it.
+    def prepare_parameterized_circuit_for_backend(self, provider_name,
+                                                  backend_name):
+        key = (provider_name, backend_name)
+        if key not in self._parameterized_circuits:
+            bru_circ = BruteforceISDCircuit(self.h, None, self.w,
+                                            self.need_measures, self.mct_mode,
+                                            self.nwr_mode)
+            qc = bru_circ.build_circuit()
+            n_qubits = qc.width()
+            logger.info("Number of qubits needed = {0}".format(n_qubits))
+            backend = misc.get_backend(provider_name, backend_name, n_qubits)
+            qc = misc.get_compiled_circuit(qc, backend)
+            self._parameterized_circuits[key] = (bru_circ, qc, backend)
+        return self._parameterized_circuits[key]
+
+    # If the backend can't execute the circuit any time soon, the result,
+    # the error and the accuracy are None, and the job is saved in the job
+    # store, if any (see resume)
+    def run_circuit_on_backend(self, qc, backend, shots=8192):
+        metadata = self._get_job_metadata(qc, syndromes=[self.syndrome])
+        result = misc.run(qc, backend, shots, self.job_store, metadata)
+        if result is None:
+            return None, None, None
         counts = result.get_counts(qc)
-        max_val = max(counts.values())
-        accuracy = max_val / shots
-        max_val_status = max(counts, key=lambda key: counts[key])
+        error, accuracy = self._decode_counts(counts, shots, self.syndrome)
+        return result, error, accuracy
+
+    def run_syndromes_on_backend(self, bru_circ, qc, backend, syndromes,
+                                 shots):
+        parameter_binds = [
+            bru_circ.get_syndrome_parameter_binds(s) for s in syndromes
+        ]
+        result = misc.run_with_parameter_binds(
+            qc, backend, parameter_binds, shots, self.job_store,
+            self._get_job_metadata(qc, syndromes=syndromes))
+        if result is None:
+            return None, [None] * len(syndromes), [None] * len(syndromes)
+        errors = []
+        accuracies = []
+        for i, s in enumerate(syndromes):
+            error, accuracy = self._decode_counts(result.get_counts(i), shots,
+                                                  s)
+            errors.append(error)
+            accuracies.append(accuracy)
+        return result, errors, accuracies
+
+    # The most frequent states are checked classically, and the first one
+    # which is a valid error for the syndrome is returned. If none of them
+    # is, the most frequent state is returned anyway.
+    # W/o counts, f.e. if the backend didn't execute any adaptive round,
+    # the error and the accuracy are None.
+    def _decode_counts(self, counts, shots, syndrome):
+        if len(counts) == 0 or shots == 0:
+            logger.info("No counts to decode")
+            return None, None
+        states, occurrences = decoding.get_top_counts(counts, self.top_k)
+        masks = decoding.states_to_masks(states)
+        valid = decoding.bruteforce_valid(self.h, syndrome, self.w, masks)
+        i = decoding.get_first_valid(valid)
+        if i is None:
+            logger.info("None of the {} most frequent states is valid".format(
+                len(states)))
+            i = 0
+        accuracy = occurrences[i] / shots
         logger.info(
-            "Max value is {0} ({2:4.2f} accuracy) for status {1}".format(
-                max_val, max_val_status, accuracy))
+            "Value is {0} ({2:4.2f} accuracy) for status {1}, valid {3}".
+            format(occurrences[i], states[i], accuracy, valid[i]))
+        error = decoding.masks_to_bitarrays(masks[i:i + 1], self.n)[0]
+        return error.tolist(), accuracy
 
-        error = [0] * self.n
-        for i, c in enumerate(max_val_status[::-1]):
-            if c == '1':
-                error[i] = 1
+    # Decode a batch of syndromes of the same code submitting a single job
+    # containing one experiment per syndrome.
+    # The circuits are built by the given CircuitBuilder (serially if None).
+    # Returns the circuits, the result and, for each syndrome, the error
+    # and the accuracy
+    def run_batch(self,
+                  syndromes,
+                  provider_name,
+                  backend_name,
+                  shots=8192,
+                  builder=None):
+        if self.parameterized_syndrome:
+            bru_circ, qc, backend = self.prepare_parameterized_circuit_for_backend(
+                provider_name, backend_name)
+            result, errors, accuracies = self.run_syndromes_on_backend(
+                bru_circ, qc, backend, syndromes, shots)
+            return [qc], result, errors, accuracies
+        if builder is None:
+            builder = CircuitBuilder()
+        bru_circs = builder.build(
+            BruteforceISDCircuit,
+            [(self.h, s, self.w, self.need_measures, self.mct_mode,
+              self.nwr_mode) for s in syndromes])
+        qcs = [bru_circ.circuit for bru_circ in bru_circs]
+        n_qubits = qcs[0].width()
+        logger.info("Number of qubits needed = {0}".format(n_qubits))
+        backend = misc.get_backend(provider_name, backend_name, n_qubits)
+        metadata = self._get_job_metadata(qcs[0], syndromes=syndromes)
+        result = misc.run(qcs, backend, shots, self.job_store, metadata)
+        if result is None:
+            return qcs, None, [None] * len(syndromes), [None] * len(syndromes)
+        errors = []
+        accuracies = []
+        # All the circuits share the same name, so counts are retrieved by
+        # index
+        for i, s in enumerate(syndromes):
+            error, accuracy = self._decode_counts(result.get_counts(i), shots,
+                                                  s)
+            errors.append(error)
+            accuracies.append(accuracy)
+        return qcs, result, errors, accuracies
+
+    # Decode a job saved in the job store, w/ one experiment per syndrome
+    # (see run_circuit_on_backend, run_syndromes_on_backend and run_batch).
+    # If wait is False and the job isn't done yet, returns None; otherwise
+    # the job is removed from the store and the result, the errors and the
+    # accuracies are returned.
+    def resume(self, job_id, provider_name, wait=False):
+        record, result = self._get_stored_result(job_id, provider_name, wait)
+        if result is None:
+            return None
+        errors = []
+        accuracies = []
+        for i, s in enumerate(record['metadata']['syndromes']):
+            error, accuracy = self._decode_counts(result.get_counts(i),
+                                                  record['shots'],
+                                                  np.array(s))
+            errors.append(error)
+            accuracies.append(accuracy)
+        self.job_store.remove(job_id)
+        return result, errors, accuracies
+
+    # Run the circuit w/ misc.run_adaptive, stopping as soon as the leading
+    # state is a valid error or is separated from the others. The number of
+    # shots actually spent is stored in shots_spent.
+    # If the backend can't execute the first round any time soon, the
+    # result, the error and the accuracy are None, and the job is saved in
+    # the job store, if any (see resume)
+    def run_circuit_on_backend_adaptive(self,
+                                        qc,
+                                        backend,
+                                        max_shots,
+                                        parameter_binds=None):
+        result, counts, self.shots_spent = misc.run_adaptive(
+            qc,
+            backend,
+            max_shots,
+            verify=self._verify_state,
+            parameter_binds=parameter_binds,
+            job_store=self.job_store,
+            metadata=self._get_job_metadata(qc, syndromes=[self.syndrome]))
+        error, accuracy = self._decode_counts(counts, self.shots_spent,
+                                              self.syndrome)
         return result, error, accuracy
 
-    def run(self, provider_name, backend_name, shots=8192):
+    def _verify_state(self, state):
+        masks = decoding.states_to_masks([state])
+        return decoding.bruteforce_valid(self.h, self.syndrome, self.w,
+                                         masks)[0]
+
+    # If adaptive is True, shots is the maximum number of shots (see
+    # run_circuit_on_backend_adaptive)
+    def run(self, provider_name, backend_name, shots=8192, adaptive=False):
+        if adaptive:
+            parameter_binds = None
+            if self.parameterized_syndrome:
+                bru_circ, qc, backend = self.prepare_parameterized_circuit_for_backend(
+                    provider_name, backend_name)
+                parameter_binds = bru_circ.get_syndrome_parameter_binds(
+                    self.syndrome)
+            else:
+                qc, backend = self.prepare_circuit_for_backend(
+                    provider_name, backend_name)
+            result, error, accuracy = self.run_circuit_on_backend_adaptive(
+                qc, backend, shots, parameter_binds)
+            return qc, result, error, accuracy
+        if self.parameterized_syndrome:
+            bru_circ, qc, backend = self.prepare_parameterized_circuit_for_backend(
+                provider_name, backend_name)
+            result, errors, accuracies = self.run_syndromes_on_backend(
+                bru_circ, qc, backend, [self.syndrome], shots)
+            return qc, result, errors[0], accuracies[0]
         qc, backend = self.prepare_circuit_for_backend(provider_name,
                                                        backend_name)
         result, error, accuracy = self.run_circuit_on_backend(
@@ -0,0 +1,61 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def _build(circ_cls, args):
+    isd_circ = circ_cls(*args)
+    isd_circ.build_circuit()
+    return isd_circ
+
+
+class CircuitBuilder():
+    """
+    Build independent ISD circuits, optionally in parallel using a pool of
+    worker processes. The built circuits are pickled back to the parent
+    process and returned in submission order.
+
+    The pool is created the first time it's needed and reused by following
+    builds, until close is called (or the with block is exited).
+    """
+
+    def __init__(self, workers=1):
+        """
+        :param workers: the number of worker processes. If 1, the circuits
+        are built serially in the calling process; if None, the number of
+        processors on the machine is used.
+        """
+        assert workers is None or workers > 0, "Workers must be positive"
+        self.workers = workers
+        self._executor = None
+
+    def build(self, circ_cls, args_list):
+        """
+        :param circ_cls: the ISDAbstractCircuit subclass to instantiate
+        :param args_list: a list of tuples, each one containing the
+        positional arguments of circ_cls for a circuit
+        :returns: the list of the ISD circuit instances, w/ the circuit
+        already built, in the same order of args_list
+        """
+        if self.workers == 1 or len(args_list) <= 1:
+            return [_build(circ_cls, args) for args in args_list]
+        if self._executor is None:
+            logger.debug("Starting pool w/ {} workers".format(self.workers))
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        logger.debug("Building {} circuits in parallel".format(
+            len(args_list)))
+        return list(
+            self._executor.map(_build, [circ_cls] * len(args_list),
+                               args_list))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
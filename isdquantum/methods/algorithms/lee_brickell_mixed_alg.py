@@ -1,7 +1,12 @@
+import asyncio
 import logging
+import threading
+from collections import OrderedDict
 from isdclassic.methods.common import ISDWithoutLists
 from isdquantum.methods.circuits.lee_brickell_bruteforce_circ import LeeBrickellCircuit
 from isdquantum.methods.algorithms.abstract_alg import ISDAbstractAlg
+from isdquantum.methods.algorithms.circuit_builder import CircuitBuilder
+from isdquantum.utils import decoding
 from isdquantum.utils import misc
 import numpy as np
 
@@ -9,75 +14,465 @@ logger = logging.getLogger(__name__)
 
 
 class LeeBrickellMixedAlg(ISDAbstractAlg):
-    def __init__(self, h, syndrome, w, p, need_measures, mct_mode, nwr_mode):
-        super().__init__(h, syndrome, w, need_measures, mct_mode, nwr_mode)
+    def __init__(self,
+                 h,
+                 syndrome,
+                 w,
+                 p,
+                 need_measures,
+                 mct_mode,
+                 nwr_mode,
+                 parameterized_syndrome=False):
+        super().__init__(h, syndrome, w, need_measures, mct_mode, nwr_mode,
+                         parameterized_syndrome)
         self.p = p
+        # (v, provider, backend) -> (lee_circ, compiled qc, backend), only used w/
+        # parameterized_syndrome
+        self._parameterized_circuits = OrderedDict()
+        # (v, s_sig, provider, backend) -> (lee_circ, qc, backend), only used
+        # w/o parameterized_syndrome
+        self._circuits = OrderedDict()
+        # Maximum number of circuits kept in each of the caches above, the
+        # least recently used ones are dropped
+        self.max_cached_circuits = 32
+        # Information set (the columns of h selected for v) -> number of
+        # executions which didn't find any valid state. The memo is kept
+        # across runs.
+        self._information_sets = {}
+        # The memo is read by the RREFs drawn in the executor of run_async
+        # while the results are checked in the event loop
+        self._information_sets_lock = threading.Lock()
+        # Number of failed executions after which an information set drawn
+        # again is skipped
+        self.information_set_tries = 1
+        # Since Grover may fail even on an information set w/ a solution,
+        # after max_skipped_draws consecutive draws of skipped information
+        # sets all of them are considered tried and the memo is reset, up to
+        # max_information_set_passes times; then the search is exhausted
+        self.max_skipped_draws = 100
+        self.max_information_set_passes = 3
+        self._skipped_draws = 0
+        self._information_set_passes = 0
 
-    def run(self, provider_name, backend_name, shots=8192):
-        exit_condition = False
-        while (not exit_condition):
-            isd_classic = ISDWithoutLists(self.h, self.syndrome, self.w,
-                                          ISDWithoutLists.ALG_LEE_BRICKELL)
-            hr, u, perm, s_sig = isd_classic.get_matrix_rref()
-            logger.debug(
-                "Classical RREF end, received u\n{}\nperm\n{}\nh_rref\n{}\ns_sig {}"
-                .format(u, perm, hr, s_sig))
-            # Extract k-most submatrix V from hr
-            v = hr[:, 0:self.k]
-            logger.debug("Extracted v is\n{}".format(v))
-            # TODO lee brickell bruteforce circuit should take only v as input
-            # Quantum algorithm to check which of the (k choose p) combination of
-            # p columns, added to the syndrome, has weight w - p
-            # Q.A. will return the specific combination of column
-            isd_method = LeeBrickellCircuit(v, s_sig, self.w, self.p,
-                                            self.need_measures, self.mct_mode,
-                                            self.nwr_mode)
-            logger.info("Classic end, Lee bricked quantum start")
-            qc = isd_method.build_circuit()
+    # Return the compiled circuit for the given v, w/ the syndrome left as a
+    # parameter. Circuits are cached, so that a v already seen is neither
+    # rebuilt nor recompiled, just bound to the new s_sig.
+    def _get_parameterized_circuit(self, v, provider_name, backend_name):
+        key = (v.tobytes(), v.shape, provider_name, backend_name)
+        if key not in self._parameterized_circuits:
+            lee_circ = LeeBrickellCircuit(v, None, self.w, self.p,
+                                          self.need_measures, self.mct_mode,
+                                          self.nwr_mode)
+            qc = lee_circ.build_circuit()
+            n_qubits = qc.width()
+            logger.info("Number of qubits needed = {0}".format(n_qubits))
+            backend = misc.get_backend(provider_name, backend_name, n_qubits)
+            qc = misc.get_compiled_circuit(qc, backend)
+            self._cache_circuit(self._parameterized_circuits, key,
+                                (lee_circ, qc, backend))
+        self._parameterized_circuits.move_to_end(key)
+        return self._parameterized_circuits[key]
+
+    # Return the circuit for the given v and s_sig. A pair already seen is
+    # not rebuilt.
+    def _get_circuit(self, v, s_sig, provider_name, backend_name):
+        key = (v.tobytes(), v.shape, s_sig.tobytes(), provider_name,
+               backend_name)
+        if key not in self._circuits:
+            lee_circ = LeeBrickellCircuit(v, s_sig, self.w, self.p,
+                                          self.need_measures, self.mct_mode,
+                                          self.nwr_mode)
+            qc = lee_circ.build_circuit()
             n_qubits = qc.width()
             logger.info("Number of qubits needed = {0}".format(n_qubits))
             backend = misc.get_backend(provider_name, backend_name, n_qubits)
             logger.debug("After function, backend name is {0}".format(
                 backend.name()))
-            result = misc.run(qc, backend, shots=shots)
-            counts = result.get_counts(qc)
-            logger.debug("{0} counts: \n {1}".format(len(counts), counts))
-            max_val = max(counts.values())
-            accuracy = max_val / shots
-            logger.debug("Max val is {}, shots is {}, accuracy is {}".format(
-                max_val, shots, accuracy))
-            if accuracy < 0.7:
-                logger.debug("Low accuracy")
-                continue
-            max_val_status = max(counts, key=lambda key: counts[key])
+            self._cache_circuit(self._circuits, key, (lee_circ, qc, backend))
+        self._circuits.move_to_end(key)
+        return self._circuits[key]
+
+    def _cache_circuit(self, cache, key, value):
+        cache[key] = value
+        while len(cache) > self.max_cached_circuits:
+            cache.popitem(last=False)
+
+    # The information set is identified by the columns of h moved into v by
+    # the permutation, regardless of their order. Two RREFs w/ the same
+    # information set have the same solutions, hence the same outcome.
+    def _get_information_set(self, perm):
+        return frozenset(np.argmax(perm[:, :self.k], axis=0).tolist())
+
+    def _get_state_verifier(self, v, s_sig):
+        def verify(state):
+            masks = decoding.states_to_masks([state])
+            return decoding.lee_brickell_valid(v, s_sig, self.w, self.p,
+                                               masks)[0]
+
+        return verify
+
+    # Compute a new RREF of h. Returns None if its information set has
+    # already been tried (see information_set_tries), otherwise v, perm,
+    # s_sig and the information set.
+    # Raises an Exception when the search is exhausted (see
+    # max_information_set_passes).
+    def _draw_rref(self):
+        isd_classic = ISDWithoutLists(self.h, self.syndrome, self.w,
+                                      ISDWithoutLists.ALG_LEE_BRICKELL)
+        hr, u, perm, s_sig = isd_classic.get_matrix_rref()
+        logger.debug(
+            "Classical RREF end, received u\n{}\nperm\n{}\nh_rref\n{}\ns_sig {}"
+            .format(u, perm, hr, s_sig))
+        information_set = self._get_information_set(perm)
+        with self._information_sets_lock:
+            failures = self._information_sets.get(information_set, 0)
+            if failures >= self.information_set_tries:
+                logger.debug("Information set {} already tried, skip".format(
+                    sorted(information_set)))
+                self._skip_draw()
+                return None
+            self._skipped_draws = 0
+        # Extract k-most submatrix V from hr
+        v = hr[:, 0:self.k]
+        logger.debug("Extracted v is\n{}".format(v))
+        return v, perm, s_sig, information_set
+
+    def _skip_draw(self):
+        self._skipped_draws += 1
+        if self._skipped_draws < self.max_skipped_draws:
+            return
+        self._skipped_draws = 0
+        self._information_set_passes += 1
+        if self._information_set_passes >= self.max_information_set_passes:
+            raise Exception("No solution found, all the information sets "
+                            "drawn failed {} times".format(
+                                self._information_set_passes *
+                                self.information_set_tries))
+        logger.info("All the information sets drawn failed, start over")
+        self._information_sets.clear()
+
+    # Check classically all the observed states, in decreasing order of
+    # frequency, and take the first one for which the sum of the selected
+    # columns of v and of s_sig has weight w - p. Even if the accuracy is low,
+    # the solution may be among them, avoiding another RREF and circuit
+    # execution.
+    # Returns e_hat and the accuracy, or None and None if no state is valid,
+    # in which case a failure of the information set is recorded.
+    # W/o counts, f.e. if the backend didn't execute any adaptive round,
+    # None and None are returned w/o recording any failure.
+    def _check_counts(self, v, s_sig, information_set, counts, run_shots):
+        logger.debug("{0} counts: \n {1}".format(len(counts), counts))
+        if len(counts) == 0 or run_shots == 0:
+            logger.debug("No counts to check")
+            return None, None
+        states, occurrences = decoding.get_top_counts(counts, None)
+        logger.debug("Max val is {}, shots is {}, accuracy is {}".format(
+            occurrences[0], run_shots, occurrences[0] / run_shots))
+        masks = decoding.states_to_masks(states)
+        valid = decoding.lee_brickell_valid(v, s_sig, self.w, self.p, masks)
+        i = decoding.get_first_valid(valid)
+        e_hat = None
+        if i is None:
+            logger.debug("None of the {} observed states is valid".format(
+                len(states)))
+        else:
+            accuracy = occurrences[i] / run_shots
             logger.debug(
-                "Max value is {} ({:4.2f} accuracy) for status {}".format(
-                    max_val, max_val / 8192, max_val_status))
-            # Then e_hat = concatenate([0] * k, extract(hr, i) + s_sig
-            error_positions = [
-                pos for pos, char in enumerate(max_val_status[::-1])
-                if char == '1'
-            ]
-            logger.debug("error positions are: {}".format(error_positions))
-            v_extr = v[:, error_positions]
-            sum_to_s = (v_extr.sum(axis=1) + s_sig) % 2
-            logger.debug("Sum of V{} and s_sig {} is {}".format(
-                error_positions, s_sig, sum_to_s))
-            sum_to_s_w = np.sum(sum_to_s)
-            if sum_to_s_w != self.w - self.p:
-                logger.debug("Wrong sum to s {}".format(sum_to_s_w))
-                continue
-            e_hat = np.concatenate((np.zeros(self.k), sum_to_s))
-            logger.debug("e_hat before error position is {}".format(e_hat))
-            for j in error_positions:
-                e_hat[j] = 1
-            logger.debug("e_hat after error position is {}".format(e_hat))
-            e_hat_w = np.sum(e_hat)
-            logger.debug("Weight of e_hat is {}".format(e_hat_w))
-            if e_hat_w == self.w:
-                logger.debug("FOUND!!")
-                exit_condition = True
-                logger.debug("Original syndrome was {}".format(self.syndrome))
+                "Value is {} ({:4.2f} accuracy) for status {}".format(
+                    occurrences[i], accuracy, states[i]))
+            e_hat = self._get_e_hat(v, s_sig, masks[i])
+        if e_hat is None:
+            with self._information_sets_lock:
+                self._information_sets[
+                    information_set] = self._information_sets.get(
+                        information_set, 0) + 1
+            return None, None
+        return e_hat, accuracy
+
+    def _get_e_hat(self, v, s_sig, mask):
+        # Then e_hat = concatenate([0] * k, extract(hr, i) + s_sig
+        error_positions = decoding.mask_to_positions(mask, self.k)
+        logger.debug("error positions are: {}".format(error_positions))
+        v_extr = v[:, error_positions]
+        sum_to_s = (v_extr.sum(axis=1) + s_sig) % 2
+        logger.debug("Sum of V{} and s_sig {} is {}".format(
+            error_positions, s_sig, sum_to_s))
+        sum_to_s_w = np.sum(sum_to_s)
+        if sum_to_s_w != self.w - self.p:
+            logger.debug("Wrong sum to s {}".format(sum_to_s_w))
+            return None
+        e_hat = np.concatenate((np.zeros(self.k), sum_to_s))
+        logger.debug("e_hat before error position is {}".format(e_hat))
+        for j in error_positions:
+            e_hat[j] = 1
+        logger.debug("e_hat after error position is {}".format(e_hat))
+        e_hat_w = np.sum(e_hat)
+        logger.debug("Weight of e_hat is {}".format(e_hat_w))
+        if e_hat_w != self.w:
+            return None
+        logger.debug("FOUND!!")
+        logger.debug("Original syndrome was {}".format(self.syndrome))
+        return e_hat
+
+    def _get_error(self, e_hat, perm):
         e = np.mod(np.dot(e_hat, perm.T), 2)
         logger.info("Error is {}".format(e))
-        return qc, result, e, accuracy
+        return e
+
+    # Metadata of a job, w/ an experiment for each of the drawn RREFs
+    def _get_experiments_metadata(self, qc, drawn):
+        experiments = [{
+            'v': v,
+            'perm': perm,
+            's_sig': s_sig,
+            'information_set': information_set
+        } for v, perm, s_sig, information_set in drawn]
+        return self._get_job_metadata(
+            qc, p=self.p, experiments=experiments)
+
+    # Decode a job saved in the job store (see run and run_batched).
+    # If wait is False and the job isn't done yet, returns None; otherwise
+    # the job is removed from the store and the result, the error and the
+    # accuracy of the first valid experiment are returned (None and None if
+    # no experiment is valid).
+    def resume(self, job_id, provider_name, wait=False):
+        record, result = self._get_stored_result(job_id, provider_name, wait)
+        if result is None:
+            return None
+        metadata = record['metadata']
+        assert metadata['p'] == self.p, "Job submitted for another p"
+        self.job_store.remove(job_id)
+        for i, experiment in enumerate(metadata['experiments']):
+            v = np.array(experiment['v'])
+            s_sig = np.array(experiment['s_sig'])
+            e_hat, accuracy = self._check_counts(
+                v, s_sig, frozenset(experiment['information_set']),
+                result.get_counts(i), record['shots'])
+            if e_hat is not None:
+                return result, self._get_error(
+                    e_hat, np.array(experiment['perm'])), accuracy
+        return result, None, None
+
+    # If adaptive is True, each circuit is executed w/ misc.run_adaptive and
+    # shots is the maximum number of shots per circuit. The number of shots
+    # spent by the last circuit is stored in shots_spent.
+    # If the backend can't execute the circuit any time soon, the job is
+    # saved in the job store, if any, and result, error and accuracy are
+    # None (see resume).
+    def run(self, provider_name, backend_name, shots=8192, adaptive=False):
+        e_hat = None
+        while e_hat is None:
+            drawn = self._draw_rref()
+            if drawn is None:
+                continue
+            v, perm, s_sig, information_set = drawn
+            # TODO lee brickell bruteforce circuit should take only v as input
+            # Quantum algorithm to check which of the (k choose p) combination of
+            # p columns, added to the syndrome, has weight w - p
+            # Q.A. will return the specific combination of column
+            logger.info("Classic end, Lee bricked quantum start")
+            parameter_binds = None
+            if self.parameterized_syndrome:
+                isd_method, qc, backend = self._get_parameterized_circuit(
+                    v, provider_name, backend_name)
+                parameter_binds = isd_method.get_syndrome_parameter_binds(
+                    s_sig)
+            else:
+                isd_method, qc, backend = self._get_circuit(
+                    v, s_sig, provider_name, backend_name)
+            if adaptive:
+                result, counts, self.shots_spent = misc.run_adaptive(
+                    qc,
+                    backend,
+                    shots,
+                    verify=self._get_state_verifier(v, s_sig),
+                    parameter_binds=parameter_binds,
+                    job_store=self.job_store,
+                    metadata=self._get_experiments_metadata(qc, [drawn]))
+                if result is None:
+                    return qc, None, None, None
+                run_shots = self.shots_spent
+            else:
+                metadata = self._get_experiments_metadata(qc, [drawn])
+                if parameter_binds is not None:
+                    result = misc.run_with_parameter_binds(
+                        qc, backend, [parameter_binds], shots, self.job_store,
+                        metadata)
+                else:
+                    result = misc.run(qc, backend, shots, self.job_store,
+                                      metadata)
+                if result is None:
+                    return qc, None, None, None
+                counts = result.get_counts(qc)
+                run_shots = shots
+            e_hat, accuracy = self._check_counts(v, s_sig, information_set,
+                                                 counts, run_shots)
+        return qc, result, self._get_error(e_hat, perm), accuracy
+
+    # Draw batch_size RREFs up front, build their circuits w/ the given
+    # CircuitBuilder (serially if None) and submit them in a single job, so
+    # that the backend isn't idle while the following circuits are built.
+    # Information sets repeated in the same batch are executed only once.
+    # The first verified solution, in drawing order, is returned; if none
+    # of the batch is valid, a new batch is drawn. Batches w/o any untried
+    # information set aren't submitted, and raise an Exception once the
+    # search is exhausted (see _draw_rref).
+    def run_batched(self,
+                    provider_name,
+                    backend_name,
+                    batch_size,
+                    shots=8192,
+                    builder=None):
+        assert batch_size > 0, "Batch size must be positive"
+        assert not self.parameterized_syndrome, "Batches of parameterized circuits are not supported"
+        if builder is None:
+            builder = CircuitBuilder()
+        while True:
+            batch = {}
+            for _ in range(batch_size):
+                drawn = self._draw_rref()
+                if drawn is not None and drawn[3] not in batch:
+                    batch[drawn[3]] = drawn
+            if len(batch) == 0:
+                continue
+            batch = list(batch.values())
+            keys = [(v.tobytes(), v.shape, s_sig.tobytes(), provider_name,
+                     backend_name) for v, _, s_sig, _ in batch]
+            # The circuits of the batch, taken from the cache or built
+            circuits = [self._circuits.get(key) for key in keys]
+            missing = [i for i, circuit in enumerate(circuits)
+                       if circuit is None]
+            built = builder.build(
+                LeeBrickellCircuit,
+                [(batch[i][0], batch[i][2], self.w, self.p,
+                  self.need_measures, self.mct_mode, self.nwr_mode)
+                 for i in missing])
+            if len(built) > 0:
+                n_qubits = built[0].circuit.width()
+                logger.info("Number of qubits needed = {0}".format(n_qubits))
+                backend = misc.get_backend(provider_name, backend_name,
+                                           n_qubits)
+                for i, lee_circ in zip(missing, built):
+                    circuits[i] = (lee_circ, lee_circ.circuit, backend)
+                    self._cache_circuit(self._circuits, keys[i], circuits[i])
+            qcs = [circuit[1] for circuit in circuits]
+            backend = circuits[0][2]
+            logger.info("Running a batch of {} circuits".format(len(qcs)))
+            result = misc.run(qcs, backend, shots, self.job_store,
+                              self._get_experiments_metadata(qcs[0], batch))
+            if result is None:
+                return qcs, None, None, None
+            # All the circuits share the same name, so counts are retrieved
+            # by index
+            for i, (v, perm, s_sig, information_set) in enumerate(batch):
+                e_hat, accuracy = self._check_counts(
+                    v, s_sig, information_set, result.get_counts(i), shots)
+                if e_hat is not None:
+                    return qcs, result, self._get_error(e_hat, perm), accuracy
+
+    # Pipelined version of run: a producer computes the RREFs and builds and
+    # submits the circuits, while the results of the jobs are checked in
+    # submission order. At most max_in_flight jobs are submitted and not yet
+    # checked, so that the backend has always some work queued while the
+    # next circuits are prepared. As soon as a solution is verified, the
+    # producer is stopped and the jobs still in flight are cancelled.
+    def run_pipelined(self,
+                      provider_name,
+                      backend_name,
+                      shots=8192,
+                      max_in_flight=2):
+        return asyncio.run(
+            self.run_async(provider_name, backend_name, shots, max_in_flight))
+
+    async def run_async(self,
+                        provider_name,
+                        backend_name,
+                        shots=8192,
+                        max_in_flight=2):
+        assert max_in_flight > 0, "At least one job should be in flight"
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=max_in_flight)
+        slots = asyncio.Semaphore(max_in_flight)
+        # Information sets of the jobs in flight, not drawn again
+        in_flight = set()
+        # Set whenever a job in flight is checked
+        checked = asyncio.Event()
+        producer = loop.create_task(
+            self._produce(loop, queue, slots, in_flight, checked,
+                          provider_name, backend_name, shots))
+        try:
+            while True:
+                item = await queue.get()
+                if isinstance(item, Exception):
+                    raise item
+                job, qc, (v, perm, s_sig, information_set) = item
+                result = await loop.run_in_executor(None, job.result)
+                e_hat, accuracy = self._check_counts(
+                    v, s_sig, information_set, result.get_counts(qc), shots)
+                in_flight.discard(information_set)
+                slots.release()
+                checked.set()
+                if e_hat is not None:
+                    return qc, result, self._get_error(e_hat, perm), accuracy
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+            while not queue.empty():
+                item = queue.get_nowait()
+                if not isinstance(item, Exception):
+                    misc.cancel_job(item[0])
+
+    # Submit the circuits of the RREFs drawn, until cancelled. An
+    # information set already in flight isn't submitted again, and the next
+    # RREF is drawn only after a job in flight has been checked. The
+    # exceptions, f.e. when the search is exhausted, are put in the queue.
+    async def _produce(self, loop, queue, slots, in_flight, checked,
+                       provider_name, backend_name, shots):
+        try:
+            while True:
+                drawn = await loop.run_in_executor(None, self._draw_rref)
+                if drawn is None:
+                    continue
+                if drawn[3] in in_flight:
+                    checked.clear()
+                    await checked.wait()
+                    continue
+                await slots.acquire()
+                future = loop.run_in_executor(None, self._submit_circuit,
+                                              drawn[0], drawn[2],
+                                              provider_name, backend_name,
+                                              shots)
+                try:
+                    job, qc = await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    # The submission can't be interrupted, so the job is
+                    # cancelled as soon as it's submitted
+                    future.add_done_callback(_cancel_submitted_job)
+                    raise
+                in_flight.add(drawn[3])
+                await queue.put((job, qc, drawn))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+
+    # Build (or reuse) the circuit for v and s_sig and submit it, w/o
+    # waiting for the result
+    def _submit_circuit(self, v, s_sig, provider_name, backend_name, shots):
+        parameter_binds = None
+        if self.parameterized_syndrome:
+            isd_method, qc, backend = self._get_parameterized_circuit(
+                v, provider_name, backend_name)
+            parameter_binds = [isd_method.get_syndrome_parameter_binds(s_sig)]
+        else:
+            isd_method, qc, backend = self._get_circuit(
+                v, s_sig, provider_name, backend_name)
+        return misc.submit(qc, backend, shots, parameter_binds), qc
+
+
+def _cancel_submitted_job(future):
+    if not future.cancelled() and future.exception() is None:
+        misc.cancel_job(future.result()[0])
@@ -0,0 +1,108 @@
+import logging
+from math import factorial
+from isdquantum.methods.circuits import resource_estimator
+from isdquantum.methods.circuits.abstract_circ import ISDAbstractCircuit
+
+logger = logging.getLogger(__name__)
+
+# Planner for the p of the Lee-Brickell algorithm.
+# The expected cost of LeeBrickellMixedAlg is estimated as the expected
+# number of information sets to try, i.e. 1 / P(the error has exactly p ones
+# in the information set), times the cost of a single execution of the
+# circuit, i.e. its depth times its width. The depth of the circuit already
+# accounts for the Grover rounds. The number of shots is the same for every
+# p, so it's left out.
+
+
+def _binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+def get_admissible_ps(n, k, w):
+    """
+    :returns: the values of p for which the Lee-Brickell circuit makes
+    sense, i.e. the ones s.t. p columns out of k can be selected and the
+    remaining w - p ones fit in the r redundancy positions
+    """
+    r = n - k
+    return [p for p in range(1, min(w, k) + 1) if w - p <= r]
+
+
+def is_circuit_feasible(k, p, nwr_mode):
+    """
+    :returns: False if the circuit can't be built for p, i.e. if the Benes
+    network has to generate all the k selectors or none of them
+    """
+    if nwr_mode == ISDAbstractCircuit.NWR_BENES:
+        return 0 < p < k
+    return True
+
+
+def get_information_set_probability(n, k, w, p):
+    """
+    :returns: the probability that a random permutation moves exactly p
+    ones of an error of weight w in the first k positions
+    """
+    return _binomial(k, p) * _binomial(n - k, w - p) / _binomial(n, w)
+
+
+def estimate_cost(n, k, w, p, mct_mode, nwr_mode):
+    """
+    Estimate the expected cost of LeeBrickellMixedAlg for the given p, w/ the
+    resources of a LeeBrickellCircuit w/ a dense v and a parametric syndrome
+    (see resource_estimator).
+
+    :returns: a dictionary w/ p, the probability of an information set,
+    the expected number of iterations, the depth, width and Grover rounds
+    of the circuit and the resulting cost; None if the circuit can't be
+    built for p
+    """
+    r = n - k
+    is_prob = get_information_set_probability(n, k, w, p)
+    if is_prob == 0:
+        return None
+    if not is_circuit_feasible(k, p, nwr_mode):
+        logger.debug("Can't build the circuit for p {}".format(p))
+        return None
+    # The gates implementing v depend on its ones, so a dense v gives an
+    # upper bound
+    resources = resource_estimator.estimate_lee_brickell(
+        k, r, w, p, mct_mode, nwr_mode)
+    depth = resources['depth']
+    width = resources['width']
+    expected_iterations = 1 / is_prob
+    cost = expected_iterations * depth * width
+    logger.debug(
+        "p {}: P(is) {:.4f}, depth {}, width {}, rounds {}, cost {:.3e}".
+        format(p, is_prob, depth, width, resources['rounds'], cost))
+    return {
+        'p': p,
+        'is_prob': is_prob,
+        'expected_iterations': expected_iterations,
+        'depth': depth,
+        'width': width,
+        'rounds': resources['rounds'],
+        'cost': cost
+    }
+
+
+def plan_p(n, k, w, mct_mode, nwr_mode):
+    """
+    :returns: the cheapest admissible p (see estimate_cost) and the list of
+    the estimates of all the admissible ones
+    """
+    estimates = []
+    for p in get_admissible_ps(n, k, w):
+        estimate = estimate_cost(n, k, w, p, mct_mode, nwr_mode)
+        if estimate is not None:
+            estimates.append(estimate)
+    if len(estimates) == 0:
+        raise Exception(
+            "No admissible p for n {}, k {}, w {}, {}, {}".format(
+                n, k, w, mct_mode, nwr_mode))
+    best = min(estimates, key=lambda estimate: estimate['cost'])
+    logger.info("Chosen p {} (expected cost {:.3e})".format(
+        best['p'], best['cost']))
+    return best['p'], estimates
@@ -1,9 +1,41 @@
 import logging
 from abc import ABC, abstractmethod, abstractproperty
+from contextlib import contextmanager
+from functools import wraps
 from math import sqrt, pi, asin
+from time import time
 
 _logger = logging.getLogger(__name__)
 
+# Circuit segments which only depend on the shape of the problem (and not on
+# the H/V matrix or on the syndrome), indexed by template key. See
+# ISDAbstractCircuit._template_key.
+_templates = {}
+
+
+def clear_templates():
+    _templates.clear()
+
+
+# Number of Grover rounds maximizing the success probability when there is
+# a single solution over n_func_domain states
+def get_grover_rounds(n_func_domain):
+    rounds = pi / (4 * asin(1 / sqrt(n_func_domain))) - 1 / 2
+    return max(round(rounds), 1)
+
+
+# Decorator recording the method as a phase of the build (see
+# ISDAbstractCircuit.instrument)
+def phase(method):
+    name = method.__name__.strip('_')
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._phase(name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class ISDAbstractCircuit(ABC):
     NWR_BENES = 'benes'
@@ -20,24 +52,45 @@ class ISDAbstractCircuit(ABC):
         self.need_measures = need_measures
         self.mct_mode = mct_mode
         self.nwr_mode = nwr_mode
+        # If True, the segments which don't depend on the matrix or on the
+        # syndrome are emitted only the first time a circuit of a given shape
+        # is built, and then copied from the cached template.
+        self.use_templates = True
+        # If True, build_circuit records wall time, gates and depth added by
+        # each phase of the build (see get_build_report).
+        self.instrument = False
+        self._build_report = None
+        self._phases_stack = []
+        self._round = None
+        # id(circuit) -> (circuit, levels of the wires, processed
+        # instructions, gates, depth)
+        self._depth_trackers = {}
         # self.inversion_about_zero_qubits: list
 
+    def get_grover_rounds(self):
+        return get_grover_rounds(self.n_func_domain)
+
     def build_circuit(self):
-        rounds = pi / (4 * asin(1 / sqrt(self.n_func_domain))) - 1 / 2
-        rounds = max(round(rounds), 1)
-        self.prepare_input()
+        rounds = self.get_grover_rounds()
+        if self.instrument:
+            self._build_report = []
+            self._depth_trackers = {}
+        self._round = None
+        self._emit_segment('prepare_input', self.prepare_input)
         for i in range(rounds):
             _logger.debug("ITERATION {0}".format(i))
-            self.oracle()
-            self.prepare_input_i()
-            self.diffusion()
-            self.prepare_input()
+            self._round = i
+            with self._phase('oracle'):
+                self.oracle()
+            self._emit_segment('diffusion_round', self._diffusion_round)
+        self._round = None
 
         if self.need_measures:
             from qiskit import ClassicalRegister
             cr = ClassicalRegister(len(self.to_measure), 'cols')
             self.circuit.add_register(cr)
-            self.circuit.measure(self.to_measure, cr)
+            with self._phase('measure'):
+                self.circuit.measure(self.to_measure, cr)
             # TODO just useful for tests to see the status of the registers
             # at the various stages
             # to_measure_2 = self.sum_q
@@ -64,6 +117,135 @@ class ISDAbstractCircuit(ABC):
             #     self.circuit.measure(to_measure_5, cr5)
         return self.circuit
 
+    def _diffusion_round(self):
+        self.prepare_input_i()
+        self.diffusion()
+        self.prepare_input()
+
+    def _emit_segment(self, name, emitter):
+        """
+        Emit the gates of a segment of the circuit which only depends on the
+        shape of the problem. The first time, the emitter is run on an empty
+        circuit sharing the registers of self.circuit, and the result is
+        stored in the template; later on, the stored gates are just appended.
+
+        :param name: the name of the segment inside the template
+        :param emitter: a method adding the segment gates to self.circuit
+        """
+        with self._phase(name):
+            if not self.use_templates:
+                emitter()
+                return
+            segments = _templates.setdefault(self._template_key(), {})
+            if name not in segments:
+                _logger.debug("Building template segment {}".format(name))
+                from qiskit import QuantumCircuit
+                main_circuit = self.circuit
+                self.circuit = QuantumCircuit(*main_circuit.qregs)
+                try:
+                    emitter()
+                    segments[name] = self.circuit
+                finally:
+                    self.circuit = main_circuit
+            self.circuit.extend(segments[name])
+
+    @contextmanager
+    def _phase(self, name):
+        """
+        Record the wall time, gates and depth added to the circuit by the
+        enclosed code, if instrument is True. Nested phases are recorded w/
+        their path, e.g. oracle/matrix2gates; a phase nested in one w/ the
+        same name is merged into it.
+        Gates and depth are measured on the circuit the phase is emitted on,
+        i.e. on the template while a template segment is being built.
+        """
+        if not self.instrument or (len(self._phases_stack) > 0
+                                   and self._phases_stack[-1] == name):
+            yield
+            return
+        self._phases_stack.append(name)
+        start_gates, start_depth = self._get_gates_and_depth()
+        start = time()
+        try:
+            yield
+        finally:
+            elapsed = time() - start
+            gates, depth = self._get_gates_and_depth()
+            self._build_report.append({
+                'phase': '/'.join(self._phases_stack),
+                'round': self._round,
+                'time': elapsed,
+                'gates': gates - start_gates,
+                'depth': depth - start_depth
+            })
+            self._phases_stack.pop()
+
+    # Update incrementally the depth of the current circuit, scheduling the
+    # instructions added since the last call as soon as possible (barriers
+    # are ignored, as in QuantumCircuit.depth)
+    def _get_gates_and_depth(self):
+        tracker = self._depth_trackers.get(id(self.circuit))
+        if tracker is None or tracker[0] is not self.circuit:
+            tracker = [self.circuit, {}, 0, 0, 0]
+            self._depth_trackers[id(self.circuit)] = tracker
+        _, levels, processed, gates, depth = tracker
+        data = self.circuit.data
+        for instr, qargs, cargs in data[processed:]:
+            if instr.name == 'barrier':
+                continue
+            wires = list(qargs) + list(cargs)
+            level = max([levels.get(w, 0) for w in wires] + [0]) + 1
+            for w in wires:
+                levels[w] = level
+            gates += 1
+            depth = max(depth, level)
+        tracker[2:] = [len(data), gates, depth]
+        return gates, depth
+
+    def get_build_report(self):
+        """
+        :returns: None if the circuit was not built w/ instrument set to
+        True, otherwise a dictionary containing
+        - phases, the list of the recorded phases, in order of completion,
+          each one w/ its path, round (None outside the Grover rounds), wall
+          time, gates and depth added
+        - totals, for each phase path, the number of calls and the total
+          time, gates and depth
+        - rounds, for each Grover round, the total time, gates and depth of
+          its top level phases
+        """
+        if self._build_report is None:
+            return None
+        totals = {}
+        rounds = {}
+        for record in self._build_report:
+            total = totals.setdefault(record['phase'], {
+                'calls': 0,
+                'time': 0.,
+                'gates': 0,
+                'depth': 0
+            })
+            total['calls'] += 1
+            for field in ('time', 'gates', 'depth'):
+                total[field] += record[field]
+            if record['round'] is not None and '/' not in record['phase']:
+                round_total = rounds.setdefault(record['round'], {
+                    'time': 0.,
+                    'gates': 0,
+                    'depth': 0
+                })
+                for field in ('time', 'gates', 'depth'):
+                    round_total[field] += record[field]
+        return {
+            'phases': list(self._build_report),
+            'totals': totals,
+            'rounds': [rounds[i] for i in sorted(rounds)]
+        }
+
+    @abstractmethod
+    def _template_key(self):
+        pass
+
     @abstractmethod
     def oracle(self):
         pass
@@ -80,6 +262,7 @@ class ISDAbstractCircuit(ABC):
 
     # It rotates the states around zero, so the input state of the circuit
     # should be nearly zero
+    @phase
     def diffusion(self):
         _logger.debug("Diffusion")
         assert self.inversion_about_zero_qubits is not None, "Inversion about zero qubits must be initialized in subclasses"
@@ -1,5 +1,5 @@
 import logging
-from isdquantum.methods.circuits.abstract_circ import ISDAbstractCircuit
+from isdquantum.methods.circuits.abstract_circ import ISDAbstractCircuit, phase
 from isdquantum.circuit import qregs_init as qregs
 from isdquantum.circuit import hamming_weight_generate as hwg
 from isdquantum.circuit import hamming_weight_compute as hwc
@@ -14,6 +14,8 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
 
     # mct stands for qiskit aqua multicontrol
     # nwr stands for n bits of weight r
+    # If syndrome is None, the syndrome is a list of circuit parameters, to be
+    # bound at execution time (see get_syndrome_parameter_binds)
     def __init__(self, h, syndrome, w, need_measures, mct_mode, nwr_mode):
         super().__init__(need_measures, mct_mode, nwr_mode)
         assert w > 0, "Weight must be positive"
@@ -21,7 +23,14 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
         self.w = w
         self.r = h.shape[0]
         self.n = h.shape[1]
-        assert syndrome.shape[0] == self.r, "Syndrome should be of length r"
+        if syndrome is None:
+            from qiskit.circuit import Parameter
+            self.syndrome_params = [
+                Parameter('s{}'.format(i)) for i in range(self.r)
+            ]
+        else:
+            assert syndrome.shape[0] == self.r, "Syndrome should be of length r"
+            self.syndrome_params = None
         self.syndrome = syndrome
         _logger.info(
             "n: {0}, r: {1}, w: {2}, syndrome: {3}, measures: {4}, mct_mode: {5}"
@@ -48,7 +57,6 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
             self.benes_dict = hwg.generate_qubits_with_given_weight_benes_get_pattern(
                 self.n, self.w)
 
-            # We don't use only n qubits, but the nearest power of 2
             self.selectors_q = QuantumRegister(self.benes_dict['n_lines'],
                                                'select')
             self.benes_flip_q = QuantumRegister(self.benes_dict['n_flips'],
@@ -60,8 +68,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
         elif self.nwr_mode == self.NWR_FPC:
             self.fpc_dict = hwc.get_circuit_for_qubits_weight_get_pattern(
                 self.n)
-            self.selectors_q = QuantumRegister(self.fpc_dict['n_lines'],
-                                               'select')
+            self.selectors_q = QuantumRegister(self.n, 'select')
             self.fpc_cout_q = QuantumRegister(self.fpc_dict['n_couts'], 'cout')
             self.fpc_cin_q = QuantumRegister(1, 'cin')
             self.fpc_eq_q = QuantumRegister(1, 'eq')
@@ -76,10 +83,6 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
             qubits_involved_in_multicontrols.append(
                 len(self.fpc_dict['results']))
 
-        # We should implement a check on n if it's not a power of 2
-        if len(self.selectors_q) != self.n:
-            raise Exception("A.T.M. we can't have less registers")
-
         qubits_involved_in_multicontrols.append(
             len(self.inversion_about_zero_qubits[1:]))
 
@@ -101,6 +104,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
 
         self.to_measure = self.selectors_q
 
+    @phase
     def prepare_input(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -113,6 +117,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
             self.circuit.h(self.selectors_q)
         self.circuit.barrier()
 
+    @phase
     def prepare_input_i(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -125,6 +130,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
             self.circuit.h(self.selectors_q)
         self.circuit.barrier()
 
+    @phase
     def _hamming_weight_selectors_check(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -136,6 +142,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
             "Result qubits for Hamming Weight of selectors {}".format(
                 self.fpc_result_qubits))
 
+    @phase
     def _hamming_weight_selectors_check_i(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -145,6 +152,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
             self.fpc_result_qubits)
         self.circuit.barrier()
 
+    @phase
     def _matrix2gates(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -154,6 +162,7 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
                 self.circuit, self.mct_mode)
         self.circuit.barrier()
 
+    @phase
     def _matrix2gates_i(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -163,16 +172,29 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
                 self.circuit, self.mct_mode)
         self.circuit.barrier()
 
+    @phase
     def _syndrome2gates(self):
         _logger.debug("Here")
         self.circuit.barrier()
-        qregs.initialize_qureg_to_complement_of_bitarray(
-            self.syndrome.tolist(), self.sum_q, self.circuit)
+        if self.syndrome_params is not None:
+            qregs.initialize_qureg_given_parameters(self.syndrome_params,
+                                                    self.sum_q, self.circuit)
+        else:
+            qregs.initialize_qureg_to_complement_of_bitarray(
+                self.syndrome.tolist(), self.sum_q, self.circuit)
         self.circuit.barrier()
 
+    @phase
     def _syndrome2gates_i(self):
         return self._syndrome2gates()
 
+    def get_syndrome_parameter_binds(self, syndrome):
+        assert self.syndrome_params is not None, "Syndrome is not parametric"
+        assert syndrome.shape[0] == self.r, "Syndrome should be of length r"
+        return qregs.get_parameter_binds_to_complement_of_bitarray(
+            self.syndrome_params, syndrome.tolist())
+
+    @phase
     def _flip_correct_state(self):
         _logger.debug("Here")
         self.circuit.barrier()
@@ -190,19 +212,23 @@ class BruteforceISDCircuit(ISDAbstractCircuit):
         # CZ END
         self.circuit.barrier()
 
-    def oracle(self):
+    def _oracle_check(self):
         _logger.debug("Here")
         if self.nwr_mode == self.NWR_BENES:
-            self._matrix2gates()
-            self._syndrome2gates()
             self._flip_correct_state()
-            self._syndrome2gates_i()
-            self._matrix2gates_i()
         elif self.nwr_mode == self.NWR_FPC:
-            self._matrix2gates()
-            self._syndrome2gates()
             self._hamming_weight_selectors_check()
             self._flip_correct_state()
             self._hamming_weight_selectors_check_i()
-            self._syndrome2gates_i()
-            self._matrix2gates_i()
+
+    def _template_key(self):
+        return (type(self).__name__, self.n, self.r, self.w, None,
+                self.mct_mode, self.nwr_mode)
+
+    def oracle(self):
+        _logger.debug("Here")
+        self._matrix2gates()
+        self._syndrome2gates()
+        self._emit_segment('oracle_check', self._oracle_check)
+        self._syndrome2gates_i()
+        self._matrix2gates_i()
@@ -1,5 +1,5 @@
 import logging
-from isdquantum.methods.circuits.abstract_circ import ISDAbstractCircuit
+from isdquantum.methods.circuits.abstract_circ import ISDAbstractCircuit, phase
 from isdquantum.circuit import qregs_init as qregs
 from isdquantum.circuit import hamming_weight_generate as hwg
 from isdquantum.circuit import hamming_weight_compute as hwc
@@ -18,6 +18,8 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
     # that just 1 over n qubits is set to 1. This is equal the weight w for bruteforce,
     # while w - p for lee_brickell
     # Lee brickell expexts a v in RREF
+    # If syndrome is None, the syndrome is a list of circuit parameters, to be
+    # bound at execution time (see get_syndrome_parameter_binds)
     def __init__(self, v, syndrome, w, p, need_measures, mct_mode, nwr_mode):
         super().__init__(need_measures, mct_mode, nwr_mode)
         # TODO Unneeded h and n for this algorithm, maybe delete from __init__
@@ -29,7 +31,14 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
         self.w = w
         self.r = v.shape[0]
         self.k = v.shape[1]
-        assert syndrome.shape[0] == self.r, "Syndrome should be of length r"
+        if syndrome is None:
+            from qiskit.circuit import Parameter
+            self.syndrome_params = [
+                Parameter('s{}'.format(i)) for i in range(self.r)
+            ]
+        else:
+            assert syndrome.shape[0] == self.r, "Syndrome should be of length r"
+            self.syndrome_params = None
         self.v = v
         self.syndrome = syndrome
         _logger.info(
@@ -56,7 +65,6 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             self.benes_dict = hwg.generate_qubits_with_given_weight_benes_get_pattern(
                 self.k, self.p)
 
-            # We don't use only n qubits, but the nearest power of 2
             self.selectors_q = QuantumRegister(self.benes_dict['n_lines'],
                                                'select')
             self.benes_flip_q = QuantumRegister(self.benes_dict['n_flips'],
@@ -68,8 +76,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
         elif self.nwr_mode == self.NWR_FPC:
             self.fpc_dict = hwc.get_circuit_for_qubits_weight_get_pattern(
                 self.k)
-            self.selectors_q = QuantumRegister(self.fpc_dict['n_lines'],
-                                               'select')
+            self.selectors_q = QuantumRegister(self.k, 'select')
             self.fpc_cout_q = QuantumRegister(self.fpc_dict['n_couts'],
                                               'fcout')
             self.fpc_cin_q = QuantumRegister(1, 'fcin')
@@ -85,10 +92,6 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             qubits_involved_in_multicontrols.append(
                 len(self.fpc_dict['results']))
 
-        # We should implement a check on n if it's not a power of 2
-        if len(self.selectors_q) != self.k:
-            raise Exception("A.T.M. we can't have less registers")
-
         qubits_involved_in_multicontrols.append(
             len(self.inversion_about_zero_qubits[1:]))
 
@@ -120,6 +123,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
 
         self.to_measure = self.selectors_q
 
+    @phase
     def _hamming_weight_selectors_check(self):
         _logger.debug("hmsc")
         self.circuit.barrier()
@@ -130,6 +134,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             "Result qubits for Hamming Weight of selectors {}".format(
                 self.fpc_result_qubits))
 
+    @phase
     def _hamming_weight_selectors_check_i(self):
         _logger.debug("hmsci")
         _logger.debug(
@@ -149,6 +154,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             self.mct_mode,
             uncomputeEq=True)
 
+    @phase
     def _matrix2gates(self):
         _logger.debug("m2g")
         self.circuit.barrier()
@@ -158,6 +164,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
                 self.circuit, self.mct_mode)
         self.circuit.barrier()
 
+    @phase
     def _matrix2gates_i(self):
         _logger.debug("m2gi")
         self.circuit.barrier()
@@ -167,17 +174,30 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
                 self.circuit, self.mct_mode)
         self.circuit.barrier()
 
+    @phase
     def _syndrome2gates(self):
         _logger.debug("Syndrome 2 gates")
         self.circuit.barrier()
-        qregs.initialize_qureg_given_bitstring(self.syndrome.tolist(),
-                                               self.sum_q, self.circuit)
+        if self.syndrome_params is not None:
+            qregs.initialize_qureg_given_parameters(self.syndrome_params,
+                                                    self.sum_q, self.circuit)
+        else:
+            qregs.initialize_qureg_given_bitstring(self.syndrome.tolist(),
+                                                   self.sum_q, self.circuit)
         self.circuit.barrier()
 
+    @phase
     def _syndrome2gates_i(self):
         _logger.debug("Syndrome 2 gates inverse")
         return self._syndrome2gates()
 
+    def get_syndrome_parameter_binds(self, syndrome):
+        assert self.syndrome_params is not None, "Syndrome is not parametric"
+        assert syndrome.shape[0] == self.r, "Syndrome should be of length r"
+        return qregs.get_parameter_binds_given_bitarray(
+            self.syndrome_params, syndrome.tolist())
+
+    @phase
     def _lee_weight_check(self):
         _logger.debug("Weight check")
         self.circuit.barrier()
@@ -189,6 +209,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             self.lee_result_qubits))
         self.circuit.barrier()
 
+    @phase
     def _lee_weight_check_i(self):
         _logger.debug("Weight check inverse")
         self.circuit.barrier()
@@ -207,6 +228,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             uncomputeEq=True)
         self.circuit.barrier()
 
+    @phase
     def _flip_correct_state(self):
         _logger.debug("Flip correct state")
         self.circuit.barrier()
@@ -218,6 +240,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             self.circuit.ccx(self.fpc_eq_q, self.lee_eq_q, self.fpc_two_eq_q)
         self.circuit.barrier()
 
+    @phase
     def prepare_input(self):
         _logger.debug("Input prepare")
         self.circuit.barrier()
@@ -230,6 +253,7 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             self.circuit.h(self.selectors_q)
         self.circuit.barrier()
 
+    @phase
     def prepare_input_i(self):
         _logger.debug("Input prepare inverse")
         self.circuit.barrier()
@@ -242,23 +266,27 @@ class LeeBrickellCircuit(ISDAbstractCircuit):
             self.circuit.h(self.selectors_q)
         self.circuit.barrier()
 
-    def oracle(self):
-        _logger.debug("Lee oracle")
+    def _oracle_check(self):
+        _logger.debug("Lee oracle check")
         if self.nwr_mode == self.NWR_BENES:
-            self._matrix2gates()
-            self._syndrome2gates()
             self._lee_weight_check()
             self._flip_correct_state()
             self._lee_weight_check_i()
-            self._syndrome2gates_i()
-            self._matrix2gates_i()
         elif self.nwr_mode == self.NWR_FPC:
-            self._matrix2gates()
-            self._syndrome2gates()
             self._hamming_weight_selectors_check()
             self._lee_weight_check()
             self._flip_correct_state()
             self._lee_weight_check_i()
             self._hamming_weight_selectors_check_i()
-            self._syndrome2gates_i()
-            self._matrix2gates_i()
+
+    def _template_key(self):
+        return (type(self).__name__, self.k, self.r, self.w, self.p,
+                self.mct_mode, self.nwr_mode)
+
+    def oracle(self):
+        _logger.debug("Lee oracle")
+        self._matrix2gates()
+        self._syndrome2gates()
+        self._emit_segment('oracle_check', self._oracle_check)
+        self._syndrome2gates_i()
+        self._matrix2gates_i()
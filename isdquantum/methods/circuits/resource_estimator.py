@@ -0,0 +1,523 @@
+import logging
+import numpy as np
+from collections import Counter
+from math import ceil
+from isdquantum.methods.circuits.abstract_circ import ISDAbstractCircuit, get_grover_rounds
+from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.circuit import hamming_weight_compute as hwc
+from isdquantum.utils import binary
+
+logger = logging.getLogger(__name__)
+
+# Analytic estimation of the resources of BruteforceISDCircuit and
+# LeeBrickellCircuit, w/o building them.
+# The gates emitted by the builders are replayed on plain qubit indices,
+# laid out as the registers of the real circuit, using only the Benes and FPC
+# patterns, the mct mode and the number of Grover rounds. A round is replayed
+# once and then repeated.
+# Multicontrolled gates w/ 1 or 2 controls are cx and ccx. W/ more controls,
+# they are decomposed as qiskit aqua does in each mct mode, i.e. in the ccx
+# of the V-chain (basic), in the cu1, cx, ccx and h of Barenco et al.
+# (advanced) or in h and the u1 and cx of a multicontrolled u1 (noancilla).
+# Each decomposition is replayed once on relative qubits and kept as a
+# template w/ its counts and, for each of its qubits, the longest path from
+# each of its qubits, so that the depth is exact even when it's applied
+# many times.
+# As qiskit does, the barriers are ignored by the depth.
+
+MCT = 'mct'
+
+# (controls, mct mode, ancilla) -> template, see _get_mct_template
+_mct_templates = {}
+
+
+class _Layout():
+    def __init__(self):
+        self.n_qubits = 0
+
+    def add(self, size):
+        qubits = list(range(self.n_qubits, self.n_qubits + size))
+        self.n_qubits += size
+        return qubits
+
+
+class _Gates():
+    def __init__(self, mct_mode, mct_anc):
+        self.mct_mode = mct_mode
+        self.mct_anc = mct_anc
+        # (name, qubits, template), the template is None but for the
+        # decomposed multicontrolled gates
+        self.gates = []
+
+    def add(self, name, qubits):
+        self.gates.append((name, tuple(qubits), None))
+
+    def mct(self, controls, target, mode=None):
+        mode = self.mct_mode if mode is None else mode
+        c = len(controls)
+        if c == 1:
+            self.add('cx', controls + [target])
+        elif c == 2:
+            self.add('ccx', controls + [target])
+        else:
+            if mode == ISDAbstractCircuit.MCT_BASIC:
+                anc = self.mct_anc[:c - 2]
+            elif mode == ISDAbstractCircuit.MCT_ADVANCED:
+                # At most one ancilla is used in advanced mode
+                anc = self.mct_anc[:1] if self.mct_anc is not None else []
+            else:
+                anc = []
+            template = _get_mct_template(c, mode, len(anc))
+            self.gates.append((MCT, tuple(controls + [target] + anc),
+                               template))
+
+
+# Replicate the decompositions of qiskit.aqua.circuits.gates.mct and mcu1
+# (aqua 0.5) on the qubits 0, ..., c - 1 (controls), c (target) and the
+# following ones (ancillas). Returns the list of (name, qubits).
+def _decompose_mct(c, mode, n_anc):
+    out = []
+    controls = list(range(c))
+    target = c
+    anc = list(range(c + 1, c + 1 + n_anc))
+    if mode == ISDAbstractCircuit.MCT_BASIC:
+        _ccx_v_chain(out, controls, target, anc)
+    elif mode == ISDAbstractCircuit.MCT_ADVANCED:
+        _multicx(out, controls + [target], anc[0] if n_anc > 0 else None)
+    else:
+        out.append(('h', [target]))
+        _mcu1(out, controls, target)
+        out.append(('h', [target]))
+    return out
+
+
+def _ccx_v_chain(out, controls, target, anc):
+    assert len(anc) >= len(controls) - 2, "Not enough ancillas"
+    chain = [(controls[0], controls[1], anc[0])]
+    for i in range(2, len(controls) - 1):
+        chain.append((controls[i], anc[i - 2], anc[i - 1]))
+    for qubits in chain:
+        out.append(('ccx', qubits))
+    out.append(('ccx', (controls[-1], anc[len(controls) - 3], target)))
+    for qubits in reversed(chain):
+        out.append(('ccx', qubits))
+
+
+def _cccx(out, qs):
+    # The controlled-V and controlled-Vdag are h, cu1 and h on the target
+    def cv(c):
+        out.extend([('h', [qs[3]]), ('cu1', [c, qs[3]]), ('h', [qs[3]])])
+
+    cv(qs[0])
+    for a, b, c in ((0, 1, 1), (0, 1, 1), (1, 2, 2), (0, 2, 2), (1, 2, 2),
+                    (0, 2, 2)):
+        out.append(('cx', [qs[a], qs[b]]))
+        cv(qs[c])
+
+
+def _ccccx(out, qs):
+    out.extend([('h', [qs[4]]), ('cu1', [qs[3], qs[4]]), ('h', [qs[4]])])
+    _cccx(out, qs[:4])
+    out.extend([('h', [qs[4]]), ('cu1', [qs[3], qs[4]]), ('h', [qs[4]])])
+    _cccx(out, qs[:4])
+    _cccx(out, [qs[0], qs[1], qs[2], qs[4]])
+
+
+def _multicx(out, qs, anc):
+    if len(qs) == 4:
+        _cccx(out, qs)
+    elif len(qs) == 5:
+        _ccccx(out, qs)
+    else:
+        assert anc is not None, "Advanced mode needs an ancilla"
+        n = len(qs)
+        m1 = ceil(n / 2)
+        for _ in range(2):
+            _multicx(out, qs[:m1] + [anc], qs[m1])
+            _multicx(out, qs[m1:n - 1] + [anc, qs[n - 1]], qs[m1 - 1])
+
+
+def _mcu1(out, controls, target):
+    def cu1(c):
+        out.extend([('u1', [c]), ('cx', [c, target]), ('u1', [target]),
+                    ('cx', [c, target]), ('u1', [target])])
+
+    n = len(controls)
+    last_pattern = None
+    for i in range(1, 2**n):
+        # The patterns of the Gray code, MSB first
+        pattern = binary.get_bitstring_from_int(i ^ (i >> 1), n)
+        if last_pattern is None:
+            last_pattern = pattern
+        lm_pos = pattern.index('1')
+        changed = [j for j in range(n) if pattern[j] != last_pattern[j]]
+        if len(changed) > 0:
+            if changed[0] != lm_pos:
+                out.append(('cx', [controls[changed[0]], controls[lm_pos]]))
+            else:
+                for j in range(lm_pos + 1, n):
+                    if pattern[j] == '1':
+                        out.append(('cx', [controls[j], controls[lm_pos]]))
+        cu1(controls[lm_pos])
+        last_pattern = pattern
+
+
+# The counts of the decomposition and, for each of its qubits, the list of
+# (qubit, d), where d is the length of the longest path from qubit. A qubit
+# left untouched has a path of length 0 from itself.
+def _get_mct_template(c, mode, n_anc):
+    key = (c, mode, n_anc)
+    if key not in _mct_templates:
+        gates = _decompose_mct(c, mode, n_anc)
+        paths = [{q: 0} for q in range(c + 1 + n_anc)]
+        for _, qubits in gates:
+            merged = {}
+            for q in qubits:
+                for source, d in paths[q].items():
+                    merged[source] = max(merged.get(source, 0), d + 1)
+            for q in qubits:
+                paths[q] = merged
+        _mct_templates[key] = {
+            'counts': Counter(name for name, _ in gates),
+            'paths': [list(path.items()) for path in paths]
+        }
+    return _mct_templates[key]
+
+
+def _count(gates):
+    counts = Counter()
+    for name, qubits, template in gates:
+        if template is None:
+            counts[name] += 1
+        else:
+            counts.update(template['counts'])
+    return counts
+
+
+def _apply(levels, gates):
+    for _, qubits, template in gates:
+        if template is None:
+            level = max(levels[q] for q in qubits) + 1
+            for q in qubits:
+                levels[q] = level
+        else:
+            new_levels = [
+                max(levels[qubits[source]] + d for source, d in path)
+                for path in template['paths']
+            ]
+            for q, level in zip(qubits, new_levels):
+                levels[q] = level
+
+
+# Replicate adder.adder_circuit (and adder.adder_circuit_i)
+def _adder(g, cin, a, b, cout, inverse=False):
+    def majority(x, y, z):
+        return [('cx', [z, y]), ('cx', [z, x]), ('ccx', [x, y, z])]
+
+    def unmajority(x, y, z):
+        return [('ccx', [x, y, z]), ('cx', [z, x]), ('cx', [x, y])]
+
+    if inverse:
+        first = lambda x, y, z: unmajority(x, y, z)[::-1]
+        last = lambda x, y, z: majority(x, y, z)[::-1]
+    else:
+        first, last = majority, unmajority
+    gates = first(cin, b[0], a[0])
+    for j in range(len(a) - 1):
+        gates += first(a[j], b[j + 1], a[j + 1])
+    gates.append(('cx', [a[len(a) - 1], cout]))
+    for j in reversed(range(len(a) - 1)):
+        gates += last(a[j], b[j + 1], a[j + 1])
+    gates += last(cin, b[0], a[0])
+    for name, qubits in gates:
+        g.add(name, qubits)
+
+
+# Replicate hamming_weight_compute.get_circuit_for_qubits_weight (and its
+# inverse)
+def _weight(g, a_qs, cin, cout_qs, patterns_dict, inverse=False):
+    qubits = list(a_qs) + list(cout_qs)
+    adders = patterns_dict['adders_pattern']
+    for pattern in (adders[::-1] if inverse else adders):
+        half_bits = (len(pattern) - 1) // 2
+        inputs = [qubits[j] for j in pattern]
+        _adder(g, cin, inputs[:half_bits], inputs[half_bits:2 * half_bits],
+               inputs[-1], inverse)
+    return [qubits[j] for j in patterns_dict['results']]
+
+
+def _complement_of_weight(g, weight, result_qubits):
+    equal_str = binary.get_bitstring_from_int(weight, len(result_qubits))
+    bits = len(equal_str)
+    for i in range(bits):
+        if equal_str[i] == '0':
+            g.add('x', [result_qubits[bits - i - 1]])
+
+
+# Replicate hamming_weight_compute.get_circuit_for_qubits_weight_check (and
+# its inverse)
+def _weight_check(g, a_qs, cin, cout_qs, eq, weight, patterns_dict, mode):
+    result_qubits = _weight(g, a_qs, cin, cout_qs, patterns_dict)
+    _complement_of_weight(g, weight, result_qubits)
+    g.mct(result_qubits, eq, mode)
+
+
+def _weight_check_i(g, a_qs, cin, cout_qs, eq, weight, patterns_dict, mode):
+    qubits = list(a_qs) + list(cout_qs)
+    result_qubits = [qubits[j] for j in patterns_dict['results']]
+    g.mct(result_qubits, eq, mode)
+    _complement_of_weight(g, weight, result_qubits)
+    _weight(g, a_qs, cin, cout_qs, patterns_dict, inverse=True)
+
+
+def _prepare_input(g, nwr_mode, selectors, flips, benes_dict, inverse=False):
+    if nwr_mode == ISDAbstractCircuit.NWR_FPC:
+        for q in selectors:
+            g.add('h', [q])
+        return
+    gates = []
+    for i in range(benes_dict['to_negate_range']):
+        gates.append(('x', [selectors[i]]))
+    for flip, a, b in benes_dict['swaps_pattern']:
+        gates.append(('cswap', [flips[flip], selectors[a], selectors[b]]))
+    if benes_dict['negated_permutation']:
+        gates += [('x', [q]) for q in selectors]
+    if inverse:
+        gates = gates[::-1] + [('h', [q]) for q in flips]
+    else:
+        gates = [('h', [q]) for q in flips] + gates
+    for name, qubits in gates:
+        g.add(name, qubits)
+
+
+def _diffusion(g, qubits):
+    for q in qubits:
+        g.add('x', [q])
+    g.add('h', [qubits[0]])
+    g.mct(qubits[1:], qubits[0])
+    g.add('h', [qubits[0]])
+    for q in qubits:
+        g.add('x', [q])
+
+
+def _matrix2gates(g, matrix, selectors, sum_q, inverse=False):
+    bits = matrix.shape[0]
+    columns = range(matrix.shape[1])
+    for i in (reversed(columns) if inverse else columns):
+        for j in reversed(range(bits)):
+            if matrix[j, i] == 1:
+                g.mct([selectors[i]], sum_q[bits - j - 1])
+
+
+def _syndrome2gates(g, to_negate, sum_q, r):
+    """
+    :param to_negate: the bits of the syndrome (or of its complement) to be
+    set w/ an x, or None if the syndrome is parametric
+    """
+    bits = r if to_negate is None else len(to_negate)
+    for i in reversed(range(bits)):
+        if to_negate is None:
+            g.add('rx', [sum_q[bits - i - 1]])
+        elif to_negate[i] == 1:
+            g.add('x', [sum_q[bits - i - 1]])
+
+
+def _estimate(layout, prepare, oracle, diffusion, n_func_domain,
+              need_measures, to_measure):
+    rounds = get_grover_rounds(n_func_domain)
+    n_clbits = len(to_measure) if need_measures else 0
+    levels = [0] * (layout.n_qubits + n_clbits)
+    _apply(levels, prepare)
+    round_gates = oracle + diffusion
+    for _ in range(rounds):
+        _apply(levels, round_gates)
+    counts = _count(prepare)
+    for name, count in _count(round_gates).items():
+        counts[name] += count * rounds
+    if need_measures:
+        measures = [('measure', (q, layout.n_qubits + i), None)
+                    for i, q in enumerate(to_measure)]
+        _apply(levels, measures)
+        counts['measure'] += len(to_measure)
+    estimate = {
+        'n_qubits': layout.n_qubits,
+        'n_clbits': n_clbits,
+        # As QuantumCircuit.width
+        'width': layout.n_qubits + n_clbits,
+        'rounds': rounds,
+        'counts': dict(counts),
+        'depth': max(levels) if len(levels) > 0 else 0
+    }
+    logger.debug("Estimate is {}".format(estimate))
+    return estimate
+
+
+def _mct_anc(layout, mct_mode, qubits_involved_in_multicontrols):
+    if mct_mode == ISDAbstractCircuit.MCT_ADVANCED:
+        return layout.add(1)
+    elif mct_mode == ISDAbstractCircuit.MCT_BASIC:
+        return layout.add(max(qubits_involved_in_multicontrols) - 2)
+    return None
+
+
+def estimate_bruteforce(n,
+                        r,
+                        w,
+                        mct_mode,
+                        nwr_mode,
+                        need_measures=True,
+                        h=None,
+                        syndrome=None):
+    """
+    Estimate the resources of BruteforceISDCircuit.
+
+    :param h: the parity matrix; if None, all its elements are supposed to be
+    1, which gives an upper bound
+    :param syndrome: if None, the syndrome is supposed to be parametric
+    :returns: a dictionary w/ n_qubits, n_clbits, width, rounds, counts (the
+    number of gates per type) and depth
+    """
+    layout = _Layout()
+    involved = []
+    if nwr_mode == ISDAbstractCircuit.NWR_BENES:
+        benes_dict = hwg.generate_qubits_with_given_weight_benes_get_pattern(
+            n, w)
+        selectors = layout.add(benes_dict['n_lines'])
+        flips = layout.add(benes_dict['n_flips'])
+        n_func_domain = len(flips) + w
+        inversion_qubits = flips
+    else:
+        benes_dict = None
+        fpc_dict = hwc.get_circuit_for_qubits_weight_get_pattern(n)
+        fpc_cin = layout.add(1)[0]
+        selectors = layout.add(n)
+        fpc_couts = layout.add(fpc_dict['n_couts'])
+        fpc_eq = layout.add(1)[0]
+        layout.add(1)
+        flips = None
+        n_func_domain = 2**len(selectors)
+        inversion_qubits = selectors
+        involved.append(len(fpc_dict['results']))
+    involved.append(len(inversion_qubits[1:]))
+    sum_q = layout.add(r)
+    g = _Gates(mct_mode, _mct_anc(layout, mct_mode, involved))
+
+    _prepare_input(g, nwr_mode, selectors, flips, benes_dict)
+    prepare = g.gates
+
+    g.gates = []
+    matrix = np.ones((r, n), dtype=int) if h is None else np.asarray(h)
+    to_negate = None if syndrome is None else binary.get_negated_bitarray(
+        syndrome.tolist())
+    _matrix2gates(g, matrix, selectors, sum_q)
+    _syndrome2gates(g, to_negate, sum_q, r)
+    if nwr_mode == ISDAbstractCircuit.NWR_BENES:
+        controls = sum_q[1:]
+    else:
+        # The weight check of the selectors is always in advanced mode
+        _weight_check(g, selectors, fpc_cin, fpc_couts, fpc_eq, w, fpc_dict,
+                      ISDAbstractCircuit.MCT_ADVANCED)
+        controls = [fpc_eq] + sum_q[1:]
+    g.add('h', [sum_q[0]])
+    g.mct(controls, sum_q[0])
+    g.add('h', [sum_q[0]])
+    if nwr_mode == ISDAbstractCircuit.NWR_FPC:
+        _weight_check_i(g, selectors, fpc_cin, fpc_couts, fpc_eq, w,
+                        fpc_dict, ISDAbstractCircuit.MCT_ADVANCED)
+    _syndrome2gates(g, to_negate, sum_q, r)
+    _matrix2gates(g, matrix, selectors, sum_q, inverse=True)
+    oracle = g.gates
+
+    g.gates = []
+    _prepare_input(g, nwr_mode, selectors, flips, benes_dict, inverse=True)
+    _diffusion(g, inversion_qubits)
+    _prepare_input(g, nwr_mode, selectors, flips, benes_dict)
+    diffusion = g.gates
+
+    return _estimate(layout, prepare, oracle, diffusion, n_func_domain,
+                     need_measures, selectors)
+
+
+def estimate_lee_brickell(k,
+                          r,
+                          w,
+                          p,
+                          mct_mode,
+                          nwr_mode,
+                          need_measures=True,
+                          v=None,
+                          syndrome=None):
+    """
+    Estimate the resources of LeeBrickellCircuit.
+
+    :param v: the V matrix; if None, all its elements are supposed to be 1,
+    which gives an upper bound
+    :param syndrome: if None, the syndrome is supposed to be parametric
+    :returns: see estimate_bruteforce
+    """
+    layout = _Layout()
+    involved = []
+    if nwr_mode == ISDAbstractCircuit.NWR_BENES:
+        benes_dict = hwg.generate_qubits_with_given_weight_benes_get_pattern(
+            k, p)
+        selectors = layout.add(benes_dict['n_lines'])
+        flips = layout.add(benes_dict['n_flips'])
+        n_func_domain = len(flips) + p
+        inversion_qubits = flips
+    else:
+        benes_dict = None
+        fpc_dict = hwc.get_circuit_for_qubits_weight_get_pattern(k)
+        fpc_cin = layout.add(1)[0]
+        selectors = layout.add(k)
+        fpc_couts = layout.add(fpc_dict['n_couts'])
+        fpc_eq = layout.add(1)[0]
+        fpc_two_eq = layout.add(1)[0]
+        flips = None
+        n_func_domain = 2**len(selectors)
+        inversion_qubits = selectors
+        involved.append(len(fpc_dict['results']))
+    involved.append(len(inversion_qubits[1:]))
+    lee_fpc_dict = hwc.get_circuit_for_qubits_weight_get_pattern(r)
+    sum_q = layout.add(lee_fpc_dict['n_lines'])
+    lee_cin = layout.add(1)[0]
+    lee_couts = layout.add(lee_fpc_dict['n_couts'])
+    lee_eq = layout.add(1)[0]
+    involved.append(len(lee_fpc_dict['results']))
+    g = _Gates(mct_mode, _mct_anc(layout, mct_mode, involved))
+
+    _prepare_input(g, nwr_mode, selectors, flips, benes_dict)
+    prepare = g.gates
+
+    g.gates = []
+    matrix = np.ones((r, k), dtype=int) if v is None else np.asarray(v)
+    to_negate = None if syndrome is None else syndrome.tolist()
+    _matrix2gates(g, matrix, selectors, sum_q)
+    _syndrome2gates(g, to_negate, sum_q, r)
+    if nwr_mode == ISDAbstractCircuit.NWR_FPC:
+        _weight_check(g, selectors, fpc_cin, fpc_couts, fpc_eq, p, fpc_dict,
+                      mct_mode)
+    _weight_check(g, sum_q, lee_cin, lee_couts, lee_eq, w - p, lee_fpc_dict,
+                  mct_mode)
+    if nwr_mode == ISDAbstractCircuit.NWR_BENES:
+        g.add('z', [lee_eq])
+    else:
+        g.add('ccx', [fpc_eq, lee_eq, fpc_two_eq])
+        g.add('z', [fpc_two_eq])
+        g.add('ccx', [fpc_eq, lee_eq, fpc_two_eq])
+    _weight_check_i(g, sum_q, lee_cin, lee_couts, lee_eq, w - p,
+                    lee_fpc_dict, mct_mode)
+    if nwr_mode == ISDAbstractCircuit.NWR_FPC:
+        _weight_check_i(g, selectors, fpc_cin, fpc_couts, fpc_eq, p,
+                        fpc_dict, mct_mode)
+    _syndrome2gates(g, to_negate, sum_q, r)
+    _matrix2gates(g, matrix, selectors, sum_q, inverse=True)
+    oracle = g.gates
+
+    g.gates = []
+    _prepare_input(g, nwr_mode, selectors, flips, benes_dict, inverse=True)
+    _diffusion(g, inversion_qubits)
+    _prepare_input(g, nwr_mode, selectors, flips, benes_dict)
+    diffusion = g.gates
+
+    return _estimate(layout, prepare, oracle, diffusion, n_func_domain,
+                     need_measures, selectors)
@@ -0,0 +1,187 @@
+import logging
+import numpy as np
+from math import asin, sin, sqrt
+
+logger = logging.getLogger(__name__)
+
+# Classical evaluation of the oracles of the ISD circuits.
+# A pattern of selectors is represented as an unsigned 64 bit integer mask,
+# in which bit i is set iff the i-th selector (i.e. the i-th column of the
+# matrix) is set. Hence, at most 64 selectors are supported.
+MAX_LINES = 64
+
+
+def get_masks_with_weight(n, weight):
+    """
+    Return all the masks of n bits with the given Hamming weight, i.e. all
+    the (n choose weight) patterns of selectors, in increasing order.
+    """
+    assert n <= MAX_LINES, "At most {} bits are supported".format(MAX_LINES)
+    assert 0 <= weight <= n, "Weight must be between 0 and n"
+    bits = np.left_shift(np.uint64(1), np.arange(n, dtype=np.uint64))
+    masks = np.zeros(1, dtype=np.uint64)
+    for _ in range(weight):
+        # Add to each mask a bit higher than its most significant one
+        candidates = masks[:, None] | bits[None, :]
+        masks = candidates[bits[None, :] > masks[:, None]]
+    return np.sort(masks)
+
+
+def get_masks_weight(masks):
+    return np.unpackbits(
+        masks.astype('<u8').view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def pack_columns(matrix):
+    """
+    Pack the columns of a binary matrix, s.t. row i of the result contains the
+    bits of the i-th column.
+    """
+    return np.packbits(np.asarray(matrix, dtype=np.uint8).T, axis=1)
+
+
+def pack_vector(vector):
+    return np.packbits(np.asarray(vector, dtype=np.uint8))
+
+
+def get_columns_sum(matrix, masks):
+    """
+    For each mask, compute the sum (mod 2) of the columns of the matrix
+    selected by the mask.
+
+    :returns: a matrix of packed bits, one row per mask
+    """
+    packed_columns = pack_columns(matrix)
+    assert packed_columns.shape[0] <= MAX_LINES, "Too many columns"
+    sums = np.zeros((len(masks), packed_columns.shape[1]), dtype=np.uint8)
+    for i in range(packed_columns.shape[0]):
+        selected = ((masks >> np.uint64(i)) & np.uint64(1)).astype(bool)
+        sums[selected] ^= packed_columns[i]
+    return sums
+
+
+def bruteforce_check(h, syndrome, masks):
+    """
+    The predicate of the bruteforce oracle: for each mask, True iff the sum
+    of the selected columns of h is equal to the syndrome.
+    """
+    sums = get_columns_sum(h, masks)
+    return np.all(sums == pack_vector(syndrome), axis=1)
+
+
+def lee_brickell_check(v, syndrome, w, p, masks):
+    """
+    The predicate of the Lee-Brickell oracle: for each mask, True iff the sum
+    of the selected columns of v and of the syndrome has weight w - p.
+    """
+    sums = get_columns_sum(v, masks) ^ pack_vector(syndrome)
+    return np.unpackbits(sums, axis=1).sum(axis=1) == w - p
+
+
+def benes_pattern_distribution(benes_dict):
+    """
+    Compute the distribution of the patterns of selectors obtained by the
+    Benes network (see hamming_weight_generate) when all the flips are in
+    uniform superposition.
+
+    :returns: the masks of the obtained patterns and their probabilities
+    """
+    n_lines = benes_dict['n_lines']
+    assert n_lines <= MAX_LINES, "At most {} lines are supported".format(
+        MAX_LINES)
+    masks = np.array([(1 << benes_dict['to_negate_range']) - 1],
+                     dtype=np.uint64)
+    probs = np.ones(1)
+    for _, a, b in benes_dict['swaps_pattern']:
+        a = np.uint64(a)
+        b = np.uint64(b)
+        # Swap bits a and b
+        diff = ((masks >> a) ^ (masks >> b)) & np.uint64(1)
+        swapped = masks ^ ((diff << a) | (diff << b))
+        masks, inverse = np.unique(
+            np.concatenate((masks, swapped)), return_inverse=True)
+        probs = np.bincount(
+            inverse.ravel(),
+            weights=np.concatenate((probs, probs)) / 2,
+            minlength=len(masks))
+    if benes_dict['negated_permutation']:
+        masks = masks ^ np.uint64((1 << n_lines) - 1)
+    return masks, probs
+
+
+def grover_success_probability(marked_prob, rounds):
+    """
+    Probability of measuring a marked state after the given number of Grover
+    rounds, if marked_prob is the probability of a marked state in the
+    initial superposition.
+    """
+    if marked_prob == 0:
+        return 0.
+    theta = asin(sqrt(marked_prob))
+    return sin((2 * rounds + 1) * theta)**2
+
+
+def get_selectors_distribution(isd_circ, weight):
+    """
+    Return the masks of the patterns of selectors prepared by the circuit
+    which have the given weight, their probabilities in the initial
+    superposition, and the number of selectors.
+    """
+    if isd_circ.nwr_mode == isd_circ.NWR_BENES:
+        masks, probs = benes_pattern_distribution(isd_circ.benes_dict)
+        return masks, probs, isd_circ.benes_dict['n_lines']
+    n_lines = len(isd_circ.selectors_q)
+    masks = get_masks_with_weight(n_lines, weight)
+    return masks, np.full(len(masks), 2.**-n_lines), n_lines
+
+
+def get_oracle_distribution(isd_circ, syndrome=None):
+    """
+    Classically evaluate the oracle of a BruteforceISDCircuit or
+    LeeBrickellCircuit (no need to build it) over its selector patterns.
+
+    :param isd_circ: the ISD circuit
+    :param syndrome: the syndrome, if the one of the circuit is parametric
+    :returns: the masks of the candidate patterns, their probabilities in the
+    initial superposition, which of them are marked by the oracle, and the
+    number of selectors
+    """
+    if syndrome is None:
+        syndrome = isd_circ.syndrome
+    if hasattr(isd_circ, 'v'):
+        masks, probs, n_lines = get_selectors_distribution(
+            isd_circ, isd_circ.p)
+        marked = lee_brickell_check(isd_circ.v, syndrome, isd_circ.w,
+                                    isd_circ.p, masks)
+    else:
+        masks, probs, n_lines = get_selectors_distribution(
+            isd_circ, isd_circ.w)
+        marked = bruteforce_check(isd_circ.h, syndrome, masks)
+    logger.debug("{} marked patterns over {}".format(
+        np.count_nonzero(marked), len(masks)))
+    return masks, probs, marked, n_lines
+
+
+def evaluate_circuit(isd_circ, syndrome=None):
+    """
+    Classically evaluate the oracle of a BruteforceISDCircuit or
+    LeeBrickellCircuit (no need to build it) over all its selector patterns.
+
+    :param isd_circ: the ISD circuit
+    :param syndrome: the syndrome, if the one of the circuit is parametric
+    :returns: a dictionary containing
+    - marked, the masks of the patterns marked by the oracle
+    - marked_prob, the probability of a marked pattern in the initial
+      superposition
+    - rounds, the number of Grover rounds of the circuit
+    - success_prob, the ideal probability of measuring a marked pattern
+    """
+    masks, probs, marked, _ = get_oracle_distribution(isd_circ, syndrome)
+    rounds = isd_circ.get_grover_rounds()
+    marked_prob = probs[marked].sum()
+    return {
+        'marked': masks[marked],
+        'marked_prob': marked_prob,
+        'rounds': rounds,
+        'success_prob': grover_success_probability(marked_prob, rounds)
+    }
@@ -0,0 +1,77 @@
+import heapq
+import logging
+import numpy as np
+from operator import itemgetter
+from isdquantum.utils import classical_oracle
+
+logger = logging.getLogger(__name__)
+
+# Decoding of the counts returned by the backends.
+# The measured states are the ones of the selectors register, w/ selector 0
+# on the rightmost character of the state. Each state is converted to a
+# mask in which bit i is set iff selector i is set (see classical_oracle).
+
+# Default number of most frequent states checked classically
+DEFAULT_TOP_K = 8
+
+
+def get_top_counts(counts, k=DEFAULT_TOP_K):
+    """
+    Return the k most frequent states (all of them if k is None), in
+    decreasing order of occurrences, and their occurrences.
+    """
+    if k is None:
+        items = sorted(counts.items(), key=itemgetter(1), reverse=True)
+    else:
+        items = heapq.nlargest(k, counts.items(), key=itemgetter(1))
+    states = [state for state, _ in items]
+    occurrences = np.array([occ for _, occ in items], dtype=np.int64)
+    return states, occurrences
+
+
+def states_to_masks(states):
+    # Spaces separate different classical registers; only one is expected
+    return np.array([int(state.replace(' ', ''), 2) for state in states],
+                    dtype=np.uint64)
+
+
+def masks_to_bitarrays(masks, n):
+    """
+    :returns: a matrix w/ a row for each mask, in which element i is 1 iff
+    bit i of the mask is set
+    """
+    masks = np.asarray(masks, dtype=np.uint64)
+    return ((masks[:, None] >> np.arange(n, dtype=np.uint64)) & np.uint64(1)
+            ).astype(int)
+
+
+def mask_to_positions(mask, n):
+    return [i for i in range(n) if (int(mask) >> i) & 1]
+
+
+def bruteforce_valid(h, syndrome, w, masks):
+    """
+    For each mask, True iff the selected columns of h are w and their sum is
+    equal to the syndrome, i.e. iff the mask is a valid error vector.
+    """
+    return (classical_oracle.get_masks_weight(masks) == w
+            ) & classical_oracle.bruteforce_check(h, syndrome, masks)
+
+
+def lee_brickell_valid(v, syndrome, w, p, masks):
+    """
+    For each mask, True iff p columns of v are selected and their sum added
+    to the syndrome has weight w - p.
+    """
+    return (classical_oracle.get_masks_weight(masks) == p
+            ) & classical_oracle.lee_brickell_check(v, syndrome, w, p, masks)
+
+
+def get_first_valid(valid):
+    """
+    :returns: the index of the first True element of valid, or None
+    """
+    valid_idxs = np.flatnonzero(valid)
+    if len(valid_idxs) == 0:
+        return None
+    return int(valid_idxs[0])
@@ -0,0 +1,121 @@
+import logging
+import numpy as np
+from math import asin, cos, sin, sqrt
+from time import time
+from isdquantum.utils import classical_oracle
+
+logger = logging.getLogger(__name__)
+
+# Ideal simulation of the ISD circuits.
+# The oracles of the ISD circuits flip the phase of the selector patterns
+# satisfying a classical predicate, and the input preparation A (the Benes
+# network or the Hadamards on the selectors) is uncomputed before the
+# diffusion. Hence, after each round, the state stays in the plane spanned
+# by the marked and the unmarked components of A|0>, and all the ancillas
+# (sum, carries, multicontrol ancillas) are back to zero. After k rounds,
+# a marked pattern x is measured w/ probability q(x) sin^2((2k+1)t) / a and
+# an unmarked one w/ probability q(x) cos^2((2k+1)t) / (1 - a), where q(x)
+# is the probability of x in A|0>, a the total probability of the marked
+# patterns in A|0> and sin^2(t) = a.
+
+
+def get_final_probabilities(probs, marked, rounds):
+    """
+    :param probs: the probabilities of the patterns in the initial
+    superposition
+    :param marked: a boolean array, True for the patterns marked by the oracle
+    :param rounds: the number of Grover rounds
+    :returns: the probabilities of the patterns after the Grover rounds, and
+    the total probability of the patterns not included in probs
+    """
+    marked_prob = probs[marked].sum()
+    final_probs = np.array(probs, dtype=float)
+    if marked_prob == 0:
+        return final_probs, max(1 - final_probs.sum(), 0.)
+    theta = asin(sqrt(min(marked_prob, 1.)))
+    final_probs[marked] *= sin((2 * rounds + 1) * theta)**2 / marked_prob
+    if marked_prob < 1:
+        unmarked_scale = cos((2 * rounds + 1) * theta)**2 / (1 - marked_prob)
+        final_probs[~marked] *= unmarked_scale
+        rest_prob = (1 - probs.sum()) * unmarked_scale
+    else:
+        final_probs[~marked] = 0
+        rest_prob = 0.
+    return final_probs, max(rest_prob, 0.)
+
+
+def sample_counts(masks, final_probs, rest_prob, n_lines, shots, rng):
+    """
+    Sample the measures of the selectors register, returning a dictionary
+    of counts in the same format of qiskit, i.e. w/ selector 0 as the
+    rightmost bit of the key.
+
+    The rest_prob probability is spread uniformly among the patterns of
+    n_lines bits not in masks.
+    """
+    buckets = np.append(final_probs, rest_prob)
+    buckets /= buckets.sum()
+    occurrences = rng.multinomial(shots, buckets)
+    counts = {}
+    state_format = '{{:0{}b}}'.format(n_lines)
+    for i in np.flatnonzero(occurrences[:-1]):
+        counts[state_format.format(int(masks[i]))] = int(occurrences[i])
+    to_sample = int(occurrences[-1])
+    while to_sample > 0:
+        samples = np.frombuffer(
+            rng.bytes(8 * to_sample), dtype=np.uint64).copy()
+        if n_lines < 64:
+            samples &= np.uint64((1 << n_lines) - 1)
+        samples = samples[~np.isin(samples, masks)]
+        for sample in samples:
+            state = state_format.format(int(sample))
+            counts[state] = counts.get(state, 0) + 1
+        to_sample -= len(samples)
+    return counts
+
+
+class IdealGroverResult():
+    def __init__(self, counts, backend_name, time_taken):
+        self._counts = counts
+        self.backend_name = backend_name
+        self.time_taken = time_taken
+
+    def get_counts(self, experiment=None):
+        return self._counts
+
+
+class IdealGroverSimulator():
+    """
+    Backend-like simulator of BruteforceISDCircuit and LeeBrickellCircuit
+    instances. The circuit doesn't need to be built, since only the
+    patterns of the selectors register are simulated, w/ the predicate of the
+    oracle evaluated classically (see classical_oracle).
+    """
+
+    def __init__(self, seed=None):
+        self._rng = np.random.RandomState(seed)
+
+    def name(self):
+        return 'ideal_grover_simulator'
+
+    def get_probabilities(self, isd_circ, syndrome=None):
+        """
+        :returns: the masks of the candidate selector patterns, their
+        probabilities after the Grover rounds of the circuit, the total
+        probability of the other patterns, and the number of selectors
+        """
+        masks, probs, marked, n_lines = classical_oracle.get_oracle_distribution(
+            isd_circ, syndrome)
+        final_probs, rest_prob = get_final_probabilities(
+            probs, marked, isd_circ.get_grover_rounds())
+        return masks, final_probs, rest_prob, n_lines
+
+    def run(self, isd_circ, shots=8192, syndrome=None):
+        start = time()
+        masks, final_probs, rest_prob, n_lines = self.get_probabilities(
+            isd_circ, syndrome)
+        counts = sample_counts(masks, final_probs, rest_prob, n_lines, shots,
+                               self._rng)
+        time_taken = time() - start
+        logger.debug("Simulation took {}".format(time_taken))
+        return IdealGroverResult(counts, self.name(), time_taken)
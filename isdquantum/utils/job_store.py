@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import numpy as np
+from time import time
+from isdquantum.utils import misc
+
+logger = logging.getLogger(__name__)
+
+# Persistent store of the jobs submitted to a backend which can't execute
+# them any time soon (see misc.run). Each job is saved in the directory of
+# the store as a JSON file named after its id, containing the name of the
+# backend, the shots, the register layout of the circuit and the metadata
+# needed to decode its result (f.e. h, syndrome, w and p), so that the job
+# can be retrieved and decoded later on, even by another process.
+
+
+def _to_json(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError("Can't serialize {0}".format(type(obj)))
+
+
+def get_register_layout(qc):
+    """
+    :returns: the names and sizes of the quantum and classical registers of
+    the circuit, in order
+    """
+    return {
+        'qregs': [[qr.name, len(qr)] for qr in qc.qregs],
+        'cregs': [[cr.name, len(cr)] for cr in qc.cregs]
+    }
+
+
+class JobStore():
+    """
+    :param directory: the directory of the JSON files, created if it doesn't
+    exist
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _get_path(self, job_id):
+        return os.path.join(self.directory, "{0}.json".format(job_id))
+
+    def save(self, job, backend, shots, metadata=None):
+        """
+        :param metadata: a dictionary w/ what is needed to decode the result,
+        numpy arrays are stored as lists
+        :returns: the stored record
+        """
+        record = {
+            'job_id': job.job_id(),
+            'backend': backend.name(),
+            'shots': shots,
+            'time': time(),
+            'metadata': metadata if metadata is not None else {}
+        }
+        path = self._get_path(record['job_id'])
+        # Write and rename, so that a record is never read half written
+        with open(path + '.tmp', 'w') as f:
+            json.dump(record, f, default=_to_json, indent=1, sort_keys=True)
+        os.replace(path + '.tmp', path)
+        logger.info("Job {0} stored in {1}".format(record['job_id'], path))
+        return record
+
+    def load(self, job_id):
+        with open(self._get_path(job_id)) as f:
+            return json.load(f)
+
+    def job_ids(self):
+        """
+        :returns: the ids of the stored jobs, from the oldest one
+        """
+        records = [
+            self.load(f[:-len('.json')]) for f in os.listdir(self.directory)
+            if f.endswith('.json')
+        ]
+        records.sort(key=lambda record: (record['time'], record['job_id']))
+        return [record['job_id'] for record in records]
+
+    def remove(self, job_id):
+        os.remove(self._get_path(job_id))
+        logger.debug("Job {0} removed".format(job_id))
+
+    def get_result(self, job_id, provider_name, wait=False):
+        """
+        Retrieve a stored job from its backend.
+
+        :param wait: if False, don't block on a job not done yet
+        :returns: the stored record and the result of the job, None if the
+        job isn't done yet
+        """
+        record = self.load(job_id)
+        backend = misc.get_backend(provider_name, record['backend'], 0)
+        job = backend.retrieve_job(job_id)
+        if not wait:
+            from qiskit.providers import JobStatus
+            status = job.status()
+            if status in (JobStatus.CANCELLED, JobStatus.ERROR):
+                raise Exception("Job {0} ended w/ status {1}".format(
+                    job_id, status))
+            if status != JobStatus.DONE:
+                logger.info("Job {0} is not done yet ({1})".format(
+                    job_id, status))
+                return record, None
+        return record, job.result()
@@ -1,94 +1,405 @@
 import logging
 import numpy as np
-from math import isclose
+from math import sqrt
+from isdquantum.utils import decoding
+from isdquantum.utils import transpile_cache
 logger = logging.getLogger(__name__)
 
 # TODO rename misc to qiskit_utils
 
 
-def from_statevector_to_prob_and_phase(statevector, qc):
+# States w/ probability not greater than this are discarded
+PROB_TOLERANCE = 1e-5
+# Number of amplitudes processed at a time when streaming a statevector
+STATEVECTOR_CHUNK_SIZE = 2**20
+
+# The statevector utilities accept, as statevector:
+# - a list or an array (f.e. the one returned by qiskit), processed in memory
+# - the path of a .npy file, memory-mapped and streamed in chunks
+# - a memory-mapped array, streamed in chunks
+# - an iterable of consecutive chunks of the statevector
+
+
+def _is_in_memory(statevector):
+    return isinstance(statevector, list) or (isinstance(
+        statevector, np.ndarray) and not isinstance(statevector, np.memmap))
+
+
+def iter_statevector_chunks(statevector, chunk_size=None):
+    """
+    Iterate over the statevector in chunks of at most chunk_size amplitudes
+    (STATEVECTOR_CHUNK_SIZE if None).
+
+    :returns: a generator of tuples containing the index of the first
+    amplitude of the chunk and the chunk itself
+    """
+    if chunk_size is None:
+        chunk_size = STATEVECTOR_CHUNK_SIZE
+    if isinstance(statevector, str):
+        statevector = np.load(statevector, mmap_mode='r')
+    if isinstance(statevector, (list, np.ndarray)):
+        for offset in range(0, len(statevector), chunk_size):
+            yield offset, np.asarray(statevector[offset:offset + chunk_size])
+    else:
+        offset = 0
+        for chunk in statevector:
+            chunk = np.asarray(chunk)
+            yield offset, chunk
+            offset += len(chunk)
+
+
+def _get_probs(chunk):
+    return chunk.real**2 + chunk.imag**2
+
+
+def _get_significant_states(statevector):
+    states = []
+    probs = []
+    phases = []
+    for offset, chunk in iter_statevector_chunks(statevector):
+        chunk_probs = _get_probs(chunk)
+        significant = np.flatnonzero(chunk_probs > PROB_TOLERANCE)
+        states.append(significant + offset)
+        probs.append(chunk_probs[significant])
+        phases.append(np.angle(chunk[significant], deg=True))
+    if not states:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    return np.concatenate(states), np.concatenate(probs), np.concatenate(
+        phases)
+
+
+# Returns, for each quantum register of the circuit, the integer values of
+# the register in the given states. As in qiskit, the first register is the
+# one on the least significant bits.
+def _get_qregs_values(states, qc):
+    qregs_values = []
+    offset = 0
+    for qr in qc.qregs:
+        qregs_values.append((qr, (states >> offset) & ((1 << len(qr)) - 1)))
+        offset += len(qr)
+    return qregs_values
+
+
+def _to_structured_array(states, probs, phases, qregs_values=()):
+    dtype = [('state', np.int64), ('prob', np.float64),
+             ('phase', np.float64)]
+    dtype += [(qr.name, np.int64) for qr, _ in qregs_values]
+    results = np.empty(len(states), dtype=dtype)
+    results['state'] = states
+    results['prob'] = probs
+    results['phase'] = phases
+    for qr, values in qregs_values:
+        results[qr.name] = values
+    return results
+
+
+# If as_array is True, returns a structured array w/ fields state, prob and
+# phase, one row per state w/ non negligible probability
+def from_statevector_to_prob_and_phase(statevector, qc, as_array=False):
+    states, probs, phases = _get_significant_states(statevector)
+    if as_array:
+        return _to_structured_array(states, probs, phases)
     results = {}
-    for i, v in enumerate(statevector):
-        prob = np.linalg.norm(v)**2
-        if isclose(prob, 0, abs_tol=1e-5):
-            continue
-        state = bin(i)[2:].zfill(qc.width())
-        phase = np.angle(v, deg=True)
-        phase_str = "{:3.4f}".format(phase)
-        prob_str = "{:.4f}".format(prob)
-        results[state] = {'phase': phase_str, 'prob': prob_str}
+    state_format = "{{:0{}b}}".format(qc.width())
+    for state, prob, phase in zip(states.tolist(), probs, phases):
+        results[state_format.format(state)] = {
+            'phase': "{:3.4f}".format(phase),
+            'prob': "{:.4f}".format(prob)
+        }
     return results
 
 
-def from_statevector_to_prob_and_phase_detailed(statevector, qc):
+# If as_array is True, returns a structured array w/ fields state, prob,
+# phase and one field for each quantum register of the circuit, containing
+# its integer value
+def from_statevector_to_prob_and_phase_detailed(statevector, qc,
+                                                as_array=False):
+    states, probs, phases = _get_significant_states(statevector)
+    qregs_values = _get_qregs_values(states, qc)
+    if as_array:
+        return _to_structured_array(states, probs, phases, qregs_values)
     results = {}
-    for i, v in enumerate(statevector):
-        qregs_states = {}
-        prob = np.linalg.norm(v)**2
-        if isclose(prob, 0, abs_tol=1e-5):
-            continue
-        state = bin(i)[2:].zfill(qc.width())
-        prev_l = 0
-        for qr in reversed(qc.qregs):
-            l = len(qr)
-            st = state[prev_l:prev_l + l]
-            qregs_states[qr.name] = st
-            prev_l += l
-
-        phase = np.angle(v, deg=True)
-        prob_str = "{:.4f}".format(prob)
-        phase_str = "{:3.4f}".format(phase)
-        results[state] = {
-            'phase': phase_str,
-            'prob': prob_str,
-            'detailed': qregs_states
+    state_format = "{{:0{}b}}".format(qc.width())
+    qregs_formats = [(qr.name, "{{:0{}b}}".format(len(qr)), values.tolist())
+                     for qr, values in qregs_values]
+    for i, (state, prob, phase) in enumerate(
+            zip(states.tolist(), probs, phases)):
+        results[state_format.format(state)] = {
+            'phase': "{:3.4f}".format(phase),
+            'prob': "{:.4f}".format(prob),
+            'detailed': {
+                name: qr_format.format(values[i])
+                for name, qr_format, values in qregs_formats
+            }
         }
     return results
 
 
+def get_qregs_probabilities(statevector, qc, qregs):
+    """
+    Marginal probabilities of one or more quantum registers of the circuit,
+    summing over all the other registers.
+
+    :param statevector: the statevector of the circuit
+    :param qc: the QuantumCircuit
+    :param qregs: a QuantumRegister of qc, or a list of them
+    :returns: the vector of probabilities, indexed by the integer value of
+    the registers (the first register is the one on the least significant
+    bits)
+    """
+    if not isinstance(qregs, (list, tuple)):
+        qregs = [qregs]
+    if not _is_in_memory(statevector):
+        return _get_qregs_probabilities_streamed(statevector, qc, qregs)
+    probs = _get_probs(np.asarray(statevector))
+    # The last register of the circuit is on the first axis
+    probs = probs.reshape([2**len(qr) for qr in reversed(qc.qregs)])
+    n_axes = len(qc.qregs)
+    axes = [n_axes - 1 - qc.qregs.index(qr) for qr in qregs]
+    probs = probs.sum(axis=tuple(a for a in range(n_axes) if a not in axes))
+    kept_axes = sorted(axes)
+    probs = probs.transpose([kept_axes.index(a) for a in reversed(axes)])
+    return probs.reshape(-1)
+
+
+def _get_qregs_probabilities_streamed(statevector, qc, qregs):
+    # Position of the least significant bit of each register in the states
+    qregs_offsets = _get_qregs_offsets(qc)
+    n_values = 2**sum(len(qr) for qr in qregs)
+    marginal = np.zeros(n_values)
+    for offset, chunk in iter_statevector_chunks(statevector):
+        states = np.arange(offset, offset + len(chunk), dtype=np.int64)
+        values = np.zeros(len(chunk), dtype=np.int64)
+        shift = 0
+        for qr in qregs:
+            qr_offset = qregs_offsets[qc.qregs.index(qr)]
+            values |= ((states >> qr_offset) & ((1 << len(qr)) - 1)) << shift
+            shift += len(qr)
+        marginal += np.bincount(
+            values, weights=_get_probs(chunk), minlength=n_values)
+    return marginal
+
+
+def _get_qregs_offsets(qc):
+    offsets = []
+    offset = 0
+    for qr in qc.qregs:
+        offsets.append(offset)
+        offset += len(qr)
+    return offsets
+
+
+def get_top_states(statevector, k):
+    """
+    Return the k states w/ the highest probability, streaming over the
+    statevector so that at most k states (plus a chunk) are kept in memory.
+
+    :returns: the states, in decreasing order of probability, and their
+    probabilities
+    """
+    top_states = np.empty(0, dtype=np.int64)
+    top_probs = np.empty(0)
+    for offset, chunk in iter_statevector_chunks(statevector):
+        chunk_probs = _get_probs(chunk)
+        if len(chunk_probs) > k:
+            best = np.argpartition(chunk_probs, -k)[-k:]
+        else:
+            best = np.arange(len(chunk_probs))
+        top_states = np.concatenate((top_states, best + offset))
+        top_probs = np.concatenate((top_probs, chunk_probs[best]))
+        if len(top_probs) > k:
+            best = np.argpartition(top_probs, -k)[-k:]
+            top_states = top_states[best]
+            top_probs = top_probs[best]
+    order = np.argsort(-top_probs, kind='stable')
+    return top_states[order], top_probs[order]
+
+
+# Process-wide registry of the providers. Each provider is created lazily by
+# its factory the first time it's needed, and the backends are memoized by
+# (provider, backend name), so that following calls don't pay the setup of
+# the provider (f.e. IBMQ.load_accounts) again.
+# A provider is identified by the first of its names, the others are aliases
+# sharing the same instance.
+_provider_names = {}
+_provider_factories = {}
+_providers = {}
+_backends = {}
+
+
+def _forget_provider(provider):
+    _providers.pop(provider, None)
+    for key in [key for key in _backends if key[0] == provider]:
+        del _backends[key]
+
+
+def register_provider(factory, *names):
+    """
+    Register a provider under one or more names, replacing the provider
+    previously registered w/ the same names.
+
+    :param factory: a function w/o arguments returning the provider, i.e. an
+    object w/ a get_backend(backend_name) method (see LocalProvider for a
+    local stand-in)
+    """
+    assert len(names) > 0, "At least a name is required"
+    unregister_provider(*names)
+    provider = names[0]
+    _provider_factories[provider] = factory
+    _forget_provider(provider)
+    for name in names:
+        _provider_names[name] = provider
+
+
+def unregister_provider(*names):
+    """
+    Remove the given names, and the providers left w/o any name w/ their
+    backends.
+    """
+    for name in names:
+        provider = _provider_names.pop(name, None)
+        if provider is not None and provider not in _provider_names.values():
+            del _provider_factories[provider]
+            _forget_provider(provider)
+
+
+def clear_backend_cache():
+    _providers.clear()
+    _backends.clear()
+
+
+def _get_basicaer():
+    from qiskit import BasicAer
+    return BasicAer
+
+
+def _get_aer():
+    from qiskit import Aer
+    return Aer
+
+
+def _get_projectq():
+    from qiskit_addon_projectq import ProjectQProvider
+    return ProjectQProvider()
+
+
+def _get_qcgpu():
+    from qiskit_qcgpu_provider import QCGPUProvider
+    return QCGPUProvider()
+
+
+def _get_jku():
+    from qiskit_addon_jku import JKUProvider
+    return JKUProvider()
+
+
+def _get_ibmq():
+    from qiskit import IBMQ
+    IBMQ.load_accounts()
+    return IBMQ
+
+
+register_provider(_get_basicaer, "basicaer")
+register_provider(_get_aer, "aer")
+register_provider(_get_projectq, "projectqp", "projectqpprovider")
+register_provider(_get_qcgpu, "qcgpu", "qcgpuprovider")
+register_provider(_get_jku, "jku", "jkuprovider")
+register_provider(_get_ibmq, "ibmq")
+
+
+def _get_provider_key(provider_name):
+    if provider_name not in _provider_names:
+        raise Exception("Invalid provider {0}".format(provider_name))
+    return _provider_names[provider_name]
+
+
+def get_provider(provider_name):
+    provider = _get_provider_key(provider_name)
+    if provider not in _providers:
+        logger.debug("Initializing provider {0}".format(provider))
+        _providers[provider] = _provider_factories[provider]()
+    return _providers[provider]
+
+
 def get_backend(provider_name, backend_name, n_qubits):
     # logger.debug("real: {0}, online: {1}, backend_name: {2}".format(
     #     args.real, args.online, args.backend_name))
+    provider = get_provider(provider_name)
 
-    if provider_name == "basicaer":
-        from qiskit import BasicAer
-        provider = BasicAer
-    elif provider_name == "aer":
-        from qiskit import Aer
-        provider = Aer
-    elif provider_name in ("projectqp", "projectqpprovider"):
-        from qiskit_addon_projectq import ProjectQProvider
-        provider = ProjectQProvider()
-    elif provider_name in ("qcgpu", "qcgpuprovider"):
-        from qiskit_qcgpu_provider import QCGPUProvider
-        provider = QCGPUProvider()
-    elif provider_name in ("jku", "jkuprovider"):
-        from qiskit_addon_jku import JKUProvider
-        provider = JKUProvider()
-    elif provider_name in ("ibmq"):
-        from qiskit import IBMQ
-        IBMQ.load_accounts()
-        provider = IBMQ
-    else:
-        raise Exception("Invalid provider {0}".format(provider_name))
-
-    # only for real, online execution
-    if backend_name == 'enough' and provider == 'ibmq':
+    # only for real, online execution. The least busy device changes over
+    # time, so it's not memoized
+    if backend_name == 'enough' and _get_provider_key(provider_name) == 'ibmq':
         from qiskit.providers.ibmq import least_busy
         large_enough_devices = provider.backends(
             filters=lambda x: x.configuration(
             ).n_qubits >= n_qubits and x.configuration().simulator == False)
-        backend = least_busy(large_enough_devices)
-    else:
-        backend = provider.get_backend(backend_name)
-        if backend.configuration().n_qubits < n_qubits:
-            raise Exception(
-                "Backend {0} on provider {1} has only {2} qubits, while {3} are needed."
-                .format(backend.name(), backend.provider(),
-                        backend.configuration().n_qubits, n_qubits))
+        return least_busy(large_enough_devices)
+    key = (_get_provider_key(provider_name), backend_name)
+    if key not in _backends:
+        _backends[key] = provider.get_backend(backend_name)
+    backend = _backends[key]
+    if backend.configuration().n_qubits < n_qubits:
+        raise Exception(
+            "Backend {0} on provider {1} has only {2} qubits, while {3} are needed."
+            .format(backend.name(), backend.provider(),
+                    backend.configuration().n_qubits, n_qubits))
     return backend
 
 
+class LocalBackend():
+    """
+    Minimal stand-in of a qiskit backend, f.e. to test code which only needs
+    to get a backend w/o running anything on it.
+    """
+
+    def __init__(self, name, n_qubits, provider=None):
+        from types import SimpleNamespace
+        self._name = name
+        self._configuration = SimpleNamespace(
+            n_qubits=n_qubits, simulator=True)
+        self._provider = provider
+
+    def name(self):
+        return self._name
+
+    def provider(self):
+        return self._provider
+
+    def configuration(self):
+        return self._configuration
+
+    def status(self):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            operational=True, pending_jobs=0, status_msg='active')
+
+
+class LocalProvider():
+    """
+    Local stand-in of a qiskit provider, to be registered w/
+    register_provider.
+
+    :param backends: the list of the backends of the provider
+    """
+
+    def __init__(self, backends=()):
+        self._backends = {}
+        for backend in backends:
+            backend._provider = self
+            self._backends[backend.name()] = backend
+
+    def get_backend(self, name):
+        if name not in self._backends:
+            raise Exception("Invalid backend {0}".format(name))
+        return self._backends[name]
+
+    def backends(self, filters=None):
+        return [
+            b for b in self._backends.values()
+            if filters is None or filters(b)
+        ]
+
+
 def draw_circuit(qc, img_dir):
     logger.info("Drawing circuit")
     img_file = img_dir + qc.name
@@ -151,10 +462,11 @@ def get_compiled_circuit_infos(qc, backend):
     infos['num_tensor_factors'] = qc.num_tensor_factors()
     # qc_qasm = qc.qasm()
     # infos['n_gates_qasm'] = len(qc_qasm.split("\n")) - 4
-    # from qiskit import compile
-    # qc_compiled = compile(qc, backend=backend)
-    # qc_compiled_qasm = qc_compiled.experiments[0].header.compiled_circuit_qasm
-    # infos['n_gates_compiled'] = len(qc_compiled_qasm.split("\n")) - 4
+    # The compiled circuit is taken from the transpile cache, if any, so that
+    # a following run doesn't transpile it again
+    qc_compiled = get_compiled_circuit(qc, backend)
+    infos['depth_compiled'] = qc_compiled.depth()
+    infos['n_gates_compiled'] = qc_compiled.size()
     return infos
 
 
@@ -189,19 +501,214 @@ def export_circuit_to_qasm(qc, filename):
         f.write(q)
 
 
-def run(qc, backend, shots=8192):
+# Transpile cache used by get_compiled_circuit, None to always transpile.
+# By default, it's a TranspileCache in the directory given by the
+# environment variable ISDQUANTUM_TRANSPILE_CACHE, if set, bounded by
+# ISDQUANTUM_TRANSPILE_CACHE_SIZE bytes
+_transpile_cache = None
+_transpile_cache_initialized = False
+
+
+def set_transpile_cache(cache):
+    """
+    :param cache: a TranspileCache, or None to disable the cache
+    """
+    global _transpile_cache, _transpile_cache_initialized
+    _transpile_cache = cache
+    _transpile_cache_initialized = True
+
+
+def get_transpile_cache():
+    global _transpile_cache, _transpile_cache_initialized
+    if not _transpile_cache_initialized:
+        from os import getenv
+        if getenv('ISDQUANTUM_TRANSPILE_CACHE'):
+            _transpile_cache = transpile_cache.TranspileCache(
+                getenv('ISDQUANTUM_TRANSPILE_CACHE'),
+                int(
+                    getenv('ISDQUANTUM_TRANSPILE_CACHE_SIZE',
+                           transpile_cache.DEFAULT_MAX_SIZE)))
+        _transpile_cache_initialized = True
+    return _transpile_cache
+
+
+# qc can be either a single circuit or a list of circuits, each of them
+# compiled only if not found in the transpile cache
+def get_compiled_circuit(qc, backend, optimization_level=None):
+    if isinstance(qc, list):
+        return [
+            get_compiled_circuit(c, backend, optimization_level) for c in qc
+        ]
+    cache = get_transpile_cache()
+    # The qasm doesn't identify the Parameter objects, which the binds of a
+    # circuit w/ free parameters refer to, so these circuits aren't cached
+    if cache is not None and len(getattr(qc, 'parameters', ())) > 0:
+        logger.debug("Not caching a circuit w/ free parameters")
+        cache = None
+    if cache is not None:
+        key = cache.get_key(qc, backend, optimization_level)
+        compiled = cache.get(key)
+        if compiled is not None:
+            return compiled
+    logger.debug("Transpiling circuit for backend {0}".format(backend))
+    from qiskit import transpile
+    compiled = transpile(qc, backend, optimization_level=optimization_level)
+    if cache is not None:
+        cache.put(key, compiled)
+    return compiled
+
+
+# qc can be either a single circuit or a list of circuits; in the latter
+# case, all of them are submitted as experiments of the same job.
+# Returns None if the backend can't execute the job any time soon; in that
+# case, if job_store is not None, the job is saved there w/ the given
+# metadata, to be retrieved later on (see job_store.JobStore)
+def run(qc, backend, shots=8192, job_store=None, metadata=None):
+    job = submit(qc, backend, shots)
+    return _wait_for_result(job, backend, shots, job_store, metadata)
+
+
+# qc should be already compiled for the backend (see get_compiled_circuit).
+# The circuit is assembled once per element of parameter_binds, and all the
+# experiments are submitted in a single job
+def run_with_parameter_binds(qc,
+                             backend,
+                             parameter_binds,
+                             shots=8192,
+                             job_store=None,
+                             metadata=None):
+    job = submit(qc, backend, shots, parameter_binds)
+    return _wait_for_result(job, backend, shots, job_store, metadata)
+
+
+# Submit the circuit(s) w/o waiting for the result, returning the job.
+# If parameter_binds is not None, it's a list of binds for qc (see
+# run_with_parameter_binds)
+def submit(qc, backend, shots=8192, parameter_binds=None):
+    if parameter_binds is None:
+        logger.info(
+            "Preparing execution with backend {0} from provider {1}".format(
+                backend, backend.provider()))
+        if get_transpile_cache() is not None:
+            # Same as execute, but w/ the circuits compiled through the cache
+            return submit_compiled(
+                get_compiled_circuit(qc, backend), backend, shots)
+        from qiskit import execute
+        logger.debug("Execute")
+        job = execute(qc, backend, shots=shots)
+        logger.debug("Submitted job {0}".format(job.job_id()))
+        return job
     logger.info(
-        "Preparing execution with backend {0} from provider {1}".format(
-            backend, backend.provider()))
-    from qiskit import execute
-    logger.debug("Execute")
-    job = execute(qc, backend, shots=shots)
+        "Preparing execution of {0} binds with backend {1} from provider {2}"
+        .format(len(parameter_binds), backend, backend.provider()))
+    return submit_compiled(qc, backend, shots, parameter_binds)
+
+
+# Submit the circuit(s), already compiled for the backend (see
+# get_compiled_circuit), w/o transpiling them again
+def submit_compiled(qc, backend, shots=8192, parameter_binds=None):
+    from qiskit import assemble
+    qobj = assemble(
+        qc, backend, shots=shots, parameter_binds=parameter_binds)
+    logger.debug("Run")
+    job = backend.run(qobj)
+    logger.debug("Submitted job {0}".format(job.job_id()))
+    return job
+
+
+# Try to cancel a submitted job; not all the backends support it, and a job
+# may be already done, so failures are only logged
+def cancel_job(job):
+    try:
+        job.cancel()
+        logger.debug("Cancelled job {0}".format(job.job_id()))
+    except Exception as e:
+        logger.debug("Can't cancel job {0}: {1}".format(job.job_id(), e))
+
+
+# Shots submitted at each round of run_adaptive
+ADAPTIVE_ROUND_SHOTS = 256
+# The leading state is considered separated from the runner-up when the
+# difference of their occurrences is greater than this number of standard
+# deviations (normal approximation of the sign test)
+ADAPTIVE_Z_SCORE = 3
+
+
+def run_adaptive(qc,
+                 backend,
+                 max_shots=8192,
+                 verify=None,
+                 parameter_binds=None,
+                 round_shots=ADAPTIVE_ROUND_SHOTS,
+                 z_score=ADAPTIVE_Z_SCORE,
+                 job_store=None,
+                 metadata=None):
+    """
+    Execute the circuit in rounds of round_shots shots, accumulating the
+    counts, until the leading state is statistically separated from the
+    runner-up, it is verified, or max_shots shots have been spent.
+
+    :param verify: an optional function taking a state and returning True if
+    it is a valid solution
+    :param parameter_binds: if not None, qc should be already compiled and
+    it is bound to these parameters (see run_with_parameter_binds)
+    :param job_store: if not None, where the job of the first round is saved
+    w/ metadata if the backend can't execute it any time soon (see run)
+    :returns: the result of the last round executed, the counts accumulated
+    over all the rounds, and the number of shots actually spent. If the
+    backend can't execute the circuit any time soon, the rounds stop there;
+    if that happens at the first round, the result is None, the counts are
+    empty and no shot is spent, otherwise the job of the round is cancelled.
+    """
+    if parameter_binds is None:
+        # Compiled once, not at each round
+        qc = get_compiled_circuit(qc, backend)
+    else:
+        parameter_binds = [parameter_binds]
+    counts = {}
+    shots = 0
+    result = None
+    while shots < max_shots:
+        this_shots = min(round_shots, max_shots - shots)
+        job = submit_compiled(qc, backend, this_shots, parameter_binds)
+        if shots == 0:
+            round_result = _wait_for_result(job, backend, this_shots,
+                                            job_store, metadata)
+        else:
+            # The counts of the previous rounds are decoded right away, so
+            # a later round isn't worth storing
+            round_result = _wait_for_result(job, backend, this_shots)
+            if round_result is None:
+                cancel_job(job)
+        if round_result is None:
+            break
+        result = round_result
+        for state, occurrences in result.get_counts(qc).items():
+            counts[state] = counts.get(state, 0) + occurrences
+        shots += this_shots
+        states, occurrences = decoding.get_top_counts(counts, 2)
+        if verify is not None and verify(states[0]):
+            logger.debug("Leading state {} verified".format(states[0]))
+            break
+        runner_up = occurrences[1] if len(occurrences) > 1 else 0
+        if (occurrences[0] - runner_up) > z_score * sqrt(
+                occurrences[0] + runner_up):
+            logger.debug("Leading state {} separated".format(states[0]))
+            break
+    logger.info("Spent {} shots over {}".format(shots, max_shots))
+    return result, counts, shots
+
+
+def _wait_for_result(job, backend, shots, job_store=None, metadata=None):
     logger.info("Job id is {0}".format(job.job_id()))
-    if (not backend.status().operational or backend.status().pending_jobs > 2
-            or backend.status().status_msg == 'calibrating'):
+    status = backend.status()
+    if (not status.operational or status.pending_jobs > 2
+            or status.status_msg == 'calibrating'):
         logger.warn(
             "Backend {0} from provider {1} can't execute the circuit any time soon, try to retrieve the result using the job id later on"
             .format(backend, backend.provider()))
+        if job_store is not None:
+            job_store.save(job, backend, shots, metadata)
         return None
     result = job.result()
     logger.debug("Results ready")
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+
+logger = logging.getLogger(__name__)
+
+# On disk cache of the transpiled circuits.
+# A compiled circuit is identified by the hash of the qasm of the original
+# circuit, the name, coupling map and basis gates of the backend, the
+# optimization level and the qiskit version, and it's pickled in a file
+# named after the hash. Files are touched when read, and the least recently
+# used ones are removed when the cache grows over its maximum size.
+
+# Default maximum size of the cache, in bytes
+DEFAULT_MAX_SIZE = 2**30
+
+
+class TranspileCache():
+    """
+    :param directory: the directory of the cache, created if it doesn't
+    exist
+    :param max_size: the maximum size of the cache, in bytes
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get_key(self, qc, backend, optimization_level=None):
+        configuration = backend.configuration()
+        try:
+            from qiskit import __version__ as qiskit_version
+        except ImportError:
+            qiskit_version = None
+        key = hashlib.sha256(qc.qasm().encode())
+        key.update(
+            json.dumps([
+                backend.name(),
+                getattr(configuration, 'coupling_map', None),
+                getattr(configuration, 'basis_gates', None),
+                optimization_level, qiskit_version
+            ]).encode())
+        return key.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def get(self, key):
+        """
+        :returns: the compiled circuit stored w/ the key, None if missing
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                compiled = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            # F.e. a file pickled by an incompatible version
+            logger.warning("Removing unreadable {0}: {1}".format(path, e))
+            self._remove(path)
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        logger.debug("Transpile cache hit {0}".format(key))
+        return compiled
+
+    def put(self, key, compiled):
+        path = self._get_path(key)
+        # Write and rename, so that concurrent readers never find a file
+        # half written
+        tmp_path = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # Remove the least recently used files until the cache fits max_size
+    def _evict(self):
+        entries = []
+        for f in os.listdir(self.directory):
+            if f.endswith('.pickle'):
+                path = os.path.join(self.directory, f)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        size = sum(entry[2] for entry in entries)
+        for _, path, file_size in sorted(entries):
+            if size <= self.max_size:
+                break
+            logger.debug("Evicting {0}".format(path))
+            self._remove(path)
+            size -= file_size
+
+    def clear(self):
+        for f in os.listdir(self.directory):
+            if f.endswith('.pickle'):
+                self._remove(os.path.join(self.directory, f))
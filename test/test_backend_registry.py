@@ -0,0 +1,74 @@
+from test.common import BasicTestCase
+from isdquantum.utils import misc
+
+
+class BackendRegistryTestCase(BasicTestCase):
+    def setUp(self):
+        self.calls = 0
+
+        def factory():
+            self.calls += 1
+            return misc.LocalProvider([
+                misc.LocalBackend('local_simulator', 10),
+                misc.LocalBackend('small_simulator', 2)
+            ])
+
+        misc.register_provider(factory, 'local', 'localprovider')
+
+    def tearDown(self):
+        misc.unregister_provider('local', 'localprovider')
+
+    def test_provider_is_initialized_once(self):
+        for _ in range(3):
+            backend = misc.get_backend('local', 'local_simulator', 4)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(backend.name(), 'local_simulator')
+
+    def test_backend_is_memoized(self):
+        backend = misc.get_backend('local', 'local_simulator', 4)
+        self.assertIs(misc.get_backend('local', 'local_simulator', 8),
+                      backend)
+
+    def test_aliases_and_cache_clear(self):
+        backend = misc.get_backend('local', 'local_simulator', 4)
+        # The aliases share the same provider and backends
+        self.assertIs(
+            misc.get_backend('localprovider', 'local_simulator', 4), backend)
+        self.assertIs(misc.get_provider('localprovider'),
+                      misc.get_provider('local'))
+        self.assertEqual(self.calls, 1)
+        misc.clear_backend_cache()
+        misc.get_backend('local', 'local_simulator', 4)
+        self.assertEqual(self.calls, 2)
+
+    def test_register_again(self):
+        misc.get_backend('local', 'local_simulator', 4)
+        misc.register_provider(
+            lambda: misc.LocalProvider([misc.LocalBackend('other', 4)]),
+            'localprovider')
+        # The old provider is still registered as 'local', while
+        # 'localprovider' has a provider of its own
+        self.assertEqual(
+            misc.get_backend('localprovider', 'other', 4).name(), 'other')
+        misc.get_backend('local', 'local_simulator', 4)
+        self.assertEqual(self.calls, 1)
+
+    def test_unregister(self):
+        misc.get_backend('local', 'local_simulator', 4)
+        misc.unregister_provider('local')
+        with self.assertRaises(Exception):
+            misc.get_backend('local', 'local_simulator', 4)
+        # The provider is still available under its alias
+        misc.get_backend('localprovider', 'local_simulator', 4)
+        self.assertEqual(self.calls, 1)
+        misc.unregister_provider('localprovider')
+        with self.assertRaises(Exception):
+            misc.get_provider('localprovider')
+
+    def test_not_enough_qubits(self):
+        with self.assertRaises(Exception):
+            misc.get_backend('local', 'small_simulator', 4)
+
+    def test_invalid_provider(self):
+        with self.assertRaises(Exception):
+            misc.get_backend('not_a_provider', 'local_simulator', 4)
@@ -0,0 +1,212 @@
+import json
+import os
+import shutil
+import tempfile
+from argparse import Namespace
+from unittest import mock
+from test.common import BasicTestCase
+from experiments import benchmark
+from isdquantum.circuit import hamming_weight_compute as hwc
+from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.methods.circuits import abstract_circ
+from isdquantum.utils import misc
+from isdquantum.utils.transpile_cache import TranspileCache
+
+
+def _row(n=8, error=None, **metrics):
+    row = {
+        'circuit': benchmark.BRUTEFORCE,
+        'n': n,
+        'k': 4,
+        'w': 1,
+        'p': None,
+        'mct_mode': 'advanced',
+        'nwr_mode': 'benes'
+    }
+    if error is not None:
+        row['error'] = error
+    row.update(metrics)
+    return row
+
+
+class CompareTestCase(BasicTestCase):
+    def setUp(self):
+        self.old = [
+            _row(depth=10, gates={'cx': 4}, build_time=1.0),
+            _row(16, depth=20, gates={'cx': 8}, build_time=2.0)
+        ]
+
+    def test_no_regressions(self):
+        new = [
+            _row(depth=9, gates={'cx': 4}, build_time=1.2),
+            _row(16, depth=20, gates={'cx': 7}, build_time=0.5)
+        ]
+        self.assertEqual(benchmark.compare(self.old, new), ([], []))
+
+    def test_structural_regressions(self):
+        new = [
+            _row(depth=11, gates={'cx': 4, 'ccx': 1}, build_time=1.0),
+            _row(16, depth=21, gates={'cx': 8}, build_time=2.0)
+        ]
+        key = tuple(new[0][f] for f in benchmark.KEY_FIELDS)
+        regressions, broken = benchmark.compare(self.old, new)
+        self.assertEqual(broken, [])
+        self.assertIn((key, 'depth', 10, 11), regressions)
+        # A new type of gate is a regression too
+        self.assertIn((key, 'gates.ccx', 0, 1), regressions)
+        self.assertEqual(len(regressions), 3)
+        # 21 is within 5% of 20, 11 isn't
+        regressions, _ = benchmark.compare(self.old, new, tolerance=0.05)
+        self.assertEqual(len(regressions), 2)
+
+    def test_time_regressions(self):
+        new = [
+            _row(depth=10, gates={'cx': 4}, build_time=1.5),
+            _row(16, depth=20, gates={'cx': 8}, build_time=2.4)
+        ]
+        regressions, _ = benchmark.compare(self.old, new)
+        self.assertEqual([r[1:] for r in regressions],
+                         [('build_time', 1.0, 1.5)])
+        regressions, _ = benchmark.compare(self.old, new, time_tolerance=1)
+        self.assertEqual(regressions, [])
+
+    def test_metrics_not_measured(self):
+        # The old run didn't transpile nor simulate
+        new = [
+            _row(depth=10, gates={'cx': 4}, build_time=1.0,
+                 transpile_time=5.0, compiled_depth=30,
+                 simulation_time=2.0),
+            _row(16, depth=20, gates={'cx': 8}, build_time=2.0,
+                 compiled_n_gates=40)
+        ]
+        self.assertEqual(benchmark.compare(self.old, new), ([], []))
+
+    def test_broken_and_new_configurations(self):
+        new = [
+            _row(error='no combination'),
+            _row(16, depth=20, gates={'cx': 8}, build_time=2.0),
+            _row(32, depth=40, gates={'cx': 16}, build_time=4.0)
+        ]
+        regressions, broken = benchmark.compare(self.old, new)
+        self.assertEqual(regressions, [])
+        self.assertEqual(broken,
+                         [tuple(new[0][f] for f in benchmark.KEY_FIELDS)])
+        # Configurations which couldn't be built before are skipped
+        regressions, broken = benchmark.compare(
+            [_row(error='no combination')], new[:1])
+        self.assertEqual((regressions, broken), ([], []))
+
+
+class FakeCircuit():
+    def __init__(self, name):
+        self.name = name
+
+    def width(self):
+        return 4
+
+    def depth(self):
+        return 3
+
+    def count_ops(self):
+        return {'cx': 2}
+
+    def size(self):
+        return 2
+
+
+class RunTestCase(BasicTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = TranspileCache(self.directory)
+        self.saved_cache = (misc._transpile_cache,
+                            misc._transpile_cache_initialized)
+        misc.set_transpile_cache(self.cache)
+        self.memos = [(memo, dict(memo))
+                      for memo in (abstract_circ._templates, hwg._patterns,
+                                   hwc._patterns)]
+        self.args = Namespace(
+            circuits=[benchmark.BRUTEFORCE],
+            codes=['8:4'],
+            w=[1, 2],
+            p=[1],
+            mct_mode=['advanced'],
+            nwr_mode=['benes'],
+            provider='local',
+            backend='local_simulator',
+            shots=1024,
+            max_sim_qubits=24,
+            no_transpile=False,
+            seed=0,
+            warm_memos=False,
+            output=os.path.join(self.directory, 'results.json'))
+
+    def tearDown(self):
+        misc._transpile_cache, misc._transpile_cache_initialized = (
+            self.saved_cache)
+        for memo, saved in self.memos:
+            memo.clear()
+            memo.update(saved)
+        shutil.rmtree(self.directory)
+
+    def test_transpile_cache_disabled(self):
+        output = self.args.output
+        args = self.args
+        args.w = [1]
+        caches = []
+
+        def run_config(config, args):
+            caches.append(misc.get_transpile_cache())
+            return dict(config, depth=1)
+
+        with mock.patch.object(benchmark, 'run_config', run_config):
+            benchmark.run(args)
+        self.assertEqual(caches, [None])
+        self.assertIs(misc.get_transpile_cache(), self.cache)
+        with open(output) as f:
+            self.assertEqual(json.load(f)['results'][0]['depth'], 1)
+
+    def test_memos_cleared(self):
+        sizes = []
+
+        def run_config(config, args):
+            sizes.append(len(hwg._patterns) + len(hwc._patterns) +
+                         len(abstract_circ._templates))
+            # What the build of the configuration would memoize
+            hwg._patterns[(config['n'], config['w'])] = {}
+            hwc._patterns[config['n']] = {}
+            abstract_circ._templates[config['w']] = {}
+            return dict(config)
+
+        with mock.patch.object(benchmark, 'run_config', run_config):
+            benchmark.run(self.args)
+            self.assertEqual(sizes, [0, 0])
+            self.args.warm_memos = True
+            benchmark.run(self.args)
+        self.assertEqual(sizes[2:], [3, 5])
+
+    def test_transpiled_once(self):
+        isd_circ = mock.Mock(to_measure=[0, 1])
+        isd_circ.build_circuit.return_value = FakeCircuit('qc')
+        compiled = FakeCircuit('compiled')
+        with mock.patch.object(benchmark, '_get_isd_circuit',
+                               return_value=isd_circ), \
+                mock.patch.object(misc, 'get_backend',
+                                  return_value='backend'), \
+                mock.patch('qiskit.transpile', create=True,
+                           return_value=compiled) as transpile, \
+                mock.patch('qiskit.execute', create=True) as execute, \
+                mock.patch.object(misc, 'submit_compiled') as submit:
+            benchmark.run(self.args)
+        with open(self.args.output) as f:
+            rows = json.load(f)['results']
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(transpile.call_count, 2)
+        execute.assert_not_called()
+        # Only the execution of the compiled circuit is timed
+        self.assertEqual(submit.call_count, 2)
+        for args, _ in submit.call_args_list:
+            self.assertIs(args[0], compiled)
+        for row in rows:
+            self.assertEqual(row['n_qubits'], 2)
+            self.assertEqual(row['compiled_depth'], 3)
+            self.assertIn('simulation_time', row)
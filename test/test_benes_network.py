@@ -1,8 +1,9 @@
 import logging
 from parameterized import parameterized
-from math import log, ceil
+from math import log, ceil, factorial
 from test.common import BasicTestCase
 from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.utils import classical_oracle
 from isdclassic.utils import rectangular_codes_hardcoded as rch
 
 
@@ -36,8 +37,6 @@ class BenesNetworkTestCase(BasicTestCase):
         ("n4w1", 4, 1),
         ("n4w2", 4, 2),
         ("n4w3", 4, 3),
-        ("n7w1", 7, 1),
-        ("n7w3", 7, 3),
         ("n8w1", 8, 1),
         ("n8w2", 8, 2),
         ("n8w3", 8, 3),
@@ -48,10 +47,6 @@ class BenesNetworkTestCase(BasicTestCase):
         ("n16w6", 16, 6),
         ("n32w3", 32, 3),
         ("n32w3", 32, 8),
-        ("n33w3", 33, 3),
-        ("n38w9", 38, 9),
-        ("n45w11", 45, 11),
-        ("n54w21", 54, 21),
         ("n64w33", 64, 23),
     ])
     def test_patterns(self, name, n, w):
@@ -62,3 +57,36 @@ class BenesNetworkTestCase(BasicTestCase):
         except:
             self.logger.error(pattern['swaps_pattern'])
             raise
+
+    # W/o padding, all the combinations are reached w/ n lines and less
+    # flips than the ones of the nearest power of 2
+    @parameterized.expand([
+        ("n3w1", 3, 1),
+        ("n5w2", 5, 2),
+        ("n6w3", 6, 3),
+        ("n7w1", 7, 1),
+        ("n7w3", 7, 3),
+        ("n7w5", 7, 5),
+        ("n12w5", 12, 5),
+        ("n20w10", 20, 10),
+        ("n24w4", 24, 4),
+        ("n24w19", 24, 19),
+        ("n33w3", 33, 3),
+        ("n38w9", 38, 9),
+        ("n45w11", 45, 11),
+        ("n54w21", 54, 21),
+    ])
+    def test_patterns_not_power_of_2(self, name, n, w):
+        self._init_swaps_per_step_pattern(n, w)
+        pattern = hwg.generate_qubits_with_given_weight_benes_get_pattern(n, w)
+        self.assertEqual(pattern['n_lines'], n)
+        self.assertLess(pattern['n_flips'], self.n_flips)
+        self.assertTrue(
+            all(a < n and b < n for _, a, b in pattern['swaps_pattern']))
+        n_comb = factorial(n) // factorial(w) // factorial(n - w)
+        if n_comb > 50000:
+            return
+        masks, probs = classical_oracle.benes_pattern_distribution(pattern)
+        self.assertEqual(len(masks), n_comb)
+        self.assertTrue(all(bin(int(m)).count('1') == w for m in masks))
+        self.assertAlmostEqual(probs.sum(), 1)
@@ -1,8 +1,12 @@
 import logging
+import shutil
+import tempfile
 from parameterized import parameterized
 from test.common_circuit import CircuitTestCase
 from test.common_circuit import BasicTestCase
 from isdquantum.methods.algorithms.bruteforce_alg import BruteforceAlg
+from isdquantum.utils import misc
+from isdquantum.utils.transpile_cache import TranspileCache
 # from isdclassic.methods.lee_brickell import LeeBrickell
 from isdclassic.utils import rectangular_codes_hardcoded as rch
 import numpy as np
@@ -68,3 +72,83 @@ class BruteforceAlgTest(CircuitTestCase):
                 self.logger.debug(counts)
                 self.assertGreater(accuracy, 2 / 3)
                 np.testing.assert_array_equal(e, errors[i])
+
+    @parameterized.expand([
+        ("n8_k4_d4_w1_benes", 8, 4, 4, 1, 'benes'),
+        ("n8_k4_d4_w2_fpc", 8, 4, 4, 2, 'fpc'),
+    ])
+    def test_bruteforce_parameterized_syndrome(self, name, n, k, d, w,
+                                               nwr_mode):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        bru = BruteforceAlg(h, syndromes[0], w, True, 'advanced', nwr_mode,
+                            True)
+        bru_circ, qc, backend = bru.prepare_parameterized_circuit_for_backend(
+            'basicaer', 'qasm_simulator')
+        _, es, accuracies = bru.run_syndromes_on_backend(
+            bru_circ, qc, backend, syndromes, 8192)
+        for i, s in enumerate(syndromes):
+            with self.subTest(s=s):
+                self.assertGreater(accuracies[i], 2 / 3)
+                np.testing.assert_array_equal(es[i], errors[i])
+
+    # Two instances build the same circuit, but w/ Parameter objects of
+    # their own, so the second one can't reuse the transpiled circuit of
+    # the first one
+    def test_bruteforce_parameterized_syndrome_cached(self):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            8, 4, 4, 1)
+        directory = tempfile.mkdtemp()
+        saved_cache = (misc._transpile_cache,
+                       misc._transpile_cache_initialized)
+        misc.set_transpile_cache(TranspileCache(directory))
+        try:
+            for _ in range(2):
+                bru = BruteforceAlg(h, syndromes[0], w, True, 'advanced',
+                                    'benes', True)
+                bru_circ, qc, backend = (
+                    bru.prepare_parameterized_circuit_for_backend(
+                        'basicaer', 'qasm_simulator'))
+                _, es, accuracies = bru.run_syndromes_on_backend(
+                    bru_circ, qc, backend, syndromes, 8192)
+                for i, s in enumerate(syndromes):
+                    with self.subTest(s=s):
+                        self.assertGreater(accuracies[i], 2 / 3)
+                        np.testing.assert_array_equal(es[i], errors[i])
+        finally:
+            misc._transpile_cache, misc._transpile_cache_initialized = (
+                saved_cache)
+            shutil.rmtree(directory)
+
+    @parameterized.expand([
+        ("n8_k4_d4_w1_benes", 8, 4, 4, 1, 'benes'),
+        ("n8_k4_d4_w2_benes", 8, 4, 4, 2, 'benes'),
+        ("n8_k4_d4_w2_fpc", 8, 4, 4, 2, 'fpc'),
+    ])
+    def test_bruteforce_batch(self, name, n, k, d, w, nwr_mode):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        bru = BruteforceAlg(h, syndromes[0], w, True, 'advanced', nwr_mode)
+        _, _, es, accuracies = bru.run_batch(syndromes, 'basicaer',
+                                             'qasm_simulator')
+        self.assertEqual(len(es), len(syndromes))
+        for i, s in enumerate(syndromes):
+            with self.subTest(s=s):
+                self.assertGreater(accuracies[i], 2 / 3)
+                np.testing.assert_array_equal(es[i], errors[i])
+
+    @parameterized.expand([
+        ("n8_k4_d4_w1_benes", 8, 4, 4, 1, 'benes'),
+        ("n8_k4_d4_w2_fpc", 8, 4, 4, 2, 'fpc'),
+    ])
+    def test_bruteforce_adaptive(self, name, n, k, d, w, nwr_mode):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        for i, s in enumerate(syndromes):
+            with self.subTest(s=s):
+                bru = BruteforceAlg(h, s, w, True, 'advanced', nwr_mode)
+                _, _, e, accuracy = bru.run(
+                    'basicaer', 'qasm_simulator', adaptive=True)
+                self.assertLess(bru.shots_spent, 8192)
+                self.assertGreater(accuracy, 2 / 3)
+                np.testing.assert_array_equal(e, errors[i])
@@ -0,0 +1,59 @@
+import logging
+from parameterized import parameterized
+from test.common_circuit import CircuitTestCase
+from isdquantum.methods.circuits import abstract_circ
+from isdquantum.methods.circuits.bruteforce_circ import BruteforceISDCircuit
+from isdquantum.methods.circuits.lee_brickell_bruteforce_circ import LeeBrickellCircuit
+from isdclassic.utils import rectangular_codes_hardcoded as rch
+
+
+class BuildReportTest(CircuitTestCase):
+    def _check(self, isd_circ):
+        isd_circ.instrument = True
+        qc = isd_circ.build_circuit()
+        report = isd_circ.get_build_report()
+        top_level = [
+            total for path, total in report['totals'].items()
+            if '/' not in path
+        ]
+        # The top level phases cover all the gates of the circuit
+        self.assertEqual(sum(total['gates'] for total in top_level),
+                         qc.size())
+        self.assertGreaterEqual(sum(total['depth'] for total in top_level),
+                                qc.depth())
+        self.assertEqual(len(report['rounds']), isd_circ.get_grover_rounds())
+        self.assertEqual(report['totals']['oracle']['calls'],
+                         isd_circ.get_grover_rounds())
+
+    @parameterized.expand([
+        ("n8_k4_d4_w2_benes", 8, 4, 4, 2, 'benes', True),
+        ("n8_k4_d4_w2_fpc", 8, 4, 4, 2, 'fpc', True),
+        ("n8_k4_d4_w2_fpc_no_templates", 8, 4, 4, 2, 'fpc', False),
+    ])
+    def test_bruteforce(self, name, n, k, d, w, nwr_mode, use_templates):
+        abstract_circ.clear_templates()
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        bru_circ = BruteforceISDCircuit(h, syndromes[0], w, True, 'advanced',
+                                        nwr_mode)
+        bru_circ.use_templates = use_templates
+        self._check(bru_circ)
+
+    @parameterized.expand([
+        ("n8_k4_d4_w2_p1_benes", 8, 4, 4, 2, 1, 'benes'),
+        ("n8_k4_d4_w2_p1_fpc", 8, 4, 4, 2, 1, 'fpc'),
+    ])
+    def test_lee_brickell(self, name, n, k, d, w, p, nwr_mode):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        self._check(
+            LeeBrickellCircuit(h[:, :k], syndromes[0], w, p, True,
+                               'advanced', nwr_mode))
+
+    def test_no_report_by_default(self):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            8, 4, 4, 1)
+        bru_circ = BruteforceISDCircuit(h, syndromes[0], w, True, 'advanced',
+                                        'benes')
+        bru_circ.build_circuit()
+        self.assertIsNone(bru_circ.get_build_report())
@@ -0,0 +1,23 @@
+from parameterized import parameterized
+from test.common_circuit import CircuitTestCase
+from isdquantum.methods.algorithms.circuit_builder import CircuitBuilder
+from isdquantum.methods.circuits.bruteforce_circ import BruteforceISDCircuit
+from isdclassic.utils import rectangular_codes_hardcoded as rch
+
+
+class CircuitBuilderTest(CircuitTestCase):
+    @parameterized.expand([
+        ("n8_k4_d4_w1_benes", 8, 4, 4, 1, 'benes'),
+        ("n8_k4_d4_w2_fpc", 8, 4, 4, 2, 'fpc'),
+    ])
+    def test_parallel_build(self, name, n, k, d, w, nwr_mode):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        args_list = [(h, s, w, True, 'advanced', nwr_mode) for s in syndromes]
+        exp_circs = CircuitBuilder().build(BruteforceISDCircuit, args_list)
+        with CircuitBuilder(2) as builder:
+            circs = builder.build(BruteforceISDCircuit, args_list)
+        self.assertEqual(len(circs), len(exp_circs))
+        for circ, exp_circ in zip(circs, exp_circs):
+            with self.subTest(s=exp_circ.syndrome):
+                self.assertEqual(circ.circuit, exp_circ.circuit)
@@ -0,0 +1,60 @@
+import logging
+from parameterized import parameterized
+from test.common_circuit import CircuitTestCase
+from isdquantum.methods.circuits import abstract_circ
+from isdquantum.methods.circuits.bruteforce_circ import BruteforceISDCircuit
+from isdquantum.methods.circuits.lee_brickell_bruteforce_circ import LeeBrickellCircuit
+from isdclassic.utils import rectangular_codes_hardcoded as rch
+import numpy as np
+
+
+# Circuits built using the cached templates should be identical to the ones
+# emitted from scratch
+class CircuitTemplatesTest(CircuitTestCase):
+    def setUp(self):
+        abstract_circ.clear_templates()
+
+    def _build(self, isd_circ, use_templates):
+        isd_circ.use_templates = use_templates
+        return isd_circ.build_circuit()
+
+    @parameterized.expand([
+        ("n8_k4_d4_w1_benes", 8, 4, 4, 1, 'benes'),
+        ("n8_k4_d4_w2_benes", 8, 4, 4, 2, 'benes'),
+        ("n8_k4_d4_w2_fpc", 8, 4, 4, 2, 'fpc'),
+    ])
+    def test_bruteforce(self, name, n, k, d, w, nwr_mode):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        for s in syndromes:
+            with self.subTest(s=s):
+                qc_exp = self._build(
+                    BruteforceISDCircuit(h, s, w, True, 'advanced', nwr_mode),
+                    False)
+                qc = self._build(
+                    BruteforceISDCircuit(h, s, w, True, 'advanced', nwr_mode),
+                    True)
+                self.assertEqual(qc.count_ops(), qc_exp.count_ops())
+                self.assertEqual(qc, qc_exp)
+
+    @parameterized.expand([
+        ("k4_r4_w2_p1_benes", 2, 1, 'benes'),
+        ("k4_r4_w2_p1_fpc", 2, 1, 'fpc'),
+    ])
+    def test_lee_brickell(self, name, w, p, nwr_mode):
+        v = np.array([
+            [0, 0, 1, 0],
+            [1, 0, 1, 1],
+            [1, 1, 0, 0],
+            [0, 1, 1, 1],
+        ])
+        for s_sig in (np.array([1, 1, 0, 1]), np.array([0, 0, 0, 1])):
+            with self.subTest(s=s_sig):
+                qc_exp = self._build(
+                    LeeBrickellCircuit(v, s_sig, w, p, True, 'advanced',
+                                       nwr_mode), False)
+                qc = self._build(
+                    LeeBrickellCircuit(v, s_sig, w, p, True, 'advanced',
+                                       nwr_mode), True)
+                self.assertEqual(qc.count_ops(), qc_exp.count_ops())
+                self.assertEqual(qc, qc_exp)
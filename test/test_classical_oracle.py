@@ -0,0 +1,68 @@
+import numpy as np
+from math import factorial
+from parameterized import parameterized
+from test.common import BasicTestCase
+from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.utils import classical_oracle as co
+
+
+class ClassicalOracleTestCase(BasicTestCase):
+    @parameterized.expand([
+        ("n4w0", 4, 0),
+        ("n4w2", 4, 2),
+        ("n8w3", 8, 3),
+        ("n16w5", 16, 5),
+        ("n64w2", 64, 2),
+    ])
+    def test_masks_with_weight(self, name, n, w):
+        masks = co.get_masks_with_weight(n, w)
+        self.assertEqual(
+            len(masks),
+            factorial(n) // factorial(w) // factorial(n - w))
+        self.assertEqual(len(np.unique(masks)), len(masks))
+        self.assertTrue(np.all(co.get_masks_weight(masks) == w))
+
+    @parameterized.expand([
+        ("n4w1", 4, 1),
+        ("n4w3", 4, 3),
+        ("n8w2", 8, 2),
+        ("n8w5", 8, 5),
+        ("n16w4", 16, 4),
+    ])
+    def test_benes_distribution(self, name, n, w):
+        benes_dict = hwg.generate_qubits_with_given_weight_benes_get_pattern(
+            n, w)
+        masks, probs = co.benes_pattern_distribution(benes_dict)
+        np.testing.assert_array_equal(
+            np.sort(masks), co.get_masks_with_weight(n, w))
+        self.assertAlmostEqual(probs.sum(), 1)
+
+    def test_bruteforce_check(self):
+        rng = np.random.RandomState(0)
+        h = rng.randint(0, 2, (6, 12))
+        e = np.zeros(12, dtype=int)
+        e[[1, 4, 9]] = 1
+        syndrome = h.dot(e) % 2
+        masks = co.get_masks_with_weight(12, 3)
+        marked = masks[co.bruteforce_check(h, syndrome, masks)]
+        self.assertIn((1 << 1) | (1 << 4) | (1 << 9), marked)
+        for mask in marked:
+            selected = [i for i in range(12) if int(mask) >> i & 1]
+            np.testing.assert_array_equal(
+                h[:, selected].sum(axis=1) % 2, syndrome)
+
+    def test_lee_brickell_check(self):
+        v = np.array([
+            [0, 0, 1, 0],
+            [1, 0, 1, 1],
+            [1, 1, 0, 0],
+            [0, 1, 1, 1],
+        ])
+        s_sig = np.array([1, 1, 0, 1])
+        masks = co.get_masks_with_weight(4, 1)
+        marked = masks[co.lee_brickell_check(v, s_sig, 2, 1, masks)]
+        np.testing.assert_array_equal(marked, [1 << 3])
+
+    def test_grover_success_probability(self):
+        self.assertAlmostEqual(co.grover_success_probability(1 / 4, 1), 1)
+        self.assertAlmostEqual(co.grover_success_probability(0, 3), 0)
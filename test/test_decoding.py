@@ -0,0 +1,52 @@
+import numpy as np
+from test.common import BasicTestCase
+from isdquantum.utils import decoding
+
+
+class DecodingTestCase(BasicTestCase):
+    def setUp(self):
+        self.counts = {'0011': 10, '1000': 700, '0110': 20, '0101': 500}
+
+    def test_top_counts(self):
+        states, occurrences = decoding.get_top_counts(self.counts, 2)
+        self.assertEqual(states, ['1000', '0101'])
+        np.testing.assert_array_equal(occurrences, [700, 500])
+        states, _ = decoding.get_top_counts(self.counts, None)
+        self.assertEqual(states, ['1000', '0101', '0110', '0011'])
+
+    def test_masks(self):
+        masks = decoding.states_to_masks(['1000', '0101'])
+        np.testing.assert_array_equal(masks, [8, 5])
+        np.testing.assert_array_equal(
+            decoding.masks_to_bitarrays(masks, 4),
+            [[0, 0, 0, 1], [1, 0, 1, 0]])
+        self.assertEqual(decoding.mask_to_positions(masks[1], 4), [0, 2])
+
+    def test_bruteforce_valid(self):
+        h = np.array([
+            [1, 0, 0, 1],
+            [0, 1, 0, 1],
+            [0, 0, 1, 1],
+        ])
+        syndrome = np.array([1, 0, 1])
+        states, _ = decoding.get_top_counts(self.counts, None)
+        masks = decoding.states_to_masks(states)
+        valid = decoding.bruteforce_valid(h, syndrome, 2, masks)
+        # Only columns 0 and 2 sum to the syndrome w/ weight 2
+        np.testing.assert_array_equal(valid, [False, True, False, False])
+        self.assertEqual(decoding.get_first_valid(valid), 1)
+        self.assertIsNone(decoding.get_first_valid(valid[[0, 2]]))
+
+    def test_lee_brickell_valid(self):
+        v = np.array([
+            [0, 0, 1, 0],
+            [1, 0, 1, 1],
+            [1, 1, 0, 0],
+            [0, 1, 1, 1],
+        ])
+        s_sig = np.array([1, 1, 0, 1])
+        states, _ = decoding.get_top_counts(self.counts, None)
+        masks = decoding.states_to_masks(states)
+        np.testing.assert_array_equal(
+            decoding.lee_brickell_valid(v, s_sig, 2, 1, masks),
+            [True, False, False, False])
@@ -21,6 +21,9 @@ class PopulationCountTestCase(CircuitTestCase):
         ("10110100"),
         ("11001011"),
         ("11010000"),
+        ("101"),
+        ("10111"),
+        ("110111"),
     ])
     def test_fast_population_count(self, name):
         nwr_dict = hwc.get_circuit_for_qubits_weight_get_pattern(len(name))
@@ -123,6 +126,8 @@ class PopulationCountTestCase(CircuitTestCase):
         ("3on8", 2, 8),
         ("3on8", 3, 8),
         ("3on8", 4, 8),
+        ("2on5", 2, 5),
+        ("3on6", 3, 6),
     ])
     def test_fast_population_count_w_hadamards(self, name, weight_int, n_bits):
         nwr_dict = hwc.get_circuit_for_qubits_weight_get_pattern(n_bits)
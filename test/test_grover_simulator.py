@@ -0,0 +1,64 @@
+import numpy as np
+from parameterized import parameterized
+from test.common import BasicTestCase
+from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.utils import classical_oracle as co
+from isdquantum.utils import grover_simulator as gs
+
+
+class GroverSimulatorTestCase(BasicTestCase):
+    # Plain statevector simulation of amplitude amplification over the
+    # initial probabilities
+    def _grover(self, probs, marked, rounds):
+        psi0 = np.sqrt(probs)
+        psi = psi0.copy()
+        for _ in range(rounds):
+            psi[marked] *= -1
+            psi = 2 * psi0 * psi0.dot(psi) - psi
+        return psi**2
+
+    @parameterized.expand([
+        ("n4_1marked_r1", 4, [5], 1),
+        ("n4_2marked_r1", 4, [5, 9], 1),
+        ("n6_1marked_r6", 6, [17], 6),
+        ("n6_3marked_r3", 6, [1, 17, 33], 3),
+    ])
+    def test_uniform(self, name, n, marked_idx, rounds):
+        probs = np.full(2**n, 2.**-n)
+        marked = np.zeros(2**n, dtype=bool)
+        marked[marked_idx] = True
+        final_probs, rest_prob = gs.get_final_probabilities(
+            probs, marked, rounds)
+        np.testing.assert_array_almost_equal(final_probs,
+                                             self._grover(probs, marked, rounds))
+        self.assertAlmostEqual(rest_prob, 0)
+
+    @parameterized.expand([
+        ("n8w2", 8, 2, 1),
+        ("n8w3", 8, 3, 2),
+        ("n16w2", 16, 2, 3),
+    ])
+    def test_benes(self, name, n, w, rounds):
+        benes_dict = hwg.generate_qubits_with_given_weight_benes_get_pattern(
+            n, w)
+        masks, probs = co.benes_pattern_distribution(benes_dict)
+        marked = np.zeros(len(masks), dtype=bool)
+        marked[[0, len(masks) // 2]] = True
+        final_probs, _ = gs.get_final_probabilities(probs, marked, rounds)
+        np.testing.assert_array_almost_equal(final_probs,
+                                             self._grover(probs, marked, rounds))
+
+    def test_sample_counts(self):
+        rng = np.random.RandomState(0)
+        masks = co.get_masks_with_weight(8, 2)
+        final_probs = np.zeros(len(masks))
+        final_probs[3] = 0.5
+        counts = gs.sample_counts(masks, final_probs, 0.5, 8, 4096, rng)
+        self.assertEqual(sum(counts.values()), 4096)
+        self.assertTrue(all(len(state) == 8 for state in counts))
+        leading = max(counts, key=lambda key: counts[key])
+        self.assertEqual(int(leading, 2), int(masks[3]))
+        self.assertGreater(counts[leading], 1800)
+        for state in counts:
+            if state != leading:
+                self.assertNotEqual(state.count('1'), 2)
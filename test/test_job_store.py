@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+import numpy as np
+from test.common import BasicTestCase
+from isdquantum.utils import misc
+from isdquantum.utils.job_store import JobStore
+
+
+class FakeJob():
+    def __init__(self, job_id, result=None):
+        self._job_id = job_id
+        self._result = result
+
+    def job_id(self):
+        return self._job_id
+
+    def result(self):
+        return self._result
+
+
+class RetrievingBackend(misc.LocalBackend):
+    def __init__(self, name, n_qubits, jobs):
+        super().__init__(name, n_qubits)
+        self.jobs = jobs
+
+    def retrieve_job(self, job_id):
+        return self.jobs[job_id]
+
+
+class JobStoreTestCase(BasicTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = JobStore(self.directory)
+        self.jobs = {}
+        backend = RetrievingBackend('local_simulator', 10, self.jobs)
+        misc.register_provider(lambda: misc.LocalProvider([backend]),
+                               'local')
+        self.backend = misc.get_backend('local', 'local_simulator', 0)
+
+    def tearDown(self):
+        misc.unregister_provider('local')
+        shutil.rmtree(self.directory)
+
+    def test_save_and_load(self):
+        h = np.array([[1, 0, 1], [0, 1, 1]])
+        self.store.save(
+            FakeJob('job_a'), self.backend, 1024, {
+                'h': h,
+                'w': np.int64(1),
+                'information_set': frozenset([2, 0])
+            })
+        record = self.store.load('job_a')
+        self.assertEqual(record['backend'], 'local_simulator')
+        self.assertEqual(record['shots'], 1024)
+        np.testing.assert_array_equal(np.array(record['metadata']['h']), h)
+        self.assertEqual(record['metadata']['w'], 1)
+        self.assertEqual(record['metadata']['information_set'], [0, 2])
+
+    def test_job_ids_and_remove(self):
+        for job_id in ('job_a', 'job_b', 'job_c'):
+            self.store.save(FakeJob(job_id), self.backend, 1024)
+        self.assertEqual(self.store.job_ids(), ['job_a', 'job_b', 'job_c'])
+        self.store.remove('job_b')
+        self.assertEqual(self.store.job_ids(), ['job_a', 'job_c'])
+        # A new store on the same directory sees the same jobs
+        self.assertEqual(
+            JobStore(self.directory).job_ids(), ['job_a', 'job_c'])
+
+    def test_get_result(self):
+        self.jobs['job_a'] = FakeJob('job_a', 'result_a')
+        self.store.save(self.jobs['job_a'], self.backend, 1024, {'w': 1})
+        record, result = self.store.get_result('job_a', 'local', wait=True)
+        self.assertEqual(result, 'result_a')
+        self.assertEqual(record['metadata'], {'w': 1})
@@ -27,6 +27,15 @@ class LeeBrickellAlgTest(CircuitTestCase):
         other_logger.setLevel(cls.logger.level)
         other_logger.handlers = cls.logger.handlers
 
+    # The first classically verified state is accepted, even if it's not the
+    # most frequent one, so instead of a bound on the accuracy the returned
+    # error is checked to be a solution: it has weight w and h.e = s
+    def _assert_solution(self, h, s, w, e, accuracy):
+        self.assertGreater(accuracy, 0)
+        self.assertLessEqual(accuracy, 1)
+        self.assertEqual(np.sum(e), w)
+        np.testing.assert_array_equal(np.dot(h, e) % 2, s)
+
     @parameterized.expand([
         ("n8_k4_d4_w2_p1", 8, 4, 4, 2, 1),
         ("n8_k4_d4_w2_p2", 8, 4, 4, 2, 2),
@@ -46,7 +55,7 @@ class LeeBrickellAlgTest(CircuitTestCase):
                 qc, result, e, accuracy = lee.run('aer', 'qasm_simulator')
                 counts = result.get_counts()
                 self.logger.debug(counts)
-                self.assertGreater(accuracy, 2 / 3)
+                self._assert_solution(h, s, w, e, accuracy)
                 np.testing.assert_array_equal(e, errors[i])
 
     @parameterized.expand([
@@ -67,5 +76,60 @@ class LeeBrickellAlgTest(CircuitTestCase):
                 qc, result, e, accuracy = lee.run('aer', 'qasm_simulator')
                 counts = result.get_counts()
                 self.logger.debug(counts)
-                self.assertGreater(accuracy, 2 / 3)
+                self._assert_solution(h, s, w, e, accuracy)
+                np.testing.assert_array_equal(e, errors[i])
+
+    @parameterized.expand([
+        ("n8_k4_d4_w2_p1", 8, 4, 4, 2, 1),
+    ])
+    def test_information_sets_memo(self, name, n, k, d, w, p):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        lee = LeeBrickellMixedAlg(h, syndromes[0], w, p, True, 'advanced',
+                                  'fpc')
+        _, _, e, _ = lee.run('aer', 'qasm_simulator')
+        np.testing.assert_array_equal(e, errors[0])
+        # Each information set failed at most once, since duplicates are
+        # skipped
+        for information_set, failures in lee._information_sets.items():
+            self.assertEqual(len(information_set), k)
+            self.assertLessEqual(failures, lee.information_set_tries)
+        # A second run w/ the same instance doesn't repeat failed
+        # information sets either
+        _, _, e, _ = lee.run('aer', 'qasm_simulator')
+        np.testing.assert_array_equal(e, errors[0])
+        for failures in lee._information_sets.values():
+            self.assertLessEqual(failures, lee.information_set_tries)
+
+    @parameterized.expand([
+        ("n8_k4_d4_w2_p1_benes", 8, 4, 4, 2, 1, 'benes'),
+        ("n8_k4_d4_w2_p1_fpc", 8, 4, 4, 2, 1, 'fpc'),
+    ])
+    def test_algorithm_batched(self, name, n, k, d, w, p, nwr_mode):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        for i, s in enumerate(syndromes):
+            with self.subTest(s=s):
+                lee = LeeBrickellMixedAlg(h, s, w, p, True, 'advanced',
+                                          nwr_mode)
+                qcs, result, e, accuracy = lee.run_batched(
+                    'aer', 'qasm_simulator', 4)
+                self.assertLessEqual(len(qcs), 4)
+                self._assert_solution(h, s, w, e, accuracy)
+                np.testing.assert_array_equal(e, errors[i])
+
+    @parameterized.expand([
+        ("n8_k4_d4_w2_p1_benes", 8, 4, 4, 2, 1, 'benes'),
+        ("n8_k4_d4_w2_p1_fpc", 8, 4, 4, 2, 1, 'fpc'),
+    ])
+    def test_algorithm_pipelined(self, name, n, k, d, w, p, nwr_mode):
+        h, _, syndromes, errors, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        for i, s in enumerate(syndromes):
+            with self.subTest(s=s):
+                lee = LeeBrickellMixedAlg(h, s, w, p, True, 'advanced',
+                                          nwr_mode)
+                qc, result, e, accuracy = lee.run_pipelined(
+                    'aer', 'qasm_simulator', max_in_flight=3)
+                self._assert_solution(h, s, w, e, accuracy)
                 np.testing.assert_array_equal(e, errors[i])
@@ -0,0 +1,131 @@
+from unittest import mock
+import numpy as np
+from test.common import BasicTestCase
+from isdquantum.utils import misc
+from isdquantum.methods.algorithms import lee_brickell_mixed_alg
+from isdquantum.methods.algorithms.lee_brickell_mixed_alg import LeeBrickellMixedAlg
+
+
+class FakeResult():
+    def __init__(self, counts):
+        self.counts = counts
+
+    def get_counts(self, experiment=None):
+        return self.counts
+
+
+# Always return the same RREF, so that a single information set exists
+class FakeISD():
+    ALG_LEE_BRICKELL = 'lee_brickell'
+
+    def __init__(self, h, syndrome, w, alg):
+        self.h = h
+        self.syndrome = syndrome
+
+    def get_matrix_rref(self):
+        perm = np.eye(self.h.shape[1], dtype=int)
+        return self.h, None, perm, self.syndrome
+
+
+class FakeJob():
+    def __init__(self, result):
+        self._result = result
+
+    def result(self):
+        return self._result
+
+
+class FakeBuilder():
+    def build(self, circuit_class, args_list):
+        return [mock.Mock() for _ in args_list]
+
+
+class InformationSetsTestCase(BasicTestCase):
+    # '01' selects the first column of v, which is the only solution;
+    # '10' and '11' are not valid
+    VALID = {'01': 900, '10': 100}
+    INVALID = {'10': 900, '11': 100}
+
+    def setUp(self):
+        self.h = np.array([[1, 0, 1, 0], [0, 1, 0, 1]])
+        self.syndrome = np.array([1, 0])
+        self.w = 1
+        self.lee = LeeBrickellMixedAlg(self.h, self.syndrome, self.w, 1, True,
+                                       'advanced', 'benes')
+        self.lee.max_skipped_draws = 5
+
+    def _run(self, counts_list, run_method='run', **kwargs):
+        results = [FakeResult(counts) for counts in counts_list]
+        with mock.patch.object(lee_brickell_mixed_alg, 'ISDWithoutLists',
+                               FakeISD), \
+                mock.patch.object(self.lee, '_get_circuit',
+                                  return_value=(None, 'qc', 'backend')), \
+                mock.patch.object(self.lee, '_get_experiments_metadata',
+                                  return_value={}), \
+                mock.patch.object(misc, 'get_backend',
+                                  return_value='backend'), \
+                mock.patch.object(misc, 'run',
+                                  side_effect=results) as run_mock:
+            outcome = getattr(self.lee, run_method)(
+                'local', 'local_simulator', shots=1000, **kwargs)
+        return outcome, run_mock
+
+    def test_retry_after_failure(self):
+        # Grover fails the first time on the only information set w/ a
+        # solution, which is tried again once all the draws are skipped
+        (_, _, error, accuracy), run_mock = self._run(
+            [self.INVALID, self.VALID])
+        self.assertEqual(run_mock.call_count, 2)
+        self.assertEqual(np.sum(error), self.w)
+        self.assertTrue(
+            np.array_equal(np.mod(np.dot(self.h, error), 2), self.syndrome))
+        self.assertAlmostEqual(accuracy, 0.9)
+
+    def test_exhausted(self):
+        self.lee.max_information_set_passes = 3
+        with self.assertRaises(Exception):
+            self._run([self.INVALID] * 3)
+        self.assertEqual(self.lee._information_sets,
+                         {frozenset([0, 1]): 1})
+
+    def test_batched_retry_after_failure(self):
+        (qcs, _, error, _), run_mock = self._run(
+            [self.INVALID, self.VALID], 'run_batched', batch_size=3,
+            builder=FakeBuilder())
+        self.assertEqual(run_mock.call_count, 2)
+        # The same information set is executed once per batch
+        self.assertEqual(len(qcs), 1)
+        self.assertTrue(
+            np.array_equal(np.mod(np.dot(self.h, error), 2), self.syndrome))
+
+    def test_batched_exhausted(self):
+        with self.assertRaises(Exception):
+            self._run([self.INVALID] * 3, 'run_batched', batch_size=3,
+                      builder=FakeBuilder())
+
+    def test_pipelined_retry_after_failure(self):
+        with mock.patch.object(misc, 'submit') as submit_mock:
+            submit_mock.side_effect = [
+                FakeJob(FakeResult(counts))
+                for counts in [self.INVALID, self.VALID]
+            ]
+            (_, _, error, _), _ = self._run([], 'run_pipelined')
+        # The only information set isn't submitted again while in flight
+        self.assertEqual(submit_mock.call_count, 2)
+        self.assertTrue(
+            np.array_equal(np.mod(np.dot(self.h, error), 2), self.syndrome))
+
+    def test_pipelined_exhausted(self):
+        with mock.patch.object(misc, 'submit') as submit_mock:
+            submit_mock.side_effect = [
+                FakeJob(FakeResult(self.INVALID)) for _ in range(3)
+            ]
+            with self.assertRaises(Exception):
+                self._run([], 'run_pipelined')
+        self.assertEqual(submit_mock.call_count, 3)
+
+    def test_circuits_cache_size(self):
+        self.lee.max_cached_circuits = 2
+        for i in range(3):
+            self.lee._cache_circuit(self.lee._circuits, i, i)
+        self.assertEqual(list(self.lee._circuits), [1, 2])
@@ -0,0 +1,35 @@
+from test.common import BasicTestCase
+from isdquantum.methods.algorithms import lee_brickell_planner as planner
+
+
+class LeeBrickellPlannerTestCase(BasicTestCase):
+    def test_admissible_ps(self):
+        self.assertEqual(planner.get_admissible_ps(8, 4, 2), [1, 2])
+        # w - p must fit in r = 2
+        self.assertEqual(planner.get_admissible_ps(8, 6, 4), [2, 3, 4])
+
+    def test_information_set_probabilities_sum_to_one(self):
+        n, k, w = 16, 8, 3
+        total = sum(
+            planner.get_information_set_probability(n, k, w, p)
+            for p in range(w + 1))
+        self.assertAlmostEqual(total, 1)
+
+    def test_plan_p(self):
+        p, estimates = planner.plan_p(8, 4, 2, 'advanced', 'fpc')
+        self.assertIn(p, planner.get_admissible_ps(8, 4, 2))
+        self.assertEqual(p,
+                         min(estimates, key=lambda e: e['cost'])['p'])
+        for estimate in estimates:
+            self.assertGreater(estimate['depth'], 0)
+            self.assertGreater(estimate['cost'], 0)
+
+    def test_infeasible_p(self):
+        # The Benes network can't generate all the k selectors
+        self.assertFalse(planner.is_circuit_feasible(4, 4, 'benes'))
+        self.assertTrue(planner.is_circuit_feasible(4, 4, 'fpc'))
+        self.assertIsNone(planner.estimate_cost(8, 4, 4, 4, 'basic', 'benes'))
+        self.assertIsNotNone(
+            planner.estimate_cost(8, 4, 4, 4, 'basic', 'fpc'))
+        _, estimates = planner.plan_p(8, 4, 4, 'basic', 'benes')
+        self.assertEqual([e['p'] for e in estimates], [1, 2, 3])
@@ -0,0 +1,64 @@
+import numpy as np
+from test.common import BasicTestCase
+from isdquantum.utils import misc
+from qiskit import QuantumCircuit, QuantumRegister
+
+
+class StatevectorTestCase(BasicTestCase):
+    def setUp(self):
+        self.qc = QuantumCircuit(
+            QuantumRegister(2, 'a'), QuantumRegister(3, 'b'),
+            QuantumRegister(1, 'c'))
+        rng = np.random.RandomState(0)
+        sv = rng.normal(size=64) + 1j * rng.normal(size=64)
+        sv[rng.uniform(size=64) < 0.5] = 0
+        self.statevector = sv / np.linalg.norm(sv)
+
+    def test_prob_and_phase_detailed(self):
+        results = misc.from_statevector_to_prob_and_phase_detailed(
+            self.statevector, self.qc)
+        results_arr = misc.from_statevector_to_prob_and_phase_detailed(
+            self.statevector, self.qc, as_array=True)
+        self.assertEqual(len(results), len(results_arr))
+        for row in results_arr:
+            state = "{:06b}".format(row['state'])
+            prob = abs(self.statevector[row['state']])**2
+            self.assertEqual(results[state]['prob'], "{:.4f}".format(prob))
+            self.assertAlmostEqual(row['prob'], prob)
+            detailed = results[state]['detailed']
+            self.assertEqual(detailed['c'], state[0])
+            self.assertEqual(detailed['b'], state[1:4])
+            self.assertEqual(detailed['a'], state[4:])
+            self.assertEqual(row['b'], int(state[1:4], 2))
+
+    def test_qregs_probabilities(self):
+        a, b, c = self.qc.qregs
+        probs = abs(self.statevector)**2
+        states = np.arange(64)
+        a_values = states & 3
+        b_values = (states >> 2) & 7
+        c_values = states >> 5
+        np.testing.assert_array_almost_equal(
+            misc.get_qregs_probabilities(self.statevector, self.qc, b),
+            np.bincount(b_values, probs))
+        np.testing.assert_array_almost_equal(
+            misc.get_qregs_probabilities(self.statevector, self.qc, [c, a]),
+            np.bincount(c_values + 2 * a_values, probs))
+
+    def test_streamed(self):
+        a, b, c = self.qc.qregs
+        chunks = [self.statevector[i:i + 10] for i in range(0, 64, 10)]
+        np.testing.assert_array_almost_equal(
+            misc.get_qregs_probabilities(iter(chunks), self.qc, [b, c]),
+            misc.get_qregs_probabilities(self.statevector, self.qc, [b, c]))
+        self.assertEqual(
+            misc.from_statevector_to_prob_and_phase(iter(chunks), self.qc),
+            misc.from_statevector_to_prob_and_phase(self.statevector,
+                                                    self.qc))
+
+    def test_top_states(self):
+        probs = abs(self.statevector)**2
+        states, top_probs = misc.get_top_states(self.statevector, 5)
+        np.testing.assert_array_equal(states, np.argsort(-probs)[:5])
+        np.testing.assert_array_almost_equal(top_probs,
+                                             np.sort(probs)[::-1][:5])
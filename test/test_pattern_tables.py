@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from test.common import BasicTestCase
+from isdquantum.circuit import hamming_weight_generate as hwg
+from isdquantum.circuit import hamming_weight_compute as hwc
+from isdquantum.circuit import pattern_tables
+
+
+class PatternTablesTestCase(BasicTestCase):
+    # The tests clear and load the memos of the modules, which are restored
+    # afterwards
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.memos = [(memo, dict(memo))
+                      for memo in (hwg._patterns, hwg._tables, hwc._patterns,
+                                   hwc._tables)]
+
+    def tearDown(self):
+        for memo, saved in self.memos:
+            memo.clear()
+            memo.update(saved)
+        shutil.rmtree(self.directory)
+
+    def _get_patterns(self, max_n, ns):
+        benes = {}
+        fpc = {}
+        n = 2
+        while n <= max_n:
+            for r in range(1, n):
+                benes[(n, r)] = hwg._get_pattern(n, r)
+            fpc[n] = hwc._get_pattern(n)
+            n *= 2
+        for n in ns:
+            for r in range(1, n):
+                benes[(n, r)] = hwg._get_pattern(n, r)
+            fpc[n] = hwc._get_pattern(n)
+        return benes, fpc
+
+    def test_memoized(self):
+        pattern = hwg.generate_qubits_with_given_weight_benes_get_pattern(
+            7, 3)
+        self.assertEqual(pattern['n_lines'], 7)
+        self.assertIs(
+            hwg.generate_qubits_with_given_weight_benes_get_pattern(
+                7, 3)['swaps_pattern'], pattern['swaps_pattern'])
+        self.assertNotEqual(
+            hwg.generate_qubits_with_given_weight_benes_get_pattern(8, 3),
+            pattern)
+        pattern = hwc.get_circuit_for_qubits_weight_get_pattern(5)
+        self.assertEqual(pattern['n_lines'], 5)
+        self.assertIs(
+            hwc.get_circuit_for_qubits_weight_get_pattern(5)
+            ['adders_pattern'], pattern['adders_pattern'])
+        self.assertEqual(
+            hwc.get_circuit_for_qubits_weight_get_pattern(8)['n_lines'], 8)
+
+    def test_fpc_pattern(self):
+        pattern = hwc.get_circuit_for_qubits_weight_get_pattern(4)
+        self.assertEqual(pattern['n_couts'], 3)
+        # a_i is i and c_j is 4 + j
+        self.assertEqual([i.tolist() for i in pattern['adders_pattern']],
+                         [[0, 1, 4], [2, 3, 5], [1, 4, 3, 5, 6]])
+        self.assertEqual(pattern['results'].tolist(), [3, 5, 6])
+        with self.assertRaises(ValueError):
+            pattern['results'][0] = 0
+
+    def test_fpc_pattern_wo_padding(self):
+        pattern = hwc.get_circuit_for_qubits_weight_get_pattern(3)
+        self.assertEqual(pattern['n_lines'], 3)
+        # a_2 is added to a_0 + a_1 in the 2nd stage, w/ c_1 as its high bit
+        self.assertEqual(pattern['n_couts'], 3)
+        self.assertEqual([i.tolist() for i in pattern['adders_pattern']],
+                         [[0, 1, 3], [1, 3, 2, 4, 5]])
+        self.assertEqual(pattern['results'].tolist(), [2, 4, 5])
+        # 24 lines and 24 couts, instead of the 32 and 31 of the padding
+        pattern = hwc.get_circuit_for_qubits_weight_get_pattern(24)
+        self.assertEqual((pattern['n_lines'], pattern['n_couts']), (24, 24))
+        self.assertEqual(len(pattern['results']), 6)
+
+    def test_export_and_load(self):
+        filename = os.path.join(self.directory, 'patterns.npz')
+        pattern_tables.export_patterns(filename, 16, (7, 12))
+        benes, fpc = self._get_patterns(16, (7, 12))
+        hwg._patterns.clear()
+        hwc._patterns.clear()
+        pattern_tables.load_patterns(filename)
+        self.assertEqual(len(hwg._tables), len(benes))
+        self.assertEqual(len(hwc._tables), len(fpc))
+        for (n, r), pattern in benes.items():
+            self.assertEqual(
+                hwg.generate_qubits_with_given_weight_benes_get_pattern(
+                    n, r), pattern)
+        for n, pattern in fpc.items():
+            loaded = hwc.get_circuit_for_qubits_weight_get_pattern(n)
+            self.assertEqual(loaded['n_couts'], pattern['n_couts'])
+            self.assertEqual(
+                [i.tolist() for i in loaded['adders_pattern']],
+                [i.tolist() for i in pattern['adders_pattern']])
+            self.assertEqual(loaded['results'].tolist(),
+                             pattern['results'].tolist())
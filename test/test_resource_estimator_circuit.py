@@ -0,0 +1,122 @@
+import logging
+from parameterized import parameterized
+from test.common_circuit import CircuitTestCase
+from isdquantum.methods.circuits import resource_estimator
+from isdquantum.methods.circuits.bruteforce_circ import BruteforceISDCircuit
+from isdquantum.methods.circuits.lee_brickell_bruteforce_circ import LeeBrickellCircuit
+from isdclassic.utils import rectangular_codes_hardcoded as rch
+from qiskit import QuantumCircuit, QuantumRegister
+import numpy as np
+
+
+# The estimates should match exactly the circuits actually built, in all
+# the mct modes
+class ResourceEstimatorTest(CircuitTestCase):
+    def _check(self, qc, estimate):
+        self.assertEqual(estimate['width'], qc.width())
+        counts = qc.count_ops()
+        counts.pop('barrier', None)
+        self.assertEqual(estimate['counts'], counts)
+        self.assertEqual(estimate['depth'], qc.depth())
+
+    @parameterized.expand([
+        ("basic", 'basic'),
+        ("advanced", 'advanced'),
+        ("noancilla", 'noancilla'),
+    ])
+    def test_mct(self, name, mct_mode):
+        for c in range(3, 9):
+            with self.subTest(c=c):
+                n_anc = c - 2 if mct_mode == 'basic' else 1
+                qr = QuantumRegister(c + 1 + n_anc)
+                qc = QuantumCircuit(qr)
+                qc.mct([qr[i] for i in range(c)], qr[c],
+                       [qr[i] for i in range(c + 1, c + 1 + n_anc)],
+                       mode=mct_mode)
+                g = resource_estimator._Gates(
+                    mct_mode, list(range(c + 1, c + 1 + n_anc)))
+                g.mct(list(range(c)), c)
+                levels = [0] * (c + 1 + n_anc)
+                resource_estimator._apply(levels, g.gates)
+                self.assertEqual(dict(resource_estimator._count(g.gates)),
+                                 qc.count_ops())
+                self.assertEqual(max(levels), qc.depth())
+
+    def test_mct_counts(self):
+        def counts(c, mct_mode, n_anc):
+            return dict(
+                resource_estimator._get_mct_template(c, mct_mode,
+                                                     n_anc)['counts'])
+
+        # The V-chain
+        self.assertEqual(counts(5, 'basic', 3), {'ccx': 7})
+        # A 3-controlled not of Barenco et al.
+        self.assertEqual(counts(3, 'advanced', 1), {
+            'h': 14,
+            'cu1': 7,
+            'cx': 6
+        })
+        # 4 multicontrolled nots of 3 controls
+        self.assertEqual(counts(5, 'advanced', 1), {
+            'h': 56,
+            'cu1': 28,
+            'cx': 24
+        })
+        # 7 controlled u1 of 3 u1 and 2 cx, and the cx of the Gray code
+        self.assertEqual(counts(3, 'noancilla', 0), {
+            'h': 2,
+            'u1': 21,
+            'cx': 14 + 6
+        })
+
+    @parameterized.expand([
+        ("n8_k4_d4_w1_basic_benes", 8, 4, 4, 1, 'basic', 'benes'),
+        ("n8_k4_d4_w2_basic_benes", 8, 4, 4, 2, 'basic', 'benes'),
+        ("n8_k4_d4_w2_advanced_benes", 8, 4, 4, 2, 'advanced', 'benes'),
+        ("n8_k4_d4_w2_advanced_fpc", 8, 4, 4, 2, 'advanced', 'fpc'),
+        ("n8_k4_d4_w2_noancilla_benes", 8, 4, 4, 2, 'noancilla', 'benes'),
+        ("n8_k4_d4_w2_noancilla_fpc", 8, 4, 4, 2, 'noancilla', 'fpc'),
+    ])
+    def test_bruteforce(self, name, n, k, d, w, mct_mode, nwr_mode):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        for s in (syndromes[0], None):
+            with self.subTest(s=s):
+                qc = BruteforceISDCircuit(h, s, w, True, mct_mode,
+                                          nwr_mode).build_circuit()
+                estimate = resource_estimator.estimate_bruteforce(
+                    n, n - k, w, mct_mode, nwr_mode, True, h, s)
+                self._check(qc, estimate)
+
+    @parameterized.expand([
+        ("n8_k4_d4_w2_p1_basic_benes", 8, 4, 4, 2, 1, 'basic', 'benes'),
+        ("n8_k4_d4_w2_p2_basic_benes", 8, 4, 4, 2, 2, 'basic', 'benes'),
+        ("n8_k4_d4_w2_p1_basic_fpc", 8, 4, 4, 2, 1, 'basic', 'fpc'),
+        ("n8_k4_d4_w2_p1_advanced_fpc", 8, 4, 4, 2, 1, 'advanced', 'fpc'),
+        ("n8_k4_d4_w2_p1_advanced_benes", 8, 4, 4, 2, 1, 'advanced',
+         'benes'),
+        ("n8_k4_d4_w2_p1_noancilla_fpc", 8, 4, 4, 2, 1, 'noancilla', 'fpc'),
+        ("n8_k4_d4_w2_p1_noancilla_benes", 8, 4, 4, 2, 1, 'noancilla',
+         'benes'),
+    ])
+    def test_lee_brickell(self, name, n, k, d, w, p, mct_mode, nwr_mode):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            n, k, d, w)
+        v = h[:, :k]
+        for s in (syndromes[0], None):
+            with self.subTest(s=s):
+                qc = LeeBrickellCircuit(v, s, w, p, True, mct_mode,
+                                        nwr_mode).build_circuit()
+                estimate = resource_estimator.estimate_lee_brickell(
+                    k, n - k, w, p, mct_mode, nwr_mode, True, v, s)
+                self._check(qc, estimate)
+
+    def test_dense_matrix_is_an_upper_bound(self):
+        h, _, syndromes, _, w, _ = rch.get_isd_systematic_parameters(
+            8, 4, 4, 2)
+        estimate = resource_estimator.estimate_lee_brickell(
+            4, 4, 2, 1, 'basic', 'fpc', True, h[:, :4], syndromes[0])
+        dense = resource_estimator.estimate_lee_brickell(
+            4, 4, 2, 1, 'basic', 'fpc')
+        self.assertGreaterEqual(dense['counts']['cx'],
+                                estimate['counts']['cx'])
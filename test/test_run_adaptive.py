@@ -0,0 +1,200 @@
+import shutil
+import tempfile
+from unittest import mock
+import numpy as np
+from test.common import BasicTestCase
+from isdquantum.utils import misc
+from isdquantum.utils.job_store import JobStore
+from isdquantum.methods.algorithms.bruteforce_alg import BruteforceAlg
+from isdquantum.methods.algorithms.lee_brickell_mixed_alg import LeeBrickellMixedAlg
+
+
+class FakeResult():
+    def __init__(self, counts):
+        self.counts = counts
+
+    def get_counts(self, experiment=None):
+        return self.counts
+
+
+class FakeJob():
+    def __init__(self, job_id='job', result=None):
+        self._job_id = job_id
+        self._result = result
+
+    def job_id(self):
+        return self._job_id
+
+    def result(self):
+        return self._result
+
+
+class BusyBackend(misc.LocalBackend):
+    def status(self):
+        from types import SimpleNamespace
+        return SimpleNamespace(
+            operational=True, pending_jobs=10, status_msg='active')
+
+
+class BusyRetrievingBackend(BusyBackend):
+    def __init__(self, name, n_qubits, jobs):
+        super().__init__(name, n_qubits)
+        self.jobs = jobs
+
+    def retrieve_job(self, job_id):
+        return self.jobs[job_id]
+
+
+class RunAdaptiveTestCase(BasicTestCase):
+    def setUp(self):
+        self.h = np.array([[1, 0, 1, 1], [0, 1, 1, 0]])
+        self.syndrome = np.array([1, 1])
+
+    def _run_adaptive(self, backend, results, max_shots=1024, verify=None):
+        job = FakeJob()
+        job.result = mock.Mock(side_effect=results)
+        with mock.patch.object(misc, 'get_compiled_circuit',
+                               return_value='compiled') as compile_mock:
+            with mock.patch.object(misc, 'submit_compiled',
+                                   return_value=job) as submit_mock:
+                outcome = misc.run_adaptive('qc', backend, max_shots, verify)
+        return outcome, compile_mock, submit_mock
+
+    def test_compiled_once(self):
+        # The two states are never separated, so all the rounds are run
+        results = [FakeResult({'01': 128, '10': 128}) for _ in range(4)]
+        outcome, compile_mock, submit_mock = self._run_adaptive(
+            misc.LocalBackend('local_simulator', 10), results)
+        result, counts, shots = outcome
+        self.assertEqual(shots, 1024)
+        self.assertEqual(counts, {'01': 512, '10': 512})
+        compile_mock.assert_called_once()
+        self.assertEqual(submit_mock.call_count, 4)
+        for args, _ in submit_mock.call_args_list:
+            self.assertEqual(args[0], 'compiled')
+
+    def test_busy_backend(self):
+        (result, counts, shots), _, submit_mock = self._run_adaptive(
+            BusyBackend('busy_simulator', 10), [])
+        self.assertIsNone(result)
+        self.assertEqual(counts, {})
+        self.assertEqual(shots, 0)
+        self.assertEqual(submit_mock.call_count, 1)
+
+    def test_bruteforce_empty_counts(self):
+        bru = BruteforceAlg(self.h, self.syndrome, 1, True, 'advanced',
+                            'benes')
+        self.assertEqual(bru._decode_counts({}, 0, self.syndrome),
+                         (None, None))
+        with mock.patch.object(
+                misc, 'run_adaptive', return_value=(None, {}, 0)):
+            self.assertEqual(
+                bru.run_circuit_on_backend_adaptive(
+                    mock.Mock(qregs=[], cregs=[]),
+                    BusyBackend('busy_simulator', 10), 1024),
+                (None, None, None))
+
+    def test_lee_brickell_empty_counts(self):
+        lee = LeeBrickellMixedAlg(self.h, self.syndrome, 1, 1, True,
+                                  'advanced', 'benes')
+        v = self.h[:, :2]
+        information_set = frozenset([0, 1])
+        self.assertEqual(
+            lee._check_counts(v, self.syndrome, information_set, {}, 0),
+            (None, None))
+        # An aborted execution says nothing about the information set
+        self.assertNotIn(information_set, lee._information_sets)
+
+
+# The first round of an adaptive execution on a busy backend is saved in the
+# job store, and then resumed through the algorithm
+class ResumeAdaptiveTestCase(BasicTestCase):
+    def setUp(self):
+        self.h = np.array([[1, 0, 1, 1], [0, 1, 1, 0]])
+        self.syndrome = np.array([1, 1])
+        # The only error of weight 1 is the third column
+        self.error = [0, 0, 1, 0]
+        self.directory = tempfile.mkdtemp()
+        self.store = JobStore(self.directory)
+        self.jobs = {}
+        self.backend = BusyRetrievingBackend('local_simulator', 10,
+                                             self.jobs)
+        misc.register_provider(lambda: misc.LocalProvider([self.backend]),
+                               'local')
+        self.qc = mock.Mock(qregs=[], cregs=[])
+
+    def tearDown(self):
+        misc.unregister_provider('local')
+        shutil.rmtree(self.directory)
+
+    # The job of the round, w/ counts over the shots of the first round
+    def _get_job(self, valid_state, invalid_state):
+        shots = misc.ADAPTIVE_ROUND_SHOTS
+        counts = {valid_state: shots - 56, invalid_state: 56}
+        return FakeJob('job_a', FakeResult(counts))
+
+    def _submit(self, job):
+        return mock.patch.multiple(
+            misc,
+            get_compiled_circuit=mock.Mock(return_value='compiled'),
+            submit_compiled=mock.Mock(return_value=job))
+
+    def test_bruteforce_resume(self):
+        bru = BruteforceAlg(self.h, self.syndrome, 1, True, 'advanced',
+                            'benes')
+        bru.job_store = self.store
+        job = self._get_job('0100', '0001')
+        with self._submit(job):
+            self.assertEqual(
+                bru.run_circuit_on_backend_adaptive(self.qc, self.backend,
+                                                    1024),
+                (None, None, None))
+        self.assertEqual(self.store.job_ids(), ['job_a'])
+        self.jobs['job_a'] = job
+        result, errors, accuracies = bru.resume('job_a', 'local', wait=True)
+        self.assertIs(result, job.result())
+        self.assertEqual(errors, [self.error])
+        self.assertAlmostEqual(accuracies[0], 200 / 256)
+        self.assertEqual(self.store.job_ids(), [])
+
+    def test_lee_brickell_resume(self):
+        lee = LeeBrickellMixedAlg(self.h, self.syndrome, 1, 1, True,
+                                  'advanced', 'benes')
+        lee.job_store = self.store
+        # The third column is moved to the information set
+        perm = np.eye(4, dtype=int)[:, [2, 1, 0, 3]]
+        v = np.dot(self.h, perm)[:, :2]
+        drawn = (v, perm, self.syndrome, frozenset([2, 1]))
+        job = self._get_job('01', '10')
+        with self._submit(job), \
+                mock.patch.object(lee, '_draw_rref', return_value=drawn), \
+                mock.patch.object(lee, '_get_circuit',
+                                  return_value=(None, self.qc, self.backend)):
+            self.assertEqual(
+                lee.run('local', 'local_simulator', 1024, adaptive=True),
+                (self.qc, None, None, None))
+        self.assertEqual(self.store.job_ids(), ['job_a'])
+        self.jobs['job_a'] = job
+        result, error, accuracy = lee.resume('job_a', 'local', wait=True)
+        self.assertIs(result, job.result())
+        self.assertEqual(error.tolist(), self.error)
+        self.assertAlmostEqual(accuracy, 200 / 256)
+        self.assertEqual(self.store.job_ids(), [])
+
+    def test_later_round_not_stored(self):
+        results = [FakeResult({'01': 128, '10': 128})]
+        backend = mock.Mock(wraps=self.backend)
+        # Only the first round is executed
+        backend.status.side_effect = [
+            misc.LocalBackend('local', 1).status(),
+            self.backend.status()
+        ]
+        job = FakeJob('job_a', results[0])
+        job.cancel = mock.Mock()
+        with self._submit(job):
+            result, counts, shots = misc.run_adaptive(
+                'qc', backend, 1024, job_store=self.store, metadata={})
+        self.assertIs(result, results[0])
+        self.assertEqual(shots, misc.ADAPTIVE_ROUND_SHOTS)
+        self.assertEqual(self.store.job_ids(), [])
+        job.cancel.assert_called_once()
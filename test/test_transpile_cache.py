@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+from test.common import BasicTestCase
+from isdquantum.utils import misc
+from isdquantum.utils.transpile_cache import TranspileCache
+
+
+class QasmCircuit():
+    def __init__(self, qasm, parameters=()):
+        self._qasm = qasm
+        self.parameters = set(parameters)
+
+    def qasm(self):
+        return self._qasm
+
+
+class TranspileCacheTestCase(BasicTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = TranspileCache(self.directory)
+        self.backend = misc.LocalBackend('local_simulator', 10)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_key(self):
+        key = self.cache.get_key(QasmCircuit('x q[0];'), self.backend)
+        self.assertEqual(
+            self.cache.get_key(QasmCircuit('x q[0];'), self.backend), key)
+        self.assertNotEqual(
+            self.cache.get_key(QasmCircuit('x q[1];'), self.backend), key)
+        self.assertNotEqual(
+            self.cache.get_key(
+                QasmCircuit('x q[0];'),
+                misc.LocalBackend('other_simulator', 10)), key)
+        self.assertNotEqual(
+            self.cache.get_key(QasmCircuit('x q[0];'), self.backend, 2), key)
+
+    def test_get_and_put(self):
+        key = self.cache.get_key(QasmCircuit('x q[0];'), self.backend)
+        self.assertIsNone(self.cache.get(key))
+        self.cache.put(key, QasmCircuit('u3 q[0];'))
+        self.assertEqual(self.cache.get(key).qasm(), 'u3 q[0];')
+        # Another instance on the same directory finds it
+        self.assertEqual(
+            TranspileCache(self.directory).get(key).qasm(), 'u3 q[0];')
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_unreadable_entry(self):
+        key = self.cache.get_key(QasmCircuit('x q[0];'), self.backend)
+        with open(os.path.join(self.directory, key + '.pickle'), 'w') as f:
+            f.write('not a pickle')
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_lru_eviction(self):
+        keys = ['a', 'b', 'c']
+        for i, key in enumerate(keys):
+            self.cache.put(key, QasmCircuit(key * 100))
+            path = os.path.join(self.directory, key + '.pickle')
+            os.utime(path, (i, i))
+        entry_size = os.path.getsize(os.path.join(self.directory, 'a.pickle'))
+        # a is read, so b is the least recently used
+        self.cache.get('a')
+        self.cache.max_size = 2 * entry_size
+        self.cache.put('d', QasmCircuit('d' * 100))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNone(self.cache.get('c'))
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNotNone(self.cache.get('d'))
+
+    def test_free_parameters_not_cached(self):
+        saved_cache = (misc._transpile_cache,
+                       misc._transpile_cache_initialized)
+        misc.set_transpile_cache(self.cache)
+        try:
+            with mock.patch('qiskit.transpile', create=True) as transpile:
+                transpile.side_effect = lambda qc, *args, **kwargs: qc
+                for _ in range(2):
+                    misc.get_compiled_circuit(
+                        QasmCircuit('rx(s0) q[0];', ['s0']), self.backend)
+                misc.get_compiled_circuit(QasmCircuit('x q[0];'),
+                                          self.backend)
+        finally:
+            misc._transpile_cache, misc._transpile_cache_initialized = (
+                saved_cache)
+        self.assertEqual(transpile.call_count, 3)
+        # Only the circuit w/o parameters is looked up and stored
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 1))
+        self.assertEqual(len(os.listdir(self.directory)), 1)